@@ -0,0 +1,210 @@
+import math
+import numpy as np
+from mesh_algorithm import FaceTable
+
+
+def outflow_bc(u_in: np.array, u_farfield: np.array, normal: np.array) -> np.array:
+    gamma = 1.4
+    p = (gamma - 1) * (
+        u_in[3] - 0.5 * (u_in[1] * u_in[1] + u_in[2] * u_in[2]) / u_in[0]
+    )
+    a = math.sqrt(gamma * p / u_in[0])
+
+    v_n = (u_in[1] * normal[0] + u_in[2] * normal[1]) / u_in[0]
+
+    if v_n < 0.0:
+        if -v_n > a:
+            return u_farfield
+        else:
+            e = u_in[3]
+            return np.array([u_farfield[0], u_farfield[1], u_farfield[2], e])
+
+    else:
+        if v_n > a:
+            return u_in
+        else:
+            e = u_farfield[3]
+            return np.array([u_in[0], u_in[1], u_in[2], e])
+
+
+def outflow_bc_batch(
+    u_in: np.array, u_farfield: np.array, normals: np.array
+) -> np.array:
+    """Ghost states of outflow_bc for many boundary faces at once.
+    u_in ... interior states, shape (N, 4)
+    u_farfield ... far-field states, shape (N, 4) or (4,)
+    normals ... outward unit normals, shape (N, 2)
+    """
+    gamma = 1.4
+    u_farfield = np.broadcast_to(u_farfield, u_in.shape)
+
+    rho = u_in[..., 0]
+    p = (gamma - 1) * (
+        u_in[..., 3]
+        - 0.5 * (u_in[..., 1] * u_in[..., 1] + u_in[..., 2] * u_in[..., 2]) / rho
+    )
+    a = np.sqrt(gamma * p / rho)
+
+    v_n = (u_in[..., 1] * normals[..., 0] + u_in[..., 2] * normals[..., 1]) / rho
+
+    inflow = v_n < 0.0
+    supersonic = np.abs(v_n) > a
+
+    # Inflow takes the far-field state, outflow the interior state ...
+    u_ghost = np.where(inflow[..., np.newaxis], u_farfield, u_in)
+    # ... except for energy at subsonic boundaries, which comes from the other side
+    u_ghost[..., 3] = np.where(
+        supersonic, u_ghost[..., 3], np.where(inflow, u_in[..., 3], u_farfield[..., 3])
+    )
+    return u_ghost
+
+
+def slip_wall_bc_batch(u_in: np.array, normals: np.array) -> np.array:
+    """Ghost states of inviscid walls: the interior state with the normal
+    velocity reversed, so no mass crosses the wall.
+    u_in ... interior states, shape (N, 4)
+    normals ... outward unit normals, shape (N, 2)
+    """
+    n_x = normals[..., 0]
+    n_y = normals[..., 1]
+    m_n = u_in[..., 1] * n_x + u_in[..., 2] * n_y
+
+    u_ghost = u_in.copy()
+    u_ghost[..., 1] -= 2.0 * m_n * n_x
+    u_ghost[..., 2] -= 2.0 * m_n * n_y
+    return u_ghost
+
+
+class OutflowBC:
+    """Extrapolation: outflow_bc with the interior state as far-field state"""
+
+    name = "outflow"
+
+    def ghost_states(self, u_in: np.array, normals: np.array) -> np.array:
+        return outflow_bc_batch(u_in, u_in, normals)
+
+
+class FarfieldBC:
+    """Characteristic far-field: outflow_bc with a fixed far-field state.
+    state ... conservative far-field state, shape (4,)
+    """
+
+    name = "farfield"
+
+    def __init__(self, state: np.array):
+        self.state = np.asarray(state, dtype=np.float64)
+
+    def ghost_states(self, u_in: np.array, normals: np.array) -> np.array:
+        return outflow_bc_batch(u_in, self.state, normals)
+
+
+class SlipWallBC:
+    """Inviscid wall, see slip_wall_bc_batch"""
+
+    name = "slip-wall"
+
+    def ghost_states(self, u_in: np.array, normals: np.array) -> np.array:
+        return slip_wall_bc_batch(u_in, normals)
+
+
+class SymmetryBC(SlipWallBC):
+    """Symmetry plane, for inviscid flow the same ghost state as a slip wall"""
+
+    name = "symmetry"
+
+
+class SupersonicInletBC:
+    """Supersonic inflow: every quantity is prescribed.
+    state ... conservative inflow state, shape (4,)
+    """
+
+    name = "supersonic-inlet"
+
+    def __init__(self, state: np.array):
+        self.state = np.asarray(state, dtype=np.float64)
+
+    def ghost_states(self, u_in: np.array, normals: np.array) -> np.array:
+        return np.broadcast_to(self.state, u_in.shape).copy()
+
+
+BOUNDARY_CONDITIONS = {
+    bc.name: bc
+    for bc in (OutflowBC, FarfieldBC, SlipWallBC, SymmetryBC, SupersonicInletBC)
+}
+
+
+def make_boundary_condition(name: str, state: np.array = None):
+    """Create boundary condition 'outflow', 'slip-wall', 'symmetry', or
+    'farfield', 'supersonic-inlet' with given conservative state
+    """
+    if name not in BOUNDARY_CONDITIONS:
+        raise ValueError(f"Unknown boundary condition '{name}'")
+    if state is None:
+        return BOUNDARY_CONDITIONS[name]()
+    return BOUNDARY_CONDITIONS[name](state)
+
+
+class BoundaryConditions:
+    """Boundary conditions of all boundary face groups of a face table, keyed
+    by group name (the physical name in the mesh file). Ghost states of each
+    group are computed for all its faces at once.
+    conditions ... maps group names to boundary conditions, given as objects
+                   or names of boundary conditions without state
+    default ... boundary condition of groups missing in conditions; if None,
+                every boundary group must be listed
+    """
+
+    def __init__(self, faces: FaceTable, conditions: dict = None, default="outflow"):
+        conditions = {} if conditions is None else conditions
+        group_names = faces.boundary_group_names()
+
+        unknown = sorted(set(conditions) - set(group_names))
+        if unknown:
+            raise ValueError(f"No boundary face groups named {unknown}")
+
+        self.conditions = {}
+        for name in group_names:
+            bc = conditions.get(name, default)
+            if bc is None:
+                raise ValueError(f"No boundary condition for group '{name}'")
+            self.conditions[name] = (
+                make_boundary_condition(bc) if isinstance(bc, str) else bc
+            )
+
+        # Group ranges relative to the first boundary face
+        boundary_start = faces.boundary_slice().start
+        self.__group_offsets = faces.group_offsets[1:] - boundary_start
+        self.__boundary_start = boundary_start
+        self.__group_bcs = [self.conditions[name] for name in group_names]
+
+    def ghost_states(
+        self, u_in: np.array, normals: np.array, face_ids: np.array = None
+    ) -> np.array:
+        """Ghost states of boundary faces, shape of u_in.
+        u_in ... interior states of the faces, shape (N, 4), or (K, N, 4) for
+                 an ensemble of K solutions
+        normals ... outward unit normals of the faces, shape (N, 2)
+        face_ids ... face table indices of the faces in any order, if not
+                     given the faces are all boundary faces in table order
+        """
+        u_ghost = np.empty_like(u_in)
+        offsets = self.__group_offsets
+
+        if face_ids is None:
+            for idx, bc in enumerate(self.__group_bcs):
+                group = slice(offsets[idx], offsets[idx + 1])
+                u_ghost[..., group, :] = bc.ghost_states(
+                    u_in[..., group, :], normals[group]
+                )
+            return u_ghost
+
+        group_ids = np.searchsorted(
+            offsets, face_ids - self.__boundary_start, side="right"
+        )
+        for idx, bc in enumerate(self.__group_bcs):
+            in_group = group_ids == idx + 1
+            if np.any(in_group):
+                u_ghost[..., in_group, :] = bc.ghost_states(
+                    u_in[..., in_group, :], normals[in_group]
+                )
+        return u_ghost
@@ -0,0 +1,175 @@
+from dataclasses import dataclass
+import numpy as np
+from cell_group import CellGroup
+from mesh import Mesh
+from mesh_algorithm import FaceTable, cell_adjacency
+from mesh_geometry import MeshGeometry
+
+
+@dataclass
+class Subdomain:
+    """Part of a mesh owned by one process, extended by layers of ghost cells.
+    Local cells are numbered owned cells first, then ghost cells.
+    part ... index of this subdomain
+    mesh ... local mesh made of owned and ghost cells
+    cells ... global index of every local cell
+    num_owned ... number of owned cells, local cells [0, num_owned)
+    send ... for every neighbor part, local indices of owned cells whose
+             values the neighbor needs for its ghost cells
+    recv ... for every neighbor part, local indices of ghost cells owned
+             by the neighbor, in the order the neighbor sends them
+    """
+
+    part: int
+    mesh: Mesh
+    cells: np.array
+    num_owned: int
+    send: dict[int, np.array]
+    recv: dict[int, np.array]
+
+    def neighbors(self) -> list[int]:
+        return sorted(self.recv.keys())
+
+
+def recursive_coordinate_bisection(points: np.array, num_parts: int) -> np.array:
+    """Split points (e.g. cell centroids) into num_parts parts of (almost)
+    equal size. The point set is cut recursively perpendicular to the axis of
+    its largest extent; a part count which is not a power of two is split
+    proportionally.
+    Returns part index of every point, array of shape (num_points,).
+    """
+    num_points = points.shape[0]
+    assert 0 < num_parts <= num_points
+
+    parts = np.empty(num_points, dtype=np.int32)
+
+    def bisect(point_ids: np.array, first_part: int, num: int):
+        if num == 1:
+            parts[point_ids] = first_part
+            return
+
+        num_left = num // 2
+        coords = points[point_ids]
+        axis = np.argmax(np.ptp(coords, axis=0))
+        order = np.argsort(coords[:, axis], kind="stable")
+        split = point_ids.shape[0] * num_left // num
+
+        bisect(point_ids[order[:split]], first_part, num_left)
+        bisect(point_ids[order[split:]], first_part + num_left, num - num_left)
+
+    bisect(np.arange(num_points), 0, num_parts)
+    return parts
+
+
+def build_subdomains(
+    mesh: Mesh, parts: np.array, num_ghost_layers: int = 1
+) -> list[Subdomain]:
+    """Split mesh into subdomains according to the part index of every cell.
+    Each subdomain gets num_ghost_layers layers of ghost cells around its owned
+    cells and contains all faces whose adjacent cells are local.
+    """
+    num_cells = mesh.cells().dof_ids.shape[0]
+    num_parts = int(parts.max()) + 1
+    adjacency = cell_adjacency(mesh.edges(), num_cells)
+
+    # Ghost cells of every part, sorted by owner part and global index, so
+    # that the owner can send them in the same order
+    owned_cells = [np.flatnonzero(parts == part) for part in range(num_parts)]
+    ghost_cells = []
+    for part in range(num_parts):
+        is_local = parts == part
+        for _ in range(num_ghost_layers):
+            is_local = is_local | (adjacency @ is_local.astype(np.int8) > 0)
+        ghosts = np.flatnonzero(is_local & (parts != part))
+        ghost_cells.append(ghosts[np.argsort(parts[ghosts], kind="stable")])
+
+    subdomains = []
+    for part in range(num_parts):
+        cells = np.concatenate([owned_cells[part], ghost_cells[part]])
+        num_owned = owned_cells[part].shape[0]
+
+        ghost_owners = parts[ghost_cells[part]]
+        recv = {
+            int(owner): num_owned + np.flatnonzero(ghost_owners == owner)
+            for owner in np.unique(ghost_owners)
+        }
+
+        subdomains.append(
+            Subdomain(
+                part=part,
+                mesh=_local_mesh(mesh, cells),
+                cells=cells,
+                num_owned=num_owned,
+                send={},
+                recv=recv,
+            )
+        )
+
+    # Send maps mirror the receive maps of the neighbors
+    for subdomain in subdomains:
+        global_to_local = np.full(num_cells, -1, dtype=np.int64)
+        global_to_local[subdomain.cells] = np.arange(subdomain.cells.shape[0])
+        for other in subdomains:
+            if subdomain.part in other.recv:
+                requested = other.cells[other.recv[subdomain.part]]
+                subdomain.send[other.part] = global_to_local[requested]
+
+    return subdomains
+
+
+def _local_mesh(mesh: Mesh, cells: np.array) -> Mesh:
+    """Mesh made of the given cells (global indices) of mesh, with all faces
+    whose adjacent cells are among them. Local cell i is global cell cells[i].
+    """
+    faces = mesh.edges()
+    geometry = mesh.geometry()
+    cell_group = mesh.cells()
+
+    global_to_local = np.full(cell_group.dof_ids.shape[0], -1, dtype=np.int64)
+    global_to_local[cells] = np.arange(cells.shape[0])
+
+    has_R = faces.right_cell > -1
+    local_L = global_to_local[faces.left_cell]
+    local_R = np.where(has_R, global_to_local[faces.right_cell], -1)
+    selected = (local_L > -1) & (~has_R | (local_R > -1))
+
+    # Faces stay in their groups, so group blocks stay contiguous
+    face_group = np.searchsorted(
+        faces.group_offsets, np.arange(faces.num_faces()), side="right"
+    )
+    group_offsets = np.searchsorted(
+        face_group[selected], np.arange(1, len(faces.group_names) + 2)
+    )
+
+    # Local node numbering
+    dof_ids = cell_group.dof_ids[cells]
+    nodes, local_dof_ids = np.unique(dof_ids, return_inverse=True)
+    local_node_ids = np.searchsorted(nodes, faces.node_ids[selected])
+
+    local_faces = FaceTable(
+        local_L[selected],
+        local_R[selected],
+        local_node_ids,
+        faces.group_names,
+        group_offsets,
+    )
+    local_geometry = MeshGeometry(
+        cell_volumes=geometry.cell_volumes[cells],
+        cell_centroids=geometry.cell_centroids[cells],
+        face_normals=geometry.face_normals[selected],
+        face_lengths=geometry.face_lengths[selected],
+        face_midpoints=geometry.face_midpoints[selected],
+    )
+    local_cells = CellGroup(
+        cell_group.ref_elem,
+        local_dof_ids.reshape(dof_ids.shape),
+        cell_group.tag,
+        cell_group.name,
+    )
+
+    return Mesh(
+        [local_cells],
+        mesh.node_coordinates()[nodes],
+        faces=local_faces,
+        geometry=local_geometry,
+    )
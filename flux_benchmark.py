@@ -0,0 +1,52 @@
+import time
+import numpy as np
+from numerical_flux import FLUX_SCHEMES
+
+
+def random_face_data(rng, num_faces: int) -> tuple[np.array, np.array, np.array]:
+    """Left states, right states and unit normals of num_faces random faces.
+    States have positive density and pressure and sub- to supersonic speeds.
+    """
+    gamma = 1.4
+
+    def states():
+        rho = rng.uniform(0.1, 2.0, num_faces)
+        v1 = rng.uniform(-2.0, 2.0, num_faces)
+        v2 = rng.uniform(-2.0, 2.0, num_faces)
+        p = rng.uniform(0.05, 2.0, num_faces)
+        e = p / (gamma - 1) + 0.5 * rho * (v1 * v1 + v2 * v2)
+        return np.column_stack([rho, rho * v1, rho * v2, e])
+
+    angle = rng.uniform(0.0, 2.0 * np.pi, num_faces)
+    normals = np.column_stack([np.cos(angle), np.sin(angle)])
+    return states(), states(), normals
+
+
+def benchmark_flux_schemes(
+    num_faces: int = 100000, repeat: int = 10, seed: int = 0
+) -> dict[str, float]:
+    """Wall time per face in seconds of every scheme in FLUX_SCHEMES, best of
+    repeat evaluations on the same random faces
+    """
+    u_L, u_R, normals = random_face_data(np.random.default_rng(seed), num_faces)
+
+    cost_per_face = {}
+    for name, flux_fn in FLUX_SCHEMES.items():
+        flux_fn(u_L, u_R, normals)  # warm up
+        best = np.inf
+        for _ in range(repeat):
+            start = time.perf_counter()
+            flux_fn(u_L, u_R, normals)
+            best = min(best, time.perf_counter() - start)
+        cost_per_face[name] = best / num_faces
+    return cost_per_face
+
+
+if __name__ == "__main__":
+    num_faces = 100000
+    cost_per_face = benchmark_flux_schemes(num_faces)
+    reference = cost_per_face["ausm"]
+
+    print(f"Flux schemes, {num_faces} faces, best of 10")
+    for name, cost in sorted(cost_per_face.items(), key=lambda item: item[1]):
+        print(f"{name:>8}: {cost * 1e9:8.1f} ns/face ({cost / reference:.2f} x ausm)")
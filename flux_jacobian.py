@@ -0,0 +1,126 @@
+import numpy as np
+import scipy.sparse
+from boundary_conditions import BoundaryConditions
+from mesh_algorithm import FaceTable
+from mesh_geometry import MeshGeometry
+from numerical_flux import get_flux_scheme
+
+
+def flux_derivatives(flux_fn, u: np.array, flux: np.array) -> np.array:
+    """Derivatives of flux_fn with respect to u by forward differences.
+    flux_fn ... function of states u, shape (N, 4), returning fluxes (N, 4)
+    flux ... flux_fn(u)
+    Returns dF/du, array of shape (N, 4, 4), [f, i, k] = dF_i / du_k of face f.
+    """
+    derivatives = np.empty(u.shape + (u.shape[1],))
+    for k in range(u.shape[1]):
+        # Step relative to the magnitude of the perturbed component
+        h = np.sqrt(np.finfo(np.float64).eps) * np.maximum(np.abs(u[:, k]), 1.0)
+        u_perturbed = u.copy()
+        u_perturbed[:, k] += h
+        derivatives[:, :, k] = (flux_fn(u_perturbed) - flux) / h[:, np.newaxis]
+    return derivatives
+
+
+class FluxJacobian:
+    """Jacobian dRes/dU of the first-order residual with a flux scheme of
+    numerical_flux.FLUX_SCHEMES and given boundary conditions (outflow if
+    None), as a block sparse matrix with 4 x 4 blocks.
+    The block pattern follows from the face table: one diagonal block per cell
+    and two off-diagonal blocks per interior face. It is built once, every
+    assembly only fills the block values.
+    """
+
+    def __init__(
+        self,
+        faces: FaceTable,
+        geometry: MeshGeometry,
+        flux_scheme: str = "ausm",
+        boundary_conditions: BoundaryConditions = None,
+    ):
+        self.faces = faces
+        self.geometry = geometry
+        self.__flux = get_flux_scheme(flux_scheme)
+        if boundary_conditions is None:
+            boundary_conditions = BoundaryConditions(faces)
+        self.__boundary_conditions = boundary_conditions
+        num_cells = geometry.cell_volumes.shape[0]
+        self.num_cells = num_cells
+
+        interior = faces.interior_slice()
+        idx_L = faces.left_cell[interior]
+        idx_R = faces.right_cell[interior]
+        num_interior = idx_L.shape[0]
+
+        # Blocks: diagonal of all cells, then (L, R) and (R, L) of interior faces
+        block_rows = np.concatenate([np.arange(num_cells), idx_L, idx_R])
+        block_cols = np.concatenate([np.arange(num_cells), idx_R, idx_L])
+        self.__block_order = np.lexsort((block_cols, block_rows))
+        self.__num_interior = num_interior
+
+        sorted_rows = block_rows[self.__block_order]
+        indices = block_cols[self.__block_order]
+        indptr = np.searchsorted(sorted_rows, np.arange(num_cells + 1))
+
+        # Position of the diagonal block of every cell in the sorted blocks
+        block_position = np.empty_like(self.__block_order)
+        block_position[self.__block_order] = np.arange(block_position.shape[0])
+        self.diagonal_blocks = block_position[:num_cells]
+
+        self.matrix = scipy.sparse.bsr_matrix(
+            (np.zeros((block_rows.shape[0], 4, 4)), indices, indptr),
+            shape=(4 * num_cells, 4 * num_cells),
+        )
+
+        # Sum face blocks into the diagonal blocks of left and right cells
+        num_faces = faces.num_faces()
+        self.__left_incidence = scipy.sparse.csr_matrix(
+            (np.ones(num_faces), (faces.left_cell, np.arange(num_faces))),
+            shape=(num_cells, num_faces),
+        )
+        self.__right_incidence = scipy.sparse.csr_matrix(
+            (np.ones(num_interior), (idx_R, np.arange(num_interior))),
+            shape=(num_cells, num_interior),
+        )
+
+    def assemble(self, U: np.array) -> scipy.sparse.bsr_matrix:
+        """Fill the Jacobian for state U. The returned matrix is reused by the
+        next call.
+        """
+        faces = self.faces
+        normals = self.geometry.face_normals
+        lengths = self.geometry.face_lengths[:, np.newaxis, np.newaxis]
+
+        interior = faces.interior_slice()
+        boundary = faces.boundary_slice()
+
+        # Interior faces: derivatives with respect to left and right state
+        u_L = U[faces.left_cell[interior]]
+        u_R = U[faces.right_cell[interior]]
+        n = normals[interior]
+        flux_fn = self.__flux
+        flux = flux_fn(u_L, u_R, n)
+        dF_dL = flux_derivatives(lambda u: flux_fn(u, u_R, n), u_L, flux)
+        dF_dR = flux_derivatives(lambda u: flux_fn(u_L, u, n), u_R, flux)
+        dF_dL *= lengths[interior]
+        dF_dR *= lengths[interior]
+
+        # Boundary faces: the ghost state depends on the interior state
+        u_b = U[faces.left_cell[boundary]]
+        n_b = normals[boundary]
+
+        def boundary_flux(u: np.array) -> np.array:
+            return flux_fn(u, self.__boundary_conditions.ghost_states(u, n_b), n_b)
+
+        dF_db = flux_derivatives(boundary_flux, u_b, boundary_flux(u_b))
+        dF_db *= lengths[boundary]
+
+        # Left cells gain +F, right cells -F
+        diagonal = self.__left_incidence @ np.concatenate([dF_dL, dF_db]).reshape(
+            -1, 16
+        )
+        diagonal -= self.__right_incidence @ dF_dR.reshape(-1, 16)
+
+        blocks = np.concatenate([diagonal.reshape(-1, 4, 4), dF_dR, -dF_dL])
+        self.matrix.data[:] = blocks[self.__block_order]
+        return self.matrix
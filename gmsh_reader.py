@@ -8,7 +8,9 @@ from cell_group import CellGroup
 
 
 class GmshReader:
-    """Class to read finite element mesh in Gmsh format"""
+    """Class to read finite element mesh in Gmsh format.
+    Both ASCII and binary variants of the MSH 2.2 format are supported.
+    """
 
     __sections = {
         "$MeshFormat": "$EndMeshFormat",
@@ -16,6 +18,7 @@ class GmshReader:
         "$Entities": "$EndEntities",
         "$Nodes": "$EndNodes",
         "$Elements": "$EndElements",
+        "$ElementData": "$EndElementData",
     }
 
     def __init__(self):
@@ -23,49 +26,146 @@ class GmshReader:
 
     def load(self, mesh_file_name: str):
         """Read mesh from file in Gmsh file format."""
-        with open(mesh_file_name, encoding="utf-8") as infile:
-            phys_sections = None
-            nodes = None
-            cell_groups = None
-
-            line = infile.readline().strip()
-
-            while line:
-                if line in GmshReader.__sections:
-                    section_data = []
-                    section_start = line
-                    section_stop = GmshReader.__sections[section_start]
-                    line = infile.readline().strip()
-
-                    while line and line != section_stop:
-                        section_data.append(line)
-                        line = infile.readline().strip()
-
-                    match section_start:
-                        case "$PhysicalNames":
-                            phys_sections = GmshReader.__read_physical_names_section(
-                                section_data
-                            )
-                        case "$Nodes":
-                            nodes = GmshReader.__read_nodes_section(section_data)
-                        case "$Elements":
-                            cell_groups = GmshReader.__read_elements_section(
-                                section_data
-                            )
-
-                else:
-                    line = infile.readline().strip()
-
-            assert phys_sections is not None
-            assert nodes is not None
-            assert cell_groups is not None
-
-            for cg in cell_groups:
-                for section in phys_sections:
-                    if cg.ref_elem.topo_dim() == section[0] and cg.tag == section[1]:
-                        cg.name = section[2]
-
-            return nodes, cell_groups
+        sections, byte_order = GmshReader.__read_sections(mesh_file_name)
+
+        assert "$PhysicalNames" in sections
+        assert "$Nodes" in sections
+        assert "$Elements" in sections
+
+        phys_sections = GmshReader.__read_physical_names_section(
+            sections["$PhysicalNames"][0].decode("utf-8").strip().splitlines()
+        )
+        nodes = GmshReader.__read_nodes_section(sections["$Nodes"][0], byte_order)
+        cell_groups = GmshReader.__read_elements_section(
+            sections["$Elements"][0], byte_order
+        )
+
+        for cg in cell_groups:
+            for section in phys_sections:
+                if cg.ref_elem.topo_dim() == section[0] and cg.tag == section[1]:
+                    cg.name = section[2]
+
+        return nodes, cell_groups
+
+    def load_element_data(self, mesh_file_name: str) -> dict[str, np.array]:
+        """Read all '$ElementData' sections from file in Gmsh file format.
+        Returns a dictionary which maps the name of each data view to an array
+        of shape (number of elements, number of components). Row i holds the
+        values of the element with number i + 1.
+        """
+        sections, byte_order = GmshReader.__read_sections(mesh_file_name)
+
+        element_data = {}
+        for payload in sections.get("$ElementData", []):
+            name, values = GmshReader.__read_element_data_section(payload, byte_order)
+            element_data[name] = values
+        return element_data
+
+    @classmethod
+    def __read_sections(cls, mesh_file_name: str) -> tuple[dict[str, list[bytes]], str]:
+        """Split file content into sections. Returns a dictionary which maps
+        section start tag to the list of payloads (content between the start and
+        stop tag) of all sections with this tag, and the byte order of binary
+        data ('<' or '>'), or None if the file is in ASCII format.
+        """
+        with open(mesh_file_name, "rb") as infile:
+            content = infile.read()
+
+        sections = {}
+        byte_order = None
+        pos = 0
+
+        while pos < len(content):
+            line, payload_start = GmshReader.__read_line(content, pos)
+
+            if not line.startswith("$"):
+                pos = payload_start
+                continue
+
+            section_start = line
+            section_stop = GmshReader.__sections.get(
+                section_start, "$End" + section_start[1:]
+            )
+
+            if byte_order is not None and section_start in (
+                "$Nodes",
+                "$Elements",
+                "$ElementData",
+            ):
+                # Binary payload can contain anything, find its end from its size
+                payload_stop = GmshReader.__binary_payload_end(
+                    section_start, content, payload_start, byte_order
+                )
+                stop = content.find(section_stop.encode("ascii"), payload_stop)
+            else:
+                stop = content.find(("\n" + section_stop).encode("ascii"), pos) + 1
+                payload_stop = stop
+            assert stop > 0
+
+            payload = content[payload_start:payload_stop]
+            sections.setdefault(section_start, []).append(payload)
+
+            if section_start == "$MeshFormat":
+                byte_order = GmshReader.__read_mesh_format_section(payload)
+
+            _, pos = GmshReader.__read_line(content, stop)
+
+        return sections, byte_order
+
+    @classmethod
+    def __read_line(cls, content: bytes, pos: int) -> tuple[str, int]:
+        """Return line starting at pos (without whitespace) and start of next line"""
+        line_end = content.find(b"\n", pos)
+        line_end = len(content) if line_end < 0 else line_end
+        return content[pos:line_end].decode("utf-8").strip(), line_end + 1
+
+    @classmethod
+    def __read_mesh_format_section(cls, data: bytes) -> str:
+        """
+        version-number file-type data-size
+        one-binary (only in binary files)
+        Return byte order of binary data or None for ASCII files
+        """
+        header, binary_start = GmshReader.__read_line(data, 0)
+        version, file_type, data_size = header.split()
+
+        assert version.startswith("2"), f"Unsupported MSH version {version}"
+        if int(file_type) == 0:
+            return None
+
+        assert int(data_size) == 8
+        # The integer 1 written in binary determines the byte order
+        one = np.frombuffer(data, dtype="<i4", count=1, offset=binary_start)[0]
+        return "<" if one == 1 else ">"
+
+    @classmethod
+    def __binary_payload_end(
+        cls, section_start: str, content: bytes, pos: int, byte_order: str
+    ) -> int:
+        """Position of the first byte after the binary payload of a section"""
+        match section_start:
+            case "$Nodes":
+                line, pos = GmshReader.__read_line(content, pos)
+                return (
+                    pos
+                    + int(line) * GmshReader.__binary_node_dtype(byte_order).itemsize
+                )
+            case "$Elements":
+                line, pos = GmshReader.__read_line(content, pos)
+                blocks = GmshReader.__read_binary_element_blocks(
+                    content, pos, int(line), byte_order
+                )
+                # Every block has a header of 3 integers
+                return pos + sum(block[3].nbytes + 3 * 4 for block in blocks)
+            case "$ElementData":
+                _, int_tags, pos = GmshReader.__read_data_header(content, pos)
+                num_components, num_values = int_tags[1], int_tags[2]
+                return pos + num_values * (4 + 8 * num_components)
+
+    @classmethod
+    def __binary_node_dtype(cls, byte_order: str) -> np.dtype:
+        """Record of one node in binary files: node-number x-coord y-coord z-coord"""
+        return np.dtype([("id", byte_order + "i4"), ("xyz", byte_order + "f8", (3,))])
 
     @classmethod
     def __read_physical_names_section(
@@ -88,83 +188,230 @@ class GmshReader:
         return phys_sections
 
     @classmethod
-    def __read_nodes_section(cls, data: List[str]) -> np.array:
+    def __read_nodes_section(cls, data: bytes, byte_order: str) -> np.array:
         """
         number-of-nodes
         node-number x-coord y-coord z-coord
         """
-        num_nodes = int(data[0])
-        nodes = np.zeros((num_nodes, 3), dtype=float)
-
-        data_pos = 1
-
-        for _ in range(num_nodes):
-            tmp_data = data[data_pos].split()
-            assert len(tmp_data) == 4
-
-            node_idx = int(tmp_data[0]) - 1
+        if byte_order is None:
+            # Parse the whole section in one call
+            values = np.fromstring(data.decode("ascii"), dtype=float, sep=" ")
+
+            num_nodes = int(values[0])
+            records = values[1:].reshape(num_nodes, 4)
+            node_ids = records[:, 0].astype(np.int64)
+            node_coords = records[:, 1:4]
+        else:
+            line, pos = GmshReader.__read_line(data, 0)
+            num_nodes = int(line)
+            records = np.frombuffer(
+                data,
+                dtype=GmshReader.__binary_node_dtype(byte_order),
+                count=num_nodes,
+                offset=pos,
+            )
+            node_ids = records["id"].astype(np.int64)
+            node_coords = records["xyz"]
 
-            nodes[node_idx][0] = float(tmp_data[1])
-            nodes[node_idx][1] = float(tmp_data[2])
-            nodes[node_idx][2] = float(tmp_data[3])
+        nodes = np.zeros((num_nodes, 3), dtype=float)
+        nodes[node_ids - 1, :] = node_coords
 
-            data_pos = data_pos + 1
-            # Ignore z-coordinate, code is 2d only
-        return nodes[:, 0:2]
+        # Ignore z-coordinate, code is 2d only
+        return np.ascontiguousarray(nodes[:, 0:2])
 
     @classmethod
-    def __read_elements_section(cls, data: List[str]) -> List[CellGroup]:
+    def __read_elements_section(cls, data: bytes, byte_order: str) -> List[CellGroup]:
         """
         number-of-elements
         elm-number elm-type number-of-tags < tag > … node-number-list
         """
-        num_elems = int(data[0])
-
-        # Maps physical tag to a list of all dofs of all elements
-        # in this physical group
-        phys_group_elem_dofs = {}
+        if byte_order is None:
+            blocks = GmshReader.__read_ascii_element_blocks(data.decode("ascii"))
+        else:
+            line, pos = GmshReader.__read_line(data, 0)
+            blocks = GmshReader.__read_binary_element_blocks(
+                data, pos, int(line), byte_order
+            )
 
-        # Maps physical tag to element type in this physical group
-        # We assume one element type per physical group
-        phys_group_elem_types = {}
+        # Group elements by (physical tag, element type). Every group is
+        # ordered by the position of its first element in the file.
+        groups = []
+        elem_offsets = np.cumsum([0] + [block[3].shape[0] for block in blocks])
 
-        for eidx in range(1, num_elems + 1):
-            tmp_data = data[eidx].split()
+        for gmsh_elem_type in sorted({block[0] for block in blocks}):
+            type_blocks = [
+                (offset, block)
+                for offset, block in zip(elem_offsets, blocks)
+                if block[0] == gmsh_elem_type
+            ]
 
-            gmsh_elem_type = int(tmp_data[1])
-            num_elem_tags = int(tmp_data[2])
-            elem_phys_tag = int(tmp_data[3])
+            elem_idx = np.concatenate(
+                [np.arange(offset, offset + b[3].shape[0]) for offset, b in type_blocks]
+            )
+            # First tag is the physical tag, nodes follow after all tags
+            phys_tags = np.concatenate([b[3][:, b[1]] for _, b in type_blocks])
+            elem_dofs = (
+                np.concatenate([b[3][:, b[1] + b[2] :] for _, b in type_blocks]) - 1
+            )
 
-            if elem_phys_tag not in phys_group_elem_dofs:
-                phys_group_elem_dofs[elem_phys_tag] = []
-                phys_group_elem_types[elem_phys_tag] = []
+            order = np.argsort(phys_tags, kind="stable")
+            unique_tags, group_start = np.unique(phys_tags[order], return_index=True)
+            group_stop = np.append(group_start[1:], order.shape[0])
 
-            for id in tmp_data[3 + num_elem_tags :]:
-                phys_group_elem_dofs[elem_phys_tag].append(int(id) - 1)
+            for phys_tag, start, stop in zip(unique_tags, group_start, group_stop):
+                group_elems = order[start:stop]
+                groups.append(
+                    (
+                        elem_idx[group_elems[0]],
+                        int(phys_tag),
+                        gmsh_elem_type,
+                        elem_dofs[group_elems],
+                    )
+                )
 
-            phys_group_elem_types[elem_phys_tag].append(int(gmsh_elem_type))
+        groups.sort(key=lambda group: group[0])
 
         connectivity_data = []
         ref_elem_factory = RefElemFactory()
 
-        for phys_tag in phys_group_elem_dofs.keys():
-            # Assume all elements are of the same type
-            gmsh_elem_type = phys_group_elem_types[phys_tag][0]
+        for _, phys_tag, gmsh_elem_type, elems in groups:
             gmsh_elem = GmshElem(gmsh_elem_type)
-
             ref_elem = ref_elem_factory.make_elem(gmsh_elem.shape(), gmsh_elem.degree())
-            # FIXME: do this via reference element
-            all_elem_dofs_in_group = phys_group_elem_dofs[phys_tag]
-            all_elem_types_in_group = phys_group_elem_types[phys_tag]
-            num_dof_in_elem = int(
-                len(all_elem_dofs_in_group) / len(all_elem_types_in_group)
-            )
-
-            elems = np.array(all_elem_dofs_in_group, dtype=int)
-            elems = np.reshape(elems, (len(all_elem_types_in_group), num_dof_in_elem))
 
-            cell_group = CellGroup(ref_elem, elems, phys_tag, "")
+            cell_group = CellGroup(ref_elem, elems.astype(int), phys_tag, "")
 
             connectivity_data.append(cell_group)
 
         return connectivity_data
+
+    @classmethod
+    def __read_ascii_element_blocks(
+        cls, data: str
+    ) -> List[tuple[int, int, int, np.array]]:
+        """Split ASCII element records into blocks of consecutive elements with the
+        same element type and number of tags. Returns a list of tuples
+        (element type, column of first tag, number of tags, records)
+        """
+        # Parse the whole section in one call
+        values = np.fromstring(data, dtype=np.int64, sep=" ")
+        num_elems = int(values[0])
+
+        # Elements are stored as records of variable length, each block of
+        # records with the same layout is reshaped into a 2D array.
+        blocks = []
+        pos = 1
+        num_read = 0
+        while num_read < num_elems:
+            gmsh_elem_type = int(values[pos + 1])
+            num_elem_tags = int(values[pos + 2])
+            num_elem_nodes = GmshElem(gmsh_elem_type).num_local_nodes()
+            record_len = 3 + num_elem_tags + num_elem_nodes
+
+            max_count = min(num_elems - num_read, (values.shape[0] - pos) // record_len)
+            candidates = values[pos : pos + max_count * record_len]
+            candidates = candidates.reshape(max_count, record_len)
+
+            # The block ends at the first record with different layout
+            mismatch = (candidates[:, 1] != gmsh_elem_type) | (
+                candidates[:, 2] != num_elem_tags
+            )
+            count = int(np.argmax(mismatch)) if np.any(mismatch) else max_count
+            if count == 0:
+                raise ValueError("truncated $Elements section")
+
+            blocks.append((gmsh_elem_type, 3, num_elem_tags, candidates[:count]))
+            pos += count * record_len
+            num_read += count
+
+        return blocks
+
+    @classmethod
+    def __read_binary_element_blocks(
+        cls, data: bytes, pos: int, num_elems: int, byte_order: str
+    ) -> List[tuple[int, int, int, np.array]]:
+        """Read blocks of binary element records starting at byte pos.
+        Each block has a header (elm-type, number-of-elements, number-of-tags)
+        followed by records: elm-number < tag > … node-number-list
+        Returns a list of tuples (element type, column of first tag,
+        number of tags, records)
+        """
+        int_type = byte_order + "i4"
+        blocks = []
+        num_read = 0
+        while num_read < num_elems:
+            header = np.frombuffer(data, dtype=int_type, count=3, offset=pos)
+            gmsh_elem_type, count, num_elem_tags = (int(v) for v in header)
+            pos += header.nbytes
+
+            num_elem_nodes = GmshElem(gmsh_elem_type).num_local_nodes()
+            record_len = 1 + num_elem_tags + num_elem_nodes
+
+            records = np.frombuffer(
+                data, dtype=int_type, count=count * record_len, offset=pos
+            ).reshape(count, record_len)
+            pos += records.nbytes
+
+            blocks.append((gmsh_elem_type, 1, num_elem_tags, records))
+            num_read += count
+
+        return blocks
+
+    @classmethod
+    def __read_data_header(
+        cls, data: bytes, pos: int
+    ) -> tuple[list[str], list[int], int]:
+        """Read string, real and integer tags of a data section starting at pos.
+        Returns the string tags, the integer tags (time step index, number of
+        components, number of values, ...) and position of the first byte after
+        the header.
+        """
+        tags = []
+        for _ in range(3):
+            line, pos = GmshReader.__read_line(data, pos)
+            num_tags = int(line)
+            current_tags = []
+            for _ in range(num_tags):
+                line, pos = GmshReader.__read_line(data, pos)
+                current_tags.append(line)
+            tags.append(current_tags)
+
+        string_tags, _, int_tags = tags
+        assert len(int_tags) >= 3
+        return string_tags, [int(tag) for tag in int_tags], pos
+
+    @classmethod
+    def __read_element_data_section(
+        cls, data: bytes, byte_order: str
+    ) -> tuple[str, np.array]:
+        """
+        number-of-string-tags < "string-tag" > …
+        number-of-real-tags < real-tag > …
+        number-of-integer-tags < integer-tag > …
+        elm-number value …
+        """
+        string_tags, int_tags, pos = GmshReader.__read_data_header(data, 0)
+        num_components, num_values = int_tags[1], int_tags[2]
+        name = string_tags[0].strip('"') if string_tags else ""
+
+        if byte_order is None:
+            values = np.fromstring(data[pos:].decode("ascii"), dtype=float, sep=" ")
+            values = values[: num_values * (1 + num_components)]
+            values = values.reshape(num_values, 1 + num_components)
+            elem_ids = values[:, 0].astype(np.int64)
+            elem_values = values[:, 1:]
+        else:
+            record_type = np.dtype(
+                [
+                    ("id", byte_order + "i4"),
+                    ("values", byte_order + "f8", (num_components,)),
+                ]
+            )
+            records = np.frombuffer(
+                data, dtype=record_type, count=num_values, offset=pos
+            )
+            elem_ids = records["id"].astype(np.int64)
+            elem_values = records["values"].reshape(num_values, num_components)
+
+        element_data = np.zeros((int(np.max(elem_ids, initial=0)), num_components))
+        element_data[elem_ids - 1, :] = elem_values
+        return name, element_data
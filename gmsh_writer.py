@@ -6,11 +6,23 @@ import numpy as np
 
 
 class GmshWriter:
+    """Class to write meshes and cell data in Gmsh MSH 2.2 format.
+    With binary=True, nodes, elements and element data are written as raw
+    little-endian buffers (file-type flag 1), otherwise as ASCII text.
+    """
 
-    def __init__(self):
-        pass
+    def __init__(self, binary: bool = False):
+        self.__binary = binary
 
     def write(self, filename: str, nodes: np.array, cells: List[CellGroup]):
+        if self.__binary:
+            with open(filename, 'wb') as outfile:
+                GmshWriter.__write_binary_header(outfile)
+                outfile.write(GmshWriter.__physical_names(cells).encode('utf-8'))
+                GmshWriter.__write_binary_node_coordinates(outfile, nodes)
+                GmshWriter.__write_binary_elem_connectivity(outfile, cells)
+            return
+
         with open(filename, 'w') as outfile:
             GmshWriter.__write_header(outfile)
             GmshWriter.__write_physical_names(outfile, cells)
@@ -18,6 +30,11 @@ class GmshWriter:
             GmshWriter.__write_elem_connectivity(outfile, cells)
 
     def write_field(self, filename: str, cell_data: np.array):
+        if self.__binary:
+            with open(filename, 'ab') as outfile:
+                GmshWriter.__append_binary_cell_data(outfile, cell_data)
+            return
+
         with open(filename, 'a') as outfile:
             GmshWriter.__append_cell_data(outfile, cell_data)
 
@@ -27,20 +44,34 @@ class GmshWriter:
         outfile.write('2.2 0 8\n')
         outfile.write('$EndMeshFormat\n')
 
+    @classmethod
+    def __write_binary_header(cls, outfile):
+        outfile.write(b'$MeshFormat\n')
+        outfile.write(b'2.2 1 8\n')
+        # Integer 1 in binary form lets readers detect the byte order
+        np.array([1], dtype='<i4').tofile(outfile)
+        outfile.write(b'\n$EndMeshFormat\n')
+
     @classmethod
     def __write_physical_names(cls, outfile, cells: List[CellGroup]):
-        outfile.write('$PhysicalNames\n')
+        outfile.write(GmshWriter.__physical_names(cells))
+
+    @classmethod
+    def __physical_names(cls, cells: List[CellGroup]) -> str:
+        """Text of the PhysicalNames section, which is ASCII in both file types"""
+        lines = ['$PhysicalNames\n']
 
         phys_entities = []
         for dim in (1, 2):
             tmp_entity_info = [(dim, cgroup.tag, cgroup.name) for cgroup in cells if cgroup.ref_elem.topo_dim() == dim]
             phys_entities.extend(tmp_entity_info)
 
-        outfile.write(f'{len(phys_entities)}\n')
+        lines.append(f'{len(phys_entities)}\n')
         for (dim, tag, name) in phys_entities:
-            outfile.write(f'{dim} {tag} \"{name}\"\n')
+            lines.append(f'{dim} {tag} \"{name}\"\n')
 
-        outfile.write('$EndPhysicalNames\n')
+        lines.append('$EndPhysicalNames\n')
+        return ''.join(lines)
 
     @classmethod
     def __write_node_coordinates(cls, outfile, nodes: np.array, cells: List[CellGroup]):
@@ -60,6 +91,55 @@ class GmshWriter:
 
         outfile.write('$EndNodes\n')
 
+    @classmethod
+    def __write_binary_node_coordinates(cls, outfile, nodes: np.array):
+        outfile.write(b'$Nodes\n')
+
+        num_nodes = nodes.shape[0]
+        outfile.write(f'{num_nodes}\n'.encode('ascii'))
+
+        # node-number x-coord y-coord z-coord
+        records = np.zeros(num_nodes, dtype=[('id', '<i4'), ('xyz', '<f8', (3,))])
+        records['id'] = np.arange(1, num_nodes + 1)
+        records['xyz'][:, 0:nodes.shape[1]] = nodes
+        records.tofile(outfile)
+
+        outfile.write(b'\n$EndNodes\n')
+
+    @classmethod
+    def __write_binary_elem_connectivity(cls, outfile, cells: List[CellGroup]):
+        outfile.write(b'$Elements\n')
+        num_elems = 0
+        for cell_group in cells:
+            num_elems += cell_group.dof_ids.shape[0]
+
+        outfile.write(f'{num_elems}\n'.encode('ascii'))
+
+        elem_idx = 1
+        for cell_group in cells:
+            gmsh_elem = gmsh_elem_from_shape_and_deg(cell_group.ref_elem.shape(),
+                                                     cell_group.ref_elem.deg())
+
+            gmsh_elem_type = gmsh_elem.elem_type_tag().value
+            num_group_elems = cell_group.dof_ids.shape[0]
+            # Physical and elementary tag
+            tags = (cell_group.tag, cell_group.tag)
+            num_tags = len(tags)
+
+            # Block header: elm-type number-of-elements number-of-tags
+            np.array([gmsh_elem_type, num_group_elems, num_tags], dtype='<i4').tofile(outfile)
+
+            # Records: elm-number < tag > … node-number-list
+            records = np.empty((num_group_elems, 1 + num_tags + cell_group.dof_ids.shape[1]), dtype='<i4')
+            records[:, 0] = np.arange(elem_idx, elem_idx + num_group_elems)
+            records[:, 1:1 + num_tags] = tags
+            records[:, 1 + num_tags:] = cell_group.dof_ids + 1
+            records.tofile(outfile)
+
+            elem_idx += num_group_elems
+
+        outfile.write(b'\n$EndElements\n')
+
     @classmethod
     def __write_elem_connectivity(cls, outfile, cells: List[CellGroup]):
         outfile.write('$Elements\n')
@@ -109,3 +189,27 @@ class GmshWriter:
             for i in range(n_cells):
                 outfile.write(f'{i + 1} {cell_data[i][component]}\n')
             outfile.write('$EndElementData\n')
+
+    @classmethod
+    def __append_binary_cell_data(cls, outfile, cell_data: np.array):
+        n_cells = cell_data.shape[0]
+        n_components = cell_data.shape[1]
+
+        records = np.empty(n_cells, dtype=[('id', '<i4'), ('value', '<f8')])
+        records['id'] = np.arange(1, n_cells + 1)
+
+        for component in range(n_components):
+            # Header with string, real and integer tags is ASCII
+            header = ['$ElementData\n',
+                      '1\n',
+                      f'\"data_0{str(component)}\"\n',
+                      '1\n0.0\n',
+                      '3\n0\n1\n',
+                      f'{n_cells}\n']
+            outfile.write(''.join(header).encode('ascii'))
+
+            # elm-number value
+            records['value'] = cell_data[:, component]
+            records.tofile(outfile)
+
+            outfile.write(b'\n$EndElementData\n')
@@ -0,0 +1,435 @@
+import importlib.util
+import numpy as np
+import scipy.sparse
+from boundary_conditions import BoundaryConditions
+from mesh_algorithm import FaceTable
+from mesh_geometry import MeshGeometry
+from numerical_flux import AUSM_flux_batch, get_flux_scheme
+from reconstruction import MUSCLReconstruction
+from residual_assembly import face_cell_incidence, assemble_residual, sparse_matmul
+from workspace import Workspace
+
+
+def face_fluxes(
+    U: np.array, faces: FaceTable, normals: np.array, boundary_conditions: dict = None
+) -> np.array:
+    """Numerical flux through every face of the face table, shape (num_faces, 4).
+    Boundary faces take the right state from the boundary condition of their
+    group, see BoundaryConditions, outflow by default.
+    """
+    flux = np.empty((faces.num_faces(), U.shape[1]))
+
+    # Process internal faces
+    interior = faces.interior_slice()
+    flux[interior] = AUSM_flux_batch(
+        U[faces.left_cell[interior]], U[faces.right_cell[interior]], normals[interior]
+    )
+
+    # Process boundary faces
+    boundary = faces.boundary_slice()
+    u_L = U[faces.left_cell[boundary]]
+    boundary_normals = normals[boundary]
+    u_R = BoundaryConditions(faces, boundary_conditions).ghost_states(
+        u_L, boundary_normals
+    )
+    flux[boundary] = AUSM_flux_batch(u_L, u_R, boundary_normals)
+
+    return flux
+
+
+def compute_time_step(
+    U: np.array,
+    faces: FaceTable,
+    normals: np.array,
+    face_lengths: np.array,
+    cell_volumes: np.array,
+) -> np.array:
+    """Local time step of every cell: cell volume divided by the sum of
+    face-length weighted spectral radii of the flux Jacobian over its faces.
+    U has shape (num_cells, 4), or (num_members, num_cells, 4) for an
+    ensemble, the time steps have shape U.shape[:-1].
+    """
+    num_cells = U.shape[-2]
+    assert num_cells == len(cell_volumes)
+
+    assert faces.num_faces() == normals.shape[0]
+    assert normals.shape[0] == face_lengths.shape[0]
+
+    gamma = 1.4
+
+    # Primitive quantities, once per cell
+    rho = U[..., 0]
+    v1 = U[..., 1] / rho
+    v2 = U[..., 2] / rho
+    # pressure
+    p = (gamma - 1) * (U[..., 3] - 0.5 * rho * (v1 * v1 + v2 * v2))
+    # local speed of sound
+    a = np.sqrt(gamma * p / rho)
+
+    # Ensemble members are summed as consecutive blocks of num_cells bins
+    member_offsets = num_cells * np.arange(int(np.prod(U.shape[:-2])))
+    member_offsets = member_offsets.reshape(U.shape[:-2] + (1,))
+
+    # LEFT STATE
+    idx_L = faces.left_cell
+    # normal speed
+    v_L_n = v1[..., idx_L] * normals[:, 0] + v2[..., idx_L] * normals[:, 1]
+    # max(|v_n|, |v_n - a|, |v_n + a|) = |v_n| + a
+    jacobian_spectral_radius = np.abs(v_L_n) + a[..., idx_L]
+
+    spectral_radius_sum = np.bincount(
+        (idx_L + member_offsets).ravel(),
+        weights=(jacobian_spectral_radius * face_lengths).ravel(),
+        minlength=member_offsets.size * num_cells,
+    )
+
+    # RIGHT STATE, only for faces where right state exists
+    has_R = faces.right_cell > -1
+    idx_R = faces.right_cell[has_R]
+    normals_R = normals[has_R]
+    v_R_n = v1[..., idx_R] * normals_R[:, 0] + v2[..., idx_R] * normals_R[:, 1]
+    jacobian_spectral_radius = np.abs(v_R_n) + a[..., idx_R]
+
+    spectral_radius_sum += np.bincount(
+        (idx_R + member_offsets).ravel(),
+        weights=(jacobian_spectral_radius * face_lengths[has_R]).ravel(),
+        minlength=member_offsets.size * num_cells,
+    )
+
+    spectral_radius_sum = spectral_radius_sum.reshape(U.shape[:-1])
+    return cell_volumes / spectral_radius_sum
+
+
+def _face_block(states: np.array, indices: np.array, block: slice) -> np.array:
+    """States of a block of faces: states[..., indices[block], :] gathers cell
+    states, states[..., block, :] if indices is None (states of faces)
+    """
+    if indices is None:
+        return states[..., block, :]
+    return states[..., indices[block], :]
+
+
+class NumpyKernels:
+    """Per-step kernels of the explicit solver implemented with NumPy array
+    operations. This is the reference backend, other backends provide the same
+    methods and are tested against it.
+    All kernels also accept an ensemble of solutions, U of shape
+    (num_members, num_cells, 4), and process all members in the same array
+    operations.
+    Work arrays are kept in a Workspace: with out arguments given, residual,
+    time step and update of a first order single solution allocate no arrays
+    larger than a block of faces (flux functions work on blocks of faces).
+    dtype is the floating point type of the state, fluxes and residuals; the
+    face and cell geometry read per step is kept as a copy rounded to it.
+    """
+
+    name = "numpy"
+
+    # Face states (ensemble members times faces) per flux evaluation, small
+    # enough to keep the temporaries of the flux functions in cache
+    block_size = 8192
+
+    def __init__(
+        self,
+        faces: FaceTable,
+        geometry: MeshGeometry,
+        reconstruction: str = "first-order",
+        limiter: str = "barth-jespersen",
+        flux_scheme: str = "ausm",
+        boundary_conditions: dict = None,
+        dtype=np.float64,
+    ):
+        self.faces = faces
+        self.geometry = geometry
+        self.num_cells = geometry.cell_volumes.shape[0]
+        self.dtype = np.dtype(dtype)
+        self.flux_scheme = flux_scheme
+        self.__flux = get_flux_scheme(flux_scheme)
+        self.boundary_conditions = BoundaryConditions(faces, boundary_conditions)
+
+        self.workspace = Workspace()
+
+        self.__interior = faces.interior_slice()
+        self.__boundary = faces.boundary_slice()
+        self.__left_cell = faces.left_cell
+        self.__right_cell = faces.right_cell[self.__interior]
+        self.__face_normals = geometry.face_normals.astype(dtype)
+        self.__cell_volumes = geometry.cell_volumes.astype(dtype)
+
+        # Residual operator: Res = B @ flux sums length-weighted face fluxes into cells
+        self.__incidence = face_cell_incidence(
+            faces, self.num_cells, geometry.face_lengths
+        ).astype(dtype)
+
+        # Time step: face data of both sides of the faces and operators summing
+        # values of face sides into their cells, in face order
+        has_R = faces.right_cell > -1
+        num_faces = faces.num_faces()
+        normals = self.__face_normals
+        face_lengths = geometry.face_lengths.astype(dtype)
+        self.__sides = []
+        for cells, normals_side, lengths in (
+            (faces.left_cell, normals, face_lengths),
+            (faces.right_cell[has_R], normals[has_R], face_lengths[has_R]),
+        ):
+            num_sides = cells.shape[0]
+            to_cells = scipy.sparse.csr_matrix(
+                (np.ones(num_sides, dtype), (cells, np.arange(num_sides))),
+                shape=(self.num_cells, num_sides),
+            )
+            # np.take converts other index types on every call
+            self.__sides.append(
+                (
+                    cells.astype(np.intp),
+                    np.ascontiguousarray(normals_side[:, 0]),
+                    np.ascontiguousarray(normals_side[:, 1]),
+                    lengths,
+                    to_cells,
+                )
+            )
+
+        match reconstruction:
+            case "first-order":
+                self.__reconstruction = None
+            case "muscl":
+                self.__reconstruction = MUSCLReconstruction(faces, geometry, limiter)
+            case _:
+                raise ValueError(f"Unknown reconstruction '{reconstruction}'")
+
+    def face_states(self, U: np.array) -> tuple[np.array, np.array]:
+        """Reconstructed states at faces: (left states of all faces, right
+        states of interior faces). None for first order, the flux kernels
+        then take the cell averages block by block.
+        """
+        if self.__reconstruction is None:
+            return None
+        if U.ndim == 2:
+            return self.__reconstruction.face_states(U)
+        # Gradient operators act on one solution, ensemble members in turn
+        member_states = [self.__reconstruction.face_states(u) for u in U]
+        return tuple(np.stack(states) for states in zip(*member_states))
+
+    def interior_fluxes(self, U: np.array, flux: np.array, face_states=None):
+        """Compute numerical flux through interior faces into flux[interior].
+        face_states ... result of face_states(U), computed if not given
+        """
+        if face_states is None:
+            face_states = self.face_states(U)
+
+        interior = self.__interior
+        if face_states is None:
+            left = (U, self.__left_cell[interior])
+            right = (U, self.__right_cell)
+        else:
+            left = (face_states[0][..., interior, :], None)
+            right = (face_states[1], None)
+        self.__blocked_fluxes(
+            left, right, self.__face_normals[interior], flux[..., interior, :]
+        )
+
+    def boundary_fluxes(self, U: np.array, flux: np.array, face_states=None):
+        """Compute numerical flux through boundary faces into flux[boundary].
+        face_states ... result of face_states(U), computed if not given
+        """
+        if face_states is None:
+            face_states = self.face_states(U)
+
+        # Group by group, ghost states from the boundary condition of the group
+        for name, bc in self.boundary_conditions.conditions.items():
+            group = self.faces.group_slice(name)
+            if face_states is None:
+                left = (U, self.__left_cell[group])
+            else:
+                left = (face_states[0][..., group, :], None)
+            self.__blocked_fluxes(
+                left, bc, self.__face_normals[group], flux[..., group, :]
+            )
+
+    def __blocked_fluxes(self, left, right, normals: np.array, flux: np.array):
+        """flux = numerical flux of left and right face states, evaluated in
+        blocks of faces. Face states are given as (states, indices), see
+        _face_block; right may also be a boundary condition giving ghost
+        states of the left states.
+        """
+        num_members = int(np.prod(flux.shape[:-2]))
+        step = max(1, self.block_size // num_members)
+        for begin in range(0, normals.shape[0], step):
+            block = slice(begin, begin + step)
+            u_L = _face_block(*left, block)
+            if isinstance(right, tuple):
+                u_R = _face_block(*right, block)
+            else:
+                u_R = right.ghost_states(u_L, normals[block])
+            flux[..., block, :] = self.__flux(u_L, u_R, normals[block])
+
+    def assemble_residual(self, flux: np.array, Res: np.array):
+        """Sum face fluxes into cell residuals Res"""
+        assemble_residual(self.__incidence, flux, out=Res)
+
+    def residual(self, U: np.array, out: np.array = None) -> np.array:
+        """Residual of all cells, shape of U, written into out if given"""
+        flux = self.workspace.get(
+            "flux", U.shape[:-2] + (self.faces.num_faces(), U.shape[-1]), self.dtype
+        )
+        face_states = self.face_states(U)
+        self.interior_fluxes(U, flux, face_states)
+        self.boundary_fluxes(U, flux, face_states)
+
+        Res = np.empty_like(U) if out is None else out
+        self.assemble_residual(flux, Res)
+        return Res
+
+    def time_step(self, U: np.array, out: np.array = None) -> np.array:
+        """Local time step of every cell, shape U.shape[:-1], written into out
+        if given. Same as compute_time_step, in place in work arrays.
+        """
+        dt = np.empty(U.shape[:-1], self.dtype) if out is None else out
+        if U.ndim == 2:
+            self.__time_step(U, dt)
+        else:
+            for u, member_dt in zip(U, dt):
+                self.__time_step(u, member_dt)
+        return dt
+
+    def __time_step(self, U: np.array, dt: np.array):
+        """time_step of a single solution"""
+        gamma = 1.4
+        workspace = self.workspace
+        num_cells = self.num_cells
+        dtype = self.dtype
+
+        # Primitive quantities, once per cell, in the order of compute_time_step
+        rho = U[:, 0]
+        v1 = np.divide(U[:, 1], rho, out=workspace.get("v1", (num_cells,), dtype))
+        v2 = np.divide(U[:, 2], rho, out=workspace.get("v2", (num_cells,), dtype))
+        cell_work = workspace.get("cell_work", (num_cells,), dtype)
+        a = np.multiply(v1, v1, out=workspace.get("a", (num_cells,), dtype))
+        a += np.multiply(v2, v2, out=cell_work)
+        a *= np.multiply(rho, 0.5, out=cell_work)
+        np.subtract(U[:, 3], a, out=a)
+        # pressure, then local speed of sound
+        a *= gamma - 1
+        a *= gamma
+        a /= rho
+        np.sqrt(a, out=a)
+
+        # Length-weighted spectral radii |v_n| + a of left, then right face
+        # sides summed into their cells. Indices are valid, np.take with
+        # mode="clip" writes into out without an intermediate copy.
+        num_faces = self.faces.num_faces()
+        face_work = workspace.get("face_work", (num_faces,), dtype)
+        spectral_radii = workspace.get("spectral_radii", (num_faces,), dtype)
+        for (cells, n_x, n_y, lengths, to_cells), sums in zip(
+            self.__sides, (dt, cell_work)
+        ):
+            num_sides = cells.shape[0]
+            radii = np.take(v1, cells, out=spectral_radii[:num_sides], mode="clip")
+            radii *= n_x
+            work = np.take(v2, cells, out=face_work[:num_sides], mode="clip")
+            work *= n_y
+            radii += work
+            np.abs(radii, out=radii)
+            radii += np.take(a, cells, out=work, mode="clip")
+            radii *= lengths
+            sparse_matmul(to_cells, radii, out=sums)
+        dt += cell_work
+
+        np.divide(self.__cell_volumes, dt, out=dt)
+
+    def update(self, U: np.array, Res: np.array, dt):
+        """Forward Euler update U = U - dt / |C_i| * Res, in place.
+        dt is a global time step or an array of local time steps of all cells.
+        For an ensemble, dt may also be one time step per member.
+        """
+        dt = np.asarray(dt, dtype=self.dtype)
+        if dt.ndim == U.ndim - 2:
+            # Global time step of every ensemble member
+            dt = dt[..., np.newaxis]
+        time_scale = self.workspace.get("time_scale", U.shape[:-1], self.dtype)
+        np.divide(dt, self.__cell_volumes, out=time_scale)
+        scaled_Res = self.workspace.get("scaled_residual", U.shape, self.dtype)
+        # Broadcasting multiply would allocate an iterator buffer, einsum not
+        np.einsum("...i,...ij->...ij", time_scale, Res, out=scaled_Res)
+        U -= scaled_Res
+
+    def close(self):
+        """Release resources held by the kernels, nothing to do here"""
+
+
+def available_backends() -> list[str]:
+    """Names of kernel backends which can be used in this environment"""
+    backends = ["numpy", "processes"]
+    if importlib.util.find_spec("numba") is not None:
+        backends.append("numba")
+    return backends
+
+
+def make_kernels(
+    faces: FaceTable,
+    geometry: MeshGeometry,
+    backend: str = "auto",
+    num_workers: int = None,
+    reconstruction: str = "first-order",
+    limiter: str = "barth-jespersen",
+    flux_scheme: str = "ausm",
+    boundary_conditions: dict = None,
+    ensemble: bool = False,
+    dtype=np.float64,
+):
+    """Create per-step kernels for given mesh.
+    backend ... 'numpy', 'numba', 'processes' or 'auto'. With 'auto', the Numba
+                backend is used if Numba is installed, NumPy backend otherwise.
+                'processes' distributes the residual over a process pool.
+    num_workers ... number of worker processes of the 'processes' backend,
+                    defaults to the number of CPUs
+    reconstruction ... 'first-order' (cell averages at faces) or 'muscl'
+                       (limited linear reconstruction, NumPy backend only)
+    limiter ... 'barth-jespersen' or 'venkatakrishnan' for MUSCL reconstruction
+    flux_scheme ... numerical flux, see numerical_flux.FLUX_SCHEMES. The Numba
+                    backend implements 'ausm' only.
+    boundary_conditions ... boundary condition of every boundary face group by
+                            group name, outflow for groups not listed, see
+                            boundary_conditions.BoundaryConditions
+    ensemble ... if True, the kernels advance an ensemble of solutions of shape
+                 (num_members, num_cells, 4) at once (NumPy backend only)
+    dtype ... floating point type of solution, fluxes and residuals,
+              np.float64 or np.float32
+    The kernels should be closed by calling close() when no longer needed.
+    """
+    if backend == "auto":
+        if reconstruction != "first-order" or flux_scheme != "ausm" or ensemble:
+            backend = "numpy"
+        else:
+            backend = "numba" if "numba" in available_backends() else "numpy"
+
+    if backend != "numpy" and reconstruction != "first-order":
+        raise ValueError(f"Reconstruction '{reconstruction}' needs the numpy backend")
+    if backend != "numpy" and ensemble:
+        raise ValueError("Ensembles need the numpy backend")
+    if backend == "numba" and flux_scheme != "ausm":
+        raise ValueError(f"Flux scheme '{flux_scheme}' is not available with numba")
+
+    match backend:
+        case "numpy":
+            return NumpyKernels(
+                faces,
+                geometry,
+                reconstruction,
+                limiter,
+                flux_scheme,
+                boundary_conditions,
+                dtype,
+            )
+        case "numba":
+            # Imported lazily: compiling the kernels is only paid when used
+            from kernels_numba import NumbaKernels
+
+            return NumbaKernels(faces, geometry, boundary_conditions, dtype)
+        case "processes":
+            from kernels_parallel import ProcessPoolKernels
+
+            return ProcessPoolKernels(
+                faces, geometry, num_workers, flux_scheme, boundary_conditions, dtype
+            )
+
+    raise ValueError(f"Unknown kernel backend '{backend}'")
@@ -0,0 +1,322 @@
+import math
+import numpy as np
+from numba import njit, prange
+from boundary_conditions import BoundaryConditions
+from mesh_algorithm import FaceTable
+from mesh_geometry import MeshGeometry
+from residual_assembly import face_cell_incidence
+from workspace import Workspace
+
+GAMMA = 1.4
+
+# Boundary condition kinds of the compiled boundary flux kernel
+_OUTFLOW = 0
+_FARFIELD = 1
+_SLIP_WALL = 2
+_PRESCRIBED = 3
+_BC_KINDS = {
+    "outflow": _OUTFLOW,
+    "farfield": _FARFIELD,
+    "slip-wall": _SLIP_WALL,
+    "symmetry": _SLIP_WALL,
+    "supersonic-inlet": _PRESCRIBED,
+}
+
+
+# Scalar versions of the interpolation polynomials in numerical_flux
+@njit(cache=True)
+def _m2_minus(ma: float) -> float:
+    if abs(ma) <= 1.0:
+        return -0.25 * (ma - 1.0) * (ma - 1.0)
+    return 0.5 * (ma - abs(ma))
+
+
+@njit(cache=True)
+def _m2_plus(ma: float) -> float:
+    if abs(ma) <= 1.0:
+        return 0.25 * (ma + 1.0) * (ma + 1.0)
+    return 0.5 * (ma + abs(ma))
+
+
+@njit(cache=True)
+def _p3_minus(ma: float) -> float:
+    if abs(ma) <= 1.0:
+        return -_m2_minus(ma) * (2.0 + ma)
+    return 0.0 if ma > 0.0 else 1.0
+
+
+@njit(cache=True)
+def _p3_plus(ma: float) -> float:
+    if abs(ma) <= 1.0:
+        return _m2_plus(ma) * (2.0 - ma)
+    return 1.0 if ma > 0.0 else 0.0
+
+
+@njit(cache=True)
+def _ausm_flux(u_L, u_R, n_x, n_y, flux):
+    """AUSM_flux of one face written into flux, a row of the flux array"""
+    # LEFT STATE
+    p_L = (GAMMA - 1) * (u_L[3] - 0.5 * (u_L[1] * u_L[1] + u_L[2] * u_L[2]) / u_L[0])
+    a_L = math.sqrt(GAMMA * p_L / u_L[0])
+    M_L = (u_L[1] * n_x + u_L[2] * n_y) / u_L[0] / a_L
+
+    # RIGHT STATE
+    p_R = (GAMMA - 1) * (u_R[3] - 0.5 * (u_R[1] * u_R[1] + u_R[2] * u_R[2]) / u_R[0])
+    a_R = math.sqrt(GAMMA * p_R / u_R[0])
+    M_R = (u_R[1] * n_x + u_R[2] * n_y) / u_R[0] / a_R
+
+    # interpolated Mach number and pressure at cell interface
+    M_half = _m2_plus(M_L) + _m2_minus(M_R)
+    p_half = p_L * _p3_plus(M_L) + p_R * _p3_minus(M_R)
+
+    # Upwinding for convective flux
+    if M_half >= 0.0:
+        u, p, a = u_L, p_L, a_L
+    else:
+        u, p, a = u_R, p_R, a_R
+    flux[0] = M_half * (u[0] * a)
+    flux[1] = M_half * (u[1] * a) + p_half * n_x
+    flux[2] = M_half * (u[2] * a) + p_half * n_y
+    flux[3] = M_half * ((u[3] + p) * a)
+
+
+@njit(cache=True)
+def _outflow_bc(u_in, u_farfield, n_x, n_y, u_ghost):
+    """outflow_bc of one face written into u_ghost"""
+    p = (GAMMA - 1) * (
+        u_in[3] - 0.5 * (u_in[1] * u_in[1] + u_in[2] * u_in[2]) / u_in[0]
+    )
+    a = math.sqrt(GAMMA * p / u_in[0])
+    v_n = (u_in[1] * n_x + u_in[2] * n_y) / u_in[0]
+
+    if v_n < 0.0:
+        u_ghost[:] = u_farfield
+        if -v_n <= a:
+            u_ghost[3] = u_in[3]
+    else:
+        u_ghost[:] = u_in
+        if v_n <= a:
+            u_ghost[3] = u_farfield[3]
+
+
+@njit(parallel=True, cache=True)
+def _interior_fluxes(U, left_cell, right_cell, normals, begin, end, flux):
+    for idx_face in prange(begin, end):
+        _ausm_flux(
+            U[left_cell[idx_face]],
+            U[right_cell[idx_face]],
+            normals[idx_face, 0],
+            normals[idx_face, 1],
+            flux[idx_face],
+        )
+
+
+@njit(cache=True)
+def _slip_wall_bc(u_in, n_x, n_y, u_ghost):
+    """slip_wall_bc_batch of one face written into u_ghost"""
+    m_n = u_in[1] * n_x + u_in[2] * n_y
+    u_ghost[0] = u_in[0]
+    u_ghost[1] = u_in[1] - 2.0 * m_n * n_x
+    u_ghost[2] = u_in[2] - 2.0 * m_n * n_y
+    u_ghost[3] = u_in[3]
+
+
+@njit(parallel=True, cache=True)
+def _boundary_fluxes(U, left_cell, normals, begin, end, kind, state, ghosts, flux):
+    """Fluxes of boundary faces begin:end, all with boundary condition of given
+    kind; state is the far-field or prescribed state if the kind needs one.
+    The ghost state of face begin + i is stored in row i of ghosts.
+    """
+    for idx_face in prange(begin, end):
+        u_in = U[left_cell[idx_face]]
+        n_x = normals[idx_face, 0]
+        n_y = normals[idx_face, 1]
+
+        u_ghost = ghosts[idx_face - begin]
+        if kind == _OUTFLOW:
+            _outflow_bc(u_in, u_in, n_x, n_y, u_ghost)
+        elif kind == _FARFIELD:
+            _outflow_bc(u_in, state, n_x, n_y, u_ghost)
+        elif kind == _SLIP_WALL:
+            _slip_wall_bc(u_in, n_x, n_y, u_ghost)
+        else:
+            u_ghost[:] = state
+        _ausm_flux(u_in, u_ghost, n_x, n_y, flux[idx_face])
+
+
+@njit(parallel=True, cache=True)
+def _assemble_residual(indptr, indices, data, flux, Res):
+    """Res = B @ flux for B in CSR format, one cell per iteration"""
+    num_cells = Res.shape[0]
+    for idx_cell in prange(num_cells):
+        for k in range(Res.shape[1]):
+            Res[idx_cell, k] = 0.0
+        for ptr in range(indptr[idx_cell], indptr[idx_cell + 1]):
+            idx_face = indices[ptr]
+            for k in range(Res.shape[1]):
+                Res[idx_cell, k] += data[ptr] * flux[idx_face, k]
+
+
+@njit(parallel=True, cache=True)
+def _time_step(U, indptr, indices, abs_data, normals, cell_volumes, dt):
+    """dt of every cell: volume over length-weighted sum of spectral radii.
+    abs_data holds the face lengths of the incidence matrix in CSR layout.
+    """
+    num_cells = U.shape[0]
+    for idx_cell in prange(num_cells):
+        rho = U[idx_cell, 0]
+        v1 = U[idx_cell, 1] / rho
+        v2 = U[idx_cell, 2] / rho
+        p = (GAMMA - 1.0) * (U[idx_cell, 3] - 0.5 * rho * (v1 * v1 + v2 * v2))
+        a = math.sqrt(GAMMA * p / rho)
+
+        spectral_radius_sum = 0.0
+        for ptr in range(indptr[idx_cell], indptr[idx_cell + 1]):
+            idx_face = indices[ptr]
+            v_n = v1 * normals[idx_face, 0] + v2 * normals[idx_face, 1]
+            spectral_radius_sum += (abs(v_n) + a) * abs_data[ptr]
+
+        dt[idx_cell] = cell_volumes[idx_cell] / spectral_radius_sum
+
+
+@njit(parallel=True, cache=True)
+def _update(U, Res, dt, cell_volumes):
+    for idx_cell in prange(U.shape[0]):
+        time_scale = dt / cell_volumes[idx_cell]
+        for k in range(U.shape[1]):
+            U[idx_cell, k] -= time_scale * Res[idx_cell, k]
+
+
+@njit(parallel=True, cache=True)
+def _update_local(U, Res, dt, cell_volumes):
+    for idx_cell in prange(U.shape[0]):
+        time_scale = dt[idx_cell] / cell_volumes[idx_cell]
+        for k in range(U.shape[1]):
+            U[idx_cell, k] -= time_scale * Res[idx_cell, k]
+
+
+class NumbaKernels:
+    """Per-step kernels of the explicit solver compiled with Numba. Loops run in
+    parallel over faces (fluxes) or cells (residual, time step, update), so no
+    two threads ever write the same entry. Work arrays are kept in a
+    Workspace, with out arguments given no kernel allocates.
+    dtype is the floating point type of the state, fluxes and residuals; the
+    face and cell geometry read per step is kept as a copy rounded to it.
+    Kernels compute in float64 scalars and store results in dtype.
+    """
+
+    name = "numba"
+    flux_scheme = "ausm"
+
+    def __init__(
+        self,
+        faces: FaceTable,
+        geometry: MeshGeometry,
+        boundary_conditions: dict = None,
+        dtype=np.float64,
+    ):
+        self.faces = faces
+        self.geometry = geometry
+        self.num_cells = geometry.cell_volumes.shape[0]
+        self.dtype = np.dtype(dtype)
+        self.workspace = Workspace()
+
+        interior = faces.interior_slice()
+        self.__interior_range = (interior.start, interior.stop)
+
+        # Face range, kind and state of the boundary condition of every group
+        self.boundary_conditions = BoundaryConditions(faces, boundary_conditions)
+        self.__boundary_groups = []
+        for name, bc in self.boundary_conditions.conditions.items():
+            if bc.name not in _BC_KINDS:
+                raise ValueError(f"Boundary condition '{bc.name}' is not compiled")
+            group = faces.group_slice(name)
+            state = getattr(bc, "state", np.zeros(4))
+            self.__boundary_groups.append(
+                (group.start, group.stop, _BC_KINDS[bc.name], state)
+            )
+        # Ghost states of the faces of one group at a time
+        max_group_size = max(
+            (end - begin for begin, end, _, _ in self.__boundary_groups), default=0
+        )
+        self.__ghosts = np.empty((max_group_size, 4), dtype)
+
+        self.__left_cell = np.ascontiguousarray(faces.left_cell)
+        self.__right_cell = np.ascontiguousarray(faces.right_cell)
+        self.__normals = np.ascontiguousarray(geometry.face_normals, dtype)
+        self.__cell_volumes = np.ascontiguousarray(geometry.cell_volumes, dtype)
+
+        # Rows of the incidence matrix list the faces of each cell
+        incidence = face_cell_incidence(faces, self.num_cells, geometry.face_lengths)
+        self.__indptr = incidence.indptr
+        self.__indices = incidence.indices
+        self.__data = incidence.data.astype(dtype)
+        self.__abs_data = np.abs(self.__data)
+
+    def interior_fluxes(self, U: np.array, flux: np.array):
+        """Compute numerical flux through interior faces into flux[interior]"""
+        _interior_fluxes(
+            U,
+            self.__left_cell,
+            self.__right_cell,
+            self.__normals,
+            *self.__interior_range,
+            flux,
+        )
+
+    def boundary_fluxes(self, U: np.array, flux: np.array):
+        """Compute numerical flux through boundary faces into flux[boundary]"""
+        for begin, end, kind, state in self.__boundary_groups:
+            _boundary_fluxes(
+                U,
+                self.__left_cell,
+                self.__normals,
+                begin,
+                end,
+                kind,
+                state,
+                self.__ghosts,
+                flux,
+            )
+
+    def assemble_residual(self, flux: np.array, Res: np.array):
+        """Sum face fluxes into cell residuals Res"""
+        _assemble_residual(self.__indptr, self.__indices, self.__data, flux, Res)
+
+    def residual(self, U: np.array, out: np.array = None) -> np.array:
+        """Residual of all cells, shape (num_cells, 4), written into out if given"""
+        flux = self.workspace.get(
+            "flux", (self.faces.num_faces(), U.shape[1]), self.dtype
+        )
+        self.interior_fluxes(U, flux)
+        self.boundary_fluxes(U, flux)
+
+        Res = np.empty_like(U) if out is None else out
+        self.assemble_residual(flux, Res)
+        return Res
+
+    def time_step(self, U: np.array, out: np.array = None) -> np.array:
+        """Local time step of every cell, written into out if given"""
+        dt = np.empty(self.num_cells, self.dtype) if out is None else out
+        _time_step(
+            U,
+            self.__indptr,
+            self.__indices,
+            self.__abs_data,
+            self.__normals,
+            self.__cell_volumes,
+            dt,
+        )
+        return dt
+
+    def update(self, U: np.array, Res: np.array, dt):
+        """Forward Euler update U = U - dt / |C_i| * Res, in place.
+        dt is a global time step or an array of local time steps of all cells.
+        """
+        if np.ndim(dt) == 0:
+            _update(U, Res, dt, self.__cell_volumes)
+        else:
+            _update_local(U, Res, dt, self.__cell_volumes)
+
+    def close(self):
+        """Release resources held by the kernels, nothing to do here"""
@@ -0,0 +1,197 @@
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+import numpy as np
+from boundary_conditions import BoundaryConditions
+from kernels import NumpyKernels
+from mesh_algorithm import FaceTable, greedy_face_coloring
+from mesh_geometry import MeshGeometry
+from numerical_flux import get_flux_scheme
+
+# State of a worker process, set once by _init_worker
+_worker = {}
+
+
+def _attach_shared_array(name: str, shape: tuple, dtype) -> tuple:
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _init_worker(
+    U_name: str,
+    Res_name: str,
+    shape: tuple,
+    dtype,
+    left_cell: np.array,
+    right_cell: np.array,
+    normals: np.array,
+    face_lengths: np.array,
+    face_ids: np.array,
+    flux_scheme: str,
+    boundary_conditions: BoundaryConditions,
+):
+    """Attach worker to shared U and Res and store per-face data ordered by color"""
+    U_shm, U = _attach_shared_array(U_name, shape, dtype)
+    Res_shm, Res = _attach_shared_array(Res_name, shape, dtype)
+
+    # Shared memory objects have to stay alive as long as the arrays are used
+    _worker.update(
+        U_shm=U_shm,
+        Res_shm=Res_shm,
+        U=U,
+        Res=Res,
+        left_cell=left_cell,
+        right_cell=right_cell,
+        normals=normals,
+        face_lengths=face_lengths,
+        face_ids=face_ids,
+        flux=get_flux_scheme(flux_scheme),
+        boundary_conditions=boundary_conditions,
+    )
+
+
+def _face_chunk_residual(chunk: tuple[int, int]):
+    """Compute fluxes of faces chunk[0]:chunk[1] and scatter them into Res.
+    All faces of a chunk have the same color, so no two of them share a cell
+    and chunks of one color can be processed concurrently.
+    """
+    begin, end = chunk
+    U = _worker["U"]
+    Res = _worker["Res"]
+    idx_L = _worker["left_cell"][begin:end]
+    idx_R = _worker["right_cell"][begin:end]
+    normals = _worker["normals"][begin:end]
+    face_lengths = _worker["face_lengths"][begin:end, np.newaxis]
+
+    u_L = U[idx_L]
+    has_R = idx_R > -1
+    u_R = np.empty_like(u_L)
+    u_R[has_R] = U[idx_R[has_R]]
+    u_R[~has_R] = _worker["boundary_conditions"].ghost_states(
+        u_L[~has_R], normals[~has_R], _worker["face_ids"][begin:end][~has_R]
+    )
+
+    flux = face_lengths * _worker["flux"](u_L, u_R, normals)
+
+    # Cell indices within a chunk are unique, plain fancy indexing is race-free
+    Res[idx_L] += flux
+    Res[idx_R[has_R]] -= flux[has_R]
+
+
+class ProcessPoolKernels:
+    """Per-step kernels of the explicit solver distributed over a pool of
+    worker processes. U and Res live in shared memory. Faces are colored so
+    that faces of one color do not share cells; each color is split into
+    chunks which the workers process concurrently, scattering directly into
+    Res without locks. Colors are processed one after another.
+    Time step and update are cheap operations done in the calling process
+    by NumPy kernels. dtype is the floating point type of the state, fluxes
+    and residuals, also of the face geometry passed to the workers.
+    """
+
+    name = "processes"
+
+    def __init__(
+        self,
+        faces: FaceTable,
+        geometry: MeshGeometry,
+        num_workers: int = None,
+        flux_scheme: str = "ausm",
+        boundary_conditions: dict = None,
+        dtype=np.float64,
+    ):
+        self.faces = faces
+        self.geometry = geometry
+        self.dtype = np.dtype(dtype)
+        # Fail early on unknown schemes instead of in every worker
+        get_flux_scheme(flux_scheme)
+        self.flux_scheme = flux_scheme
+        self.boundary_conditions = BoundaryConditions(faces, boundary_conditions)
+        self.num_cells = geometry.cell_volumes.shape[0]
+        self.__cell_kernels = NumpyKernels(faces, geometry, dtype=dtype)
+        if num_workers is None:
+            num_workers = os.cpu_count()
+        self.num_workers = num_workers
+
+        # Faces sorted by color, chunks of every color in color order
+        colors = greedy_face_coloring(faces, self.num_cells)
+        order = np.argsort(colors, kind="stable")
+        color_offsets = np.searchsorted(colors[order], np.arange(colors.max() + 2))
+        self.num_colors = len(color_offsets) - 1
+
+        self.__color_chunks = []
+        for begin, end in zip(color_offsets[:-1], color_offsets[1:]):
+            bounds = np.linspace(begin, end, num_workers + 1).astype(int)
+            self.__color_chunks.append(
+                [(int(b), int(e)) for b, e in zip(bounds[:-1], bounds[1:]) if e > b]
+            )
+
+        shape = (self.num_cells, 4)
+        size = self.num_cells * 4 * self.dtype.itemsize
+        self.__U_shm = shared_memory.SharedMemory(create=True, size=size)
+        self.__Res_shm = shared_memory.SharedMemory(create=True, size=size)
+        self.__U = np.ndarray(shape, dtype=dtype, buffer=self.__U_shm.buf)
+        self.__Res = np.ndarray(shape, dtype=dtype, buffer=self.__Res_shm.buf)
+
+        # Workers are spawned, not forked: forking a process whose threading
+        # layer is already running (e.g. after Numba parallel kernels) leaves
+        # the children with dead threads and the interpreter unable to exit
+        self.__pool = multiprocessing.get_context("spawn").Pool(
+            num_workers,
+            initializer=_init_worker,
+            initargs=(
+                self.__U_shm.name,
+                self.__Res_shm.name,
+                shape,
+                self.dtype,
+                faces.left_cell[order],
+                faces.right_cell[order],
+                geometry.face_normals[order].astype(dtype),
+                geometry.face_lengths[order].astype(dtype),
+                order,
+                flux_scheme,
+                self.boundary_conditions,
+            ),
+        )
+
+    def residual(self, U: np.array, out: np.array = None) -> np.array:
+        """Residual of all cells, shape (num_cells, 4), written into out if given"""
+        self.__U[:] = U
+        self.__Res.fill(0.0)
+
+        for chunks in self.__color_chunks:
+            self.__pool.map(_face_chunk_residual, chunks)
+
+        if out is None:
+            return self.__Res.copy()
+        out[:] = self.__Res
+        return out
+
+    def time_step(self, U: np.array, out: np.array = None) -> np.array:
+        """Local time step of every cell, written into out if given"""
+        return self.__cell_kernels.time_step(U, out)
+
+    def update(self, U: np.array, Res: np.array, dt):
+        """Forward Euler update U = U - dt / |C_i| * Res, in place.
+        dt is a global time step or an array of local time steps of all cells.
+        """
+        self.__cell_kernels.update(U, Res, dt)
+
+    def close(self):
+        """Stop worker processes and release shared memory"""
+        if self.__pool is None:
+            return
+        self.__pool.close()
+        self.__pool.join()
+        self.__pool = None
+
+        del self.__U, self.__Res
+        for shm in (self.__U_shm, self.__Res_shm):
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
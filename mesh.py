@@ -1,13 +1,24 @@
 import numpy as np
 
-from mesh_algorithm import Face, build_faces
+from mesh_algorithm import FaceTable, build_faces
+from mesh_geometry import MeshGeometry, compute_mesh_geometry
 from cell_group import CellGroup
 
 
 class Mesh:
     """Holds all data to represent a mesh as a geometric support of a simulation"""
 
-    def __init__(self, cell_groups: list[CellGroup], node_coords: np.array):
+    def __init__(
+        self,
+        cell_groups: list[CellGroup],
+        node_coords: np.array,
+        faces: FaceTable = None,
+        geometry: MeshGeometry = None,
+    ):
+        """Construct mesh from cell groups and node coordinates.
+        Faces (and geometry) are computed unless they are passed in, e.g. when
+        the mesh is restored from a cache.
+        """
         self.__cells_2d = [
             cell_group
             for cell_group in cell_groups
@@ -21,8 +32,12 @@ class Mesh:
             if cell_group.ref_elem.topo_dim() == 1
         ]
 
-        self.__edges = build_faces(self.__cells_2d[0], cells_1d)
+        if faces is None:
+            faces = build_faces(self.__cells_2d[0], cells_1d)
+
+        self.__edges = faces
         self.__node_coords = node_coords
+        self.__geometry = geometry
 
     def node_coordinates(self) -> np.array:
         return self.__node_coords
@@ -30,9 +45,17 @@ class Mesh:
     def cells(self) -> CellGroup:
         return self.__cells_2d[0]
 
-    def edges(self) -> dict[str, list[Face]]:
+    def edges(self) -> FaceTable:
         return self.__edges
 
+    def geometry(self) -> MeshGeometry:
+        """Cell and face geometry, computed on first access"""
+        if self.__geometry is None:
+            self.__geometry = compute_mesh_geometry(
+                self.cells(), self.__edges, self.__node_coords
+            )
+        return self.__geometry
+
     def print_info(self):
         """Print information about cells in the mesh"""
         print("> 2D cell groups:")
@@ -42,7 +65,8 @@ class Mesh:
         print(f" > {self.__node_coords.shape[0]} nodes\n")
 
         print("> Edge lists:")
-        for name, entity_list in self.__edges.items():
+        for name in self.__edges.group_names:
             print(f"  [{name}]")
-            for entity in entity_list:
-                print(f"    {entity}")
+            group = self.__edges.group_slice(name)
+            for idx_face in range(group.start, group.stop):
+                print(f"    {self.__edges.face(idx_face)}")
@@ -1,4 +1,5 @@
 import numpy as np
+import scipy.sparse
 from ref_elem import RefElem
 from cell_group import CellGroup
 
@@ -15,17 +16,61 @@ class Face:
         return f"Face  [{self.adj_cell[0]}, {self.adj_cell[1]}]  ({self.dofs[0]}, {self.dofs[1]})"
 
 
-def face_nodes_match_inverse(face_l: Face, face_r: Face) -> bool:
+class FaceTable:
+    """Struct-of-arrays storage of all faces of a mesh.
+    Faces are stored in contiguous blocks, one block per face group. The first
+    group holds interior faces, followed by one group per boundary cell group.
+    Faces of group i occupy the index range [group_offsets[i], group_offsets[i+1]).
+    Boundary faces have right_cell == -1.
     """
-    Check if the the faces as seen from two different elements match.
-    They should list their dofs in reverse order
-    """
-    return (face_l.dofs[0] == face_r.dofs[1]) and (face_l.dofs[1] == face_r.dofs[0])
-
 
-def face_nodes_match(face_l: Face, face_r: Face) -> bool:
-    """Check if the the faces as seen from two different elements match."""
-    return (face_l.dofs[0] == face_r.dofs[0]) and (face_l.dofs[1] == face_r.dofs[1])
+    def __init__(
+        self,
+        left_cell: np.array,
+        right_cell: np.array,
+        node_ids: np.array,
+        group_names: list[str],
+        group_offsets: np.array,
+    ):
+        self.left_cell = np.ascontiguousarray(left_cell, dtype=np.int32)
+        self.right_cell = np.ascontiguousarray(right_cell, dtype=np.int32)
+        self.node_ids = np.ascontiguousarray(node_ids, dtype=np.int32).reshape(-1, 2)
+        self.group_names = list(group_names)
+        self.group_offsets = np.asarray(group_offsets, dtype=np.int64)
+
+        assert self.left_cell.shape == self.right_cell.shape
+        assert self.left_cell.shape[0] == self.node_ids.shape[0]
+        assert len(self.group_names) + 1 == self.group_offsets.shape[0]
+        assert self.group_offsets[-1] == self.left_cell.shape[0]
+
+    def __len__(self) -> int:
+        return self.left_cell.shape[0]
+
+    def num_faces(self) -> int:
+        return self.left_cell.shape[0]
+
+    def group_slice(self, name: str) -> slice:
+        """Index range of all faces in group 'name'"""
+        idx = self.group_names.index(name)
+        return slice(int(self.group_offsets[idx]), int(self.group_offsets[idx + 1]))
+
+    def interior_slice(self) -> slice:
+        """Index range of all interior faces"""
+        return slice(0, int(self.group_offsets[1]))
+
+    def boundary_slice(self) -> slice:
+        """Index range of all boundary faces (all boundary groups together)"""
+        return slice(int(self.group_offsets[1]), int(self.group_offsets[-1]))
+
+    def boundary_group_names(self) -> list[str]:
+        return self.group_names[1:]
+
+    def face(self, idx: int) -> Face:
+        """Return a single face as a Face object (for inspection and printing)"""
+        return Face(
+            adj_cell=[int(self.left_cell[idx]), int(self.right_cell[idx])],
+            dofs=[int(self.node_ids[idx, 0]), int(self.node_ids[idx, 1])],
+        )
 
 
 def global_entity_dofs(
@@ -51,76 +96,131 @@ def global_entity_coordinates(
     return entity_coords
 
 
-def build_faces(
-    cells_2d: CellGroup, cells_1d: list[CellGroup]
-) -> dict[str, list[Face]]:
-    dofs2d = cells_2d.dof_ids
-    num_cells2d = dofs2d.shape[0]
-
-    tmp_faces = {}
-
-    for idx_cell in range(num_cells2d):
-        global_cell_dofs = dofs2d[idx_cell, :]
-        global_edge_dofs = global_entity_dofs(global_cell_dofs, cells_2d.ref_elem, 1)
-
-        for dof_pair in global_edge_dofs:
-            face = Face(adj_cell=[idx_cell, -1], dofs=[dof_pair[0], dof_pair[1]])
-
-            search_dof_key = min(face.dofs)
-            if search_dof_key not in tmp_faces:
-                tmp_faces[search_dof_key] = []
-
-            match_found = False
-            for j in range(len(tmp_faces[search_dof_key])):
-                if face_nodes_match_inverse(tmp_faces[search_dof_key][j], face):
-                    tmp_faces[search_dof_key][j].adj_cell[1] = idx_cell
-                    match_found = True
-
-            if not match_found:
-                tmp_faces[search_dof_key].append(face)
+def local_entity_dofs(ref_elem: RefElem, dim: int) -> np.array:
+    """Return local degrees of freedom of all sub-entities of given dimension
+    as one array of shape (number of entities, dofs per entity)
+    """
+    return np.array([topo_entity.dofs for topo_entity in ref_elem.entities(dim)])
 
-    # Count internal faces:
-    internal_faces = []
-    for _, face_list in tmp_faces.items():
-        for face in face_list:
-            if face.adj_cell[0] >= 0 and face.adj_cell[1] >= 0:
-                internal_faces.append(face)
 
+def edge_keys(edge_dofs: np.array, num_nodes: int) -> np.array:
+    """Map each edge (pair of node ids) to an integer key which does not depend
+    on the orientation of the edge
     """
-    print(f'Number of internal faces = {len(internal_faces)}')
-
-    for key, face_list in tmp_faces.items():
-        print(f'KEY {key + 1}')
-        for face in face_list:
-            print(f'    ({face.adj_cell[0]+1}, {face.adj_cell[1]+1})'
-                    f' => nodes [{face.dofs[0]+1}, {face.dofs[1]+1}]')
+    lo = np.minimum(edge_dofs[:, 0], edge_dofs[:, 1]).astype(np.int64)
+    hi = np.maximum(edge_dofs[:, 0], edge_dofs[:, 1]).astype(np.int64)
+    return lo * num_nodes + hi
+
+
+def build_faces(cells_2d: CellGroup, cells_1d: list[CellGroup]) -> FaceTable:
+    """Build face connectivity of the mesh.
+    Every edge of every 2D cell is expanded into one array and the edges are
+    sorted by their canonical (min node, max node) key. An edge key that
+    appears twice is an interior face, the first occurrence (lower cell index)
+    becomes the left cell and defines the orientation of the face.
+    Boundary faces are found by searching the keys of 1D cells in the
+    sorted array.
     """
-
-    face_dict = {cells_2d.name: internal_faces}
+    dofs2d = cells_2d.dof_ids
+    num_cells2d = dofs2d.shape[0]
+    num_nodes = int(dofs2d.max()) + 1 if dofs2d.size > 0 else 0
+    for cell_grp_1d in cells_1d:
+        if cell_grp_1d.dof_ids.size > 0:
+            num_nodes = max(num_nodes, int(cell_grp_1d.dof_ids.max()) + 1)
+
+    # All edges of all cells, one row per (cell, local edge)
+    local_edges = local_entity_dofs(cells_2d.ref_elem, 1)
+    edge_dofs = dofs2d[:, local_edges].reshape(-1, 2)
+    edge_cell = np.repeat(np.arange(num_cells2d), local_edges.shape[0])
+
+    keys = edge_keys(edge_dofs, num_nodes)
+    unique_keys, first, inverse, counts = np.unique(
+        keys, return_index=True, return_inverse=True, return_counts=True
+    )
+    assert np.all(counts <= 2), "Edge shared by more than two cells"
+
+    # Position of the second occurrence of each key (-1 if there is none)
+    is_second = np.ones(keys.shape[0], dtype=bool)
+    is_second[first] = False
+    second = np.full(unique_keys.shape[0], -1, dtype=np.int64)
+    second[inverse[is_second]] = np.flatnonzero(is_second)
+
+    # Interior faces, ordered by left cell and local edge index
+    interior = np.flatnonzero(counts == 2)
+    interior = interior[np.argsort(first[interior], kind="stable")]
+
+    left_cell = [edge_cell[first[interior]]]
+    right_cell = [edge_cell[second[interior]]]
+    node_ids = [edge_dofs[first[interior]]]
+    group_names = [cells_2d.name]
+    group_sizes = [interior.shape[0]]
 
     # Detect boundary faces
     for cell_grp_1d in cells_1d:
-        dofs1d = cell_grp_1d.dof_ids
-        num_cells1d = dofs1d.shape[0]
-
-        face_list_1d = []
-
-        for idx_cell in range(num_cells1d):
-            global_edge_dofs = global_entity_dofs(
-                dofs1d[idx_cell, :], cell_grp_1d.ref_elem, 1
-            )
-
-            assert len(global_edge_dofs) == 1
-            face = Face(adj_cell=[-1, -1], dofs=global_edge_dofs[0])
-
-            search_dof_key = min(face.dofs)
-
-            for j in range(len(tmp_faces[search_dof_key])):
-                if face_nodes_match(tmp_faces[search_dof_key][j], face):
-                    face.adj_cell[0] = tmp_faces[search_dof_key][j].adj_cell[0]
-                    face_list_1d.append(face)
-                    break
-
-        face_dict[cell_grp_1d.name] = face_list_1d
-
-    return face_dict
+        local_edges_1d = local_entity_dofs(cell_grp_1d.ref_elem, 1)
+        assert local_edges_1d.shape[0] == 1
+        bnd_dofs = cell_grp_1d.dof_ids[:, local_edges_1d[0]].reshape(-1, 2)
+
+        bnd_keys = edge_keys(bnd_dofs, num_nodes)
+        pos = np.searchsorted(unique_keys, bnd_keys)
+        pos[pos >= unique_keys.shape[0]] = 0
+        found = unique_keys[pos] == bnd_keys
+
+        # The boundary edge must have the same orientation as the cell edge
+        cell_edge = first[pos]
+        found &= edge_dofs[cell_edge, 0] == bnd_dofs[:, 0]
+
+        left_cell.append(edge_cell[cell_edge[found]])
+        right_cell.append(np.full(np.count_nonzero(found), -1))
+        node_ids.append(bnd_dofs[found])
+        group_names.append(cell_grp_1d.name)
+        group_sizes.append(np.count_nonzero(found))
+
+    return FaceTable(
+        left_cell=np.concatenate(left_cell),
+        right_cell=np.concatenate(right_cell),
+        node_ids=np.concatenate(node_ids),
+        group_names=group_names,
+        group_offsets=np.concatenate(([0], np.cumsum(group_sizes))),
+    )
+
+
+def greedy_face_coloring(faces: FaceTable, num_cells: int) -> np.array:
+    """Color faces so that no two faces of the same color share a cell.
+    Faces are visited in order and get the smallest color not used yet by
+    any face of their adjacent cells.
+    Returns color of every face, array of shape (num_faces,).
+    """
+    colors = np.empty(faces.num_faces(), dtype=np.int32)
+    # Bit k is set if a face of color k is adjacent to the cell
+    used_colors = [0] * num_cells
+
+    for idx_face, (idx_L, idx_R) in enumerate(
+        zip(faces.left_cell.tolist(), faces.right_cell.tolist())
+    ):
+        used = used_colors[idx_L]
+        if idx_R > -1:
+            used |= used_colors[idx_R]
+
+        # lowest unset bit
+        free = ~used & (used + 1)
+        colors[idx_face] = free.bit_length() - 1
+
+        used_colors[idx_L] |= free
+        if idx_R > -1:
+            used_colors[idx_R] |= free
+
+    return colors
+
+
+def cell_adjacency(faces: FaceTable, num_cells: int) -> scipy.sparse.csr_matrix:
+    """Symmetric cell-to-cell adjacency matrix through interior faces"""
+    interior = faces.interior_slice()
+    idx_L = faces.left_cell[interior]
+    idx_R = faces.right_cell[interior]
+    rows = np.concatenate([idx_L, idx_R])
+    cols = np.concatenate([idx_R, idx_L])
+    return scipy.sparse.csr_matrix(
+        (np.ones(rows.shape[0], dtype=np.int8), (rows, cols)),
+        shape=(num_cells, num_cells),
+    )
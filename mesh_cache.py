@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from cell_group import CellGroup
+from elem_shape import ElemShape
+from gmsh_reader import GmshReader
+from mesh import Mesh
+from mesh_algorithm import FaceTable
+from mesh_geometry import MeshGeometry
+from ref_elem_factory import RefElemFactory
+
+# Increase whenever the layout of cached data changes
+CACHE_FORMAT_VERSION = 1
+
+# Arrays stored in a cache entry, one .npy file per array
+_FACE_ARRAYS = ("left_cell", "right_cell", "node_ids", "group_offsets")
+_GEOMETRY_ARRAYS = (
+    "cell_volumes",
+    "cell_centroids",
+    "face_normals",
+    "face_lengths",
+    "face_midpoints",
+)
+
+
+def file_content_hash(file_name: str) -> str:
+    """SHA-256 digest of file content"""
+    digest = hashlib.sha256()
+    with open(file_name, "rb") as infile:
+        for chunk in iter(lambda: infile.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_mesh(mesh_file_name: str, cache_dir: str = None) -> Mesh:
+    """Read mesh from file in Gmsh format and build its faces and geometry.
+    If cache_dir is given, the preprocessed mesh is stored there, keyed by
+    a hash of the content of the mesh file. Later calls with unchanged mesh
+    file memory-map the cached arrays instead of preprocessing the mesh again.
+    """
+    if cache_dir is None:
+        nodes, cell_groups = GmshReader().load(mesh_file_name)
+        return Mesh(cell_groups, nodes)
+
+    content_hash = file_content_hash(mesh_file_name)
+    stem = os.path.splitext(os.path.basename(mesh_file_name))[0]
+    entry_dir = os.path.join(cache_dir, f"{stem}-{content_hash[:16]}")
+
+    mesh = _load_cache_entry(entry_dir, content_hash)
+    if mesh is not None:
+        return mesh
+
+    nodes, cell_groups = GmshReader().load(mesh_file_name)
+    mesh = Mesh(cell_groups, nodes)
+
+    # Entries for previous versions of the same mesh file are stale
+    source_path = os.path.abspath(mesh_file_name)
+    if os.path.isdir(cache_dir):
+        for name in os.listdir(cache_dir):
+            other_dir = os.path.join(cache_dir, name)
+            if name != os.path.basename(entry_dir) and (
+                _cache_entry_source(other_dir) == source_path
+            ):
+                shutil.rmtree(other_dir, ignore_errors=True)
+
+    _save_cache_entry(entry_dir, content_hash, source_path, mesh)
+    return mesh
+
+
+def _cache_entry_source(entry_dir: str) -> str:
+    """Path of the mesh file a cache entry was created from, None if entry_dir
+    is not a readable cache entry
+    """
+    try:
+        with open(os.path.join(entry_dir, "meta.json"), encoding="utf-8") as infile:
+            return json.load(infile).get("source_path")
+    except (OSError, ValueError):
+        return None
+
+
+def _save_cache_entry(entry_dir: str, content_hash: str, source_path: str, mesh: Mesh):
+    """Write all mesh arrays into entry_dir. The entry is assembled in a
+    temporary directory and renamed, so readers never see a partial entry.
+    """
+    parent_dir = os.path.dirname(os.path.abspath(entry_dir))
+    os.makedirs(parent_dir, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(dir=parent_dir, prefix=".tmp-")
+
+    cells = mesh.cells()
+    faces = mesh.edges()
+    geometry = mesh.geometry()
+
+    arrays = {"nodes": mesh.node_coordinates(), "dof_ids": cells.dof_ids}
+    arrays.update({name: getattr(faces, name) for name in _FACE_ARRAYS})
+    arrays.update({name: getattr(geometry, name) for name in _GEOMETRY_ARRAYS})
+
+    for name, array in arrays.items():
+        np.save(os.path.join(tmp_dir, name + ".npy"), np.ascontiguousarray(array))
+
+    meta = {
+        "format_version": CACHE_FORMAT_VERSION,
+        "content_hash": content_hash,
+        "source_path": source_path,
+        "cells": {
+            "shape": int(cells.ref_elem.shape()),
+            "degree": cells.ref_elem.deg(),
+            "tag": int(cells.tag),
+            "name": cells.name,
+        },
+        "face_group_names": faces.group_names,
+    }
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as outfile:
+        json.dump(meta, outfile)
+
+    # An existing entry at this point was rejected (other format version,
+    # corrupt or partially written) and would make the rename fail
+    if os.path.exists(entry_dir):
+        shutil.rmtree(entry_dir, ignore_errors=True)
+
+    try:
+        os.replace(tmp_dir, entry_dir)
+    except OSError:
+        # Another process stored the same entry in the meantime
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def _load_cache_entry(entry_dir: str, content_hash: str) -> Mesh:
+    """Restore mesh from a cache entry. Arrays are memory-mapped read-only.
+    Returns None if the entry does not exist or does not match content_hash.
+    """
+    meta_file = os.path.join(entry_dir, "meta.json")
+    if not os.path.isfile(meta_file):
+        return None
+
+    with open(meta_file, encoding="utf-8") as infile:
+        meta = json.load(infile)
+
+    if (
+        meta.get("format_version") != CACHE_FORMAT_VERSION
+        or meta.get("content_hash") != content_hash
+    ):
+        return None
+
+    def load_array(name: str) -> np.array:
+        return np.load(os.path.join(entry_dir, name + ".npy"), mmap_mode="r")
+
+    cells_meta = meta["cells"]
+    ref_elem = RefElemFactory().make_elem(
+        ElemShape(cells_meta["shape"]), cells_meta["degree"]
+    )
+    cells = CellGroup(
+        ref_elem, load_array("dof_ids"), cells_meta["tag"], cells_meta["name"]
+    )
+
+    faces = FaceTable(
+        *(load_array(name) for name in _FACE_ARRAYS[:3]),
+        group_names=meta["face_group_names"],
+        group_offsets=load_array("group_offsets"),
+    )
+    geometry = MeshGeometry(**{name: load_array(name) for name in _GEOMETRY_ARRAYS})
+
+    return Mesh([cells], load_array("nodes"), faces=faces, geometry=geometry)
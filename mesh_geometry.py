@@ -1,91 +1,115 @@
+from dataclasses import dataclass
 import numpy as np
-from typing import Dict, List
 from cell_group import CellGroup
-from mesh_algorithm import Face, global_entity_coordinates
+from mesh_algorithm import FaceTable
 
 
-def cell_volumes(global_dofs: CellGroup, global_coordinates: np.array) -> np.array:
-    all_dof_ids = global_dofs.dof_ids
-    num_cells = global_dofs.dof_ids.shape[0]
+@dataclass(frozen=True)
+class MeshGeometry:
+    """Geometric quantities of all cells and faces of a mesh.
+    Face arrays are ordered as the face table of the mesh.
+    """
 
-    num_edges_per_elem = global_dofs.ref_elem.num_entities(1)
+    cell_volumes: np.array
+    cell_centroids: np.array
+    face_normals: np.array
+    face_lengths: np.array
+    face_midpoints: np.array
 
-    volumes = np.zeros(num_cells)
 
-    for idx_cell in range(num_cells):
-        cell_dofs = all_dof_ids[idx_cell, :]
-        elem_coords = global_entity_coordinates(
-            cell_dofs, global_dofs.ref_elem, global_coordinates, 2
-        )
+def cell_vertex_coordinates(
+    global_dofs: CellGroup, global_coordinates: np.array
+) -> np.array:
+    """Coordinates of the vertices of all cells, array of shape (num_cells, num_verts, 2).
+    Vertices are listed in the order in which they define the cell boundary.
+    """
+    vertex_dofs = global_dofs.ref_elem.entity(2, 0).dofs
+    return global_coordinates[global_dofs.dof_ids[:, vertex_dofs], :]
 
-        elem_coords_rolled = np.roll(elem_coords, -1, axis=0)
-        delta_xy = elem_coords_rolled - elem_coords
 
-        edge_midpoints = 0.5 * (elem_coords_rolled + elem_coords)
+def cell_volumes_and_centroids(
+    global_dofs: CellGroup, global_coordinates: np.array
+) -> tuple[np.array, np.array]:
+    """Areas and centroids of all cells computed with the shoelace formula"""
+    elem_coords = cell_vertex_coordinates(global_dofs, global_coordinates)
+    # Work relative to the first vertex to limit cancellation in the cross products
+    origin = elem_coords[:, 0, :]
+    elem_coords = elem_coords - origin[:, np.newaxis, :]
+    elem_coords_rolled = np.roll(elem_coords, -1, axis=1)
 
-        edge_normals = np.zeros_like(delta_xy)
+    x, y = elem_coords[:, :, 0], elem_coords[:, :, 1]
+    x_next, y_next = elem_coords_rolled[:, :, 0], elem_coords_rolled[:, :, 1]
 
-        cell_volume = 0.0
-        for i_edge in range(num_edges_per_elem):
-            nx = delta_xy[i_edge][1]
-            ny = -delta_xy[i_edge][0]
-            inv_norm = 1.0 / np.sqrt(nx * nx + ny * ny)
+    cross = x * y_next - x_next * y
+    volumes = 0.5 * np.sum(cross, axis=1)
 
-            edge_normals[i_edge, 0] = inv_norm * nx
-            edge_normals[i_edge, 1] = inv_norm * ny
+    inv_6v = 1.0 / (6.0 * volumes)
+    centroids = origin + np.column_stack(
+        [
+            inv_6v * np.sum((x + x_next) * cross, axis=1),
+            inv_6v * np.sum((y + y_next) * cross, axis=1),
+        ]
+    )
 
-            x, y = (
-                edge_midpoints[i_edge][0],
-                edge_midpoints[i_edge][1],
-            )
-            cell_volume += 0.5 * (x * nx + y * ny)
+    return volumes, centroids
 
-        volumes[idx_cell] = cell_volume
 
+def cell_volumes(global_dofs: CellGroup, global_coordinates: np.array) -> np.array:
+    volumes, _ = cell_volumes_and_centroids(global_dofs, global_coordinates)
     return volumes
 
 
-def face_normals(
-    global_faces: Dict[str, List[Face]], global_coordinates: np.array
-) -> Dict[str, np.array]:
-    all_face_normals = {}
-    for name, face_list in global_faces.items():
-        group_normals = np.zeros((len(face_list), 2))
+def cell_centroids(global_dofs: CellGroup, global_coordinates: np.array) -> np.array:
+    _, centroids = cell_volumes_and_centroids(global_dofs, global_coordinates)
+    return centroids
+
+
+def face_geometry(
+    faces: FaceTable, global_coordinates: np.array
+) -> tuple[np.array, np.array, np.array]:
+    """Unit normals (num_faces, 2), lengths (num_faces,) and midpoints (num_faces, 2)
+    of all faces in the face table
+    """
+    # Array of shape (num_faces, 2, 2):
+    # [[x_start, y_start]
+    #  [x_end,   y_end]] for every face
+    face_pts = global_coordinates[faces.node_ids, :]
+
+    delta_xy = face_pts[:, 1, :] - face_pts[:, 0, :]
+    lengths = np.sqrt(np.sum(delta_xy * delta_xy, axis=1))
 
-        for idx, face in enumerate(face_list):
-            # This returns 2x2 matrix
-            # [[x_start, y_start]
-            #  [x_end,   y_end]]
-            face_pts = global_coordinates[face.dofs, :].squeeze()
+    inv_norm = 1.0 / lengths
+    # For face [dx, dy], the normals is [dy, -dx]
+    normals = np.column_stack([inv_norm * delta_xy[:, 1], -inv_norm * delta_xy[:, 0]])
 
-            delta_xy = face_pts[1, :] - face_pts[0, :]
-            inv_norm = 1.0 / np.sqrt(np.dot(delta_xy, delta_xy))
-            # For face [dx, dy], the normals is [dy, -dx]
-            group_normals[idx, :] = [inv_norm * delta_xy[1], -inv_norm * delta_xy[0]]
+    midpoints = 0.5 * (face_pts[:, 0, :] + face_pts[:, 1, :])
 
-        all_face_normals[name] = group_normals
+    return normals, lengths, midpoints
 
-    return all_face_normals
 
+def face_normals(faces: FaceTable, global_coordinates: np.array) -> np.array:
+    """Unit normals of all faces in the face table, array of shape (num_faces, 2)"""
+    normals, _, _ = face_geometry(faces, global_coordinates)
+    return normals
 
-def face_lengths(
-    global_faces: Dict[str, List[Face]], global_coordinates: np.array
-) -> Dict[str, np.array]:
-    all_face_lengths = {}
-    for name, face_list in global_faces.items():
-        group_lengths = np.zeros((len(face_list)))
 
-        for idx, face in enumerate(face_list):
-            # This returns 2x2 matrix
-            # [[x_start, y_start]
-            #  [x_end,   y_end]]
-            face_pts = global_coordinates[face.dofs, :].squeeze()
+def face_lengths(faces: FaceTable, global_coordinates: np.array) -> np.array:
+    """Lengths of all faces in the face table, array of shape (num_faces,)"""
+    _, lengths, _ = face_geometry(faces, global_coordinates)
+    return lengths
 
-            delta_xy = face_pts[1, :] - face_pts[0, :]
-            norm = np.linalg.norm(delta_xy)
-            # For face [dx, dy], the normals is [dy, -dx]
-            group_lengths[idx] = norm
 
-        all_face_lengths[name] = group_lengths
+def compute_mesh_geometry(
+    cells: CellGroup, faces: FaceTable, global_coordinates: np.array
+) -> MeshGeometry:
+    """Compute all geometric quantities of cells and faces at once"""
+    volumes, centroids = cell_volumes_and_centroids(cells, global_coordinates)
+    normals, lengths, midpoints = face_geometry(faces, global_coordinates)
 
-    return all_face_lengths
+    return MeshGeometry(
+        cell_volumes=volumes,
+        cell_centroids=centroids,
+        face_normals=normals,
+        face_lengths=lengths,
+        face_midpoints=midpoints,
+    )
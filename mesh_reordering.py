@@ -0,0 +1,131 @@
+from dataclasses import dataclass
+import numpy as np
+import scipy.sparse.csgraph
+from cell_group import CellGroup
+from mesh import Mesh
+from mesh_algorithm import FaceTable, cell_adjacency
+from mesh_geometry import MeshGeometry
+
+
+@dataclass(frozen=True)
+class MeshOrdering:
+    """Permutations applied by reorder_mesh.
+    New cell i is original cell cell_order[i], new node j is original node
+    node_order[j].
+    """
+
+    cell_order: np.array
+    node_order: np.array
+
+    def cell_data_to_original(self, cell_data: np.array) -> np.array:
+        """Rearrange data of the reordered cells into the original cell order"""
+        original = np.empty_like(cell_data)
+        original[self.cell_order] = cell_data
+        return original
+
+    def cell_data_from_original(self, cell_data: np.array) -> np.array:
+        """Rearrange data given in the original cell order for reordered cells"""
+        return cell_data[self.cell_order]
+
+
+def reverse_cuthill_mckee_order(faces: FaceTable, num_cells: int) -> np.array:
+    """Cell order with small bandwidth of the cell adjacency matrix"""
+    adjacency = cell_adjacency(faces, num_cells)
+    return scipy.sparse.csgraph.reverse_cuthill_mckee(
+        adjacency, symmetric_mode=True
+    ).astype(np.int64)
+
+
+def morton_order(points: np.array, num_bits: int = 16) -> np.array:
+    """Order of points along the Morton (Z-order) space-filling curve"""
+    lower = points.min(axis=0)
+    extent = np.maximum(np.ptp(points, axis=0), np.finfo(np.float64).tiny)
+    max_coord = (1 << num_bits) - 1
+    grid = ((points - lower) / extent * max_coord).astype(np.uint64)
+
+    # Interleave bits of x (even positions) and y (odd positions)
+    keys = np.zeros(points.shape[0], dtype=np.uint64)
+    for bit in range(num_bits):
+        for axis in range(2):
+            keys |= ((grid[:, axis] >> np.uint64(bit)) & np.uint64(1)) << np.uint64(
+                2 * bit + axis
+            )
+
+    return np.argsort(keys, kind="stable")
+
+
+def reorder_mesh(mesh: Mesh, method: str = "rcm") -> tuple[Mesh, MeshOrdering]:
+    """Renumber cells, nodes and faces of mesh for memory locality.
+    method ... 'rcm' (reverse Cuthill-McKee on cell adjacency) or 'morton'
+               (Z-order curve through cell centroids)
+    Nodes are numbered in order of first use by the reordered cells. Interior
+    faces are oriented from the lower to the higher cell index and faces of
+    each group are sorted by left cell.
+    Returns the reordered mesh and the permutations to map data back.
+    """
+    cell_group = mesh.cells()
+    faces = mesh.edges()
+    geometry = mesh.geometry()
+    num_cells = cell_group.dof_ids.shape[0]
+
+    match method:
+        case "rcm":
+            cell_order = reverse_cuthill_mckee_order(faces, num_cells)
+        case "morton":
+            cell_order = morton_order(geometry.cell_centroids)
+        case _:
+            raise ValueError(f"Unknown reordering method '{method}'")
+
+    new_cell = np.empty(num_cells, dtype=np.int64)
+    new_cell[cell_order] = np.arange(num_cells)
+
+    # Nodes in order of first appearance in the reordered cells
+    dof_ids = cell_group.dof_ids[cell_order]
+    used_nodes, first_use = np.unique(dof_ids.ravel(), return_index=True)
+    node_order = used_nodes[np.argsort(first_use, kind="stable")]
+    new_node = np.full(mesh.node_coordinates().shape[0], -1, dtype=np.int64)
+    new_node[node_order] = np.arange(node_order.shape[0])
+
+    left_cell = new_cell[faces.left_cell]
+    has_R = faces.right_cell > -1
+    right_cell = np.where(has_R, new_cell[faces.right_cell], -1)
+    node_ids = new_node[faces.node_ids]
+    normals = geometry.face_normals.copy()
+
+    # Flip interior faces whose left cell got the higher index
+    flip = has_R & (left_cell > right_cell)
+    left_cell[flip], right_cell[flip] = right_cell[flip], left_cell[flip]
+    node_ids[flip] = node_ids[flip, ::-1]
+    normals[flip] = -normals[flip]
+
+    # Sort faces by left (then right) cell within each group
+    face_group = np.searchsorted(
+        faces.group_offsets, np.arange(faces.num_faces()), side="right"
+    )
+    face_order = np.lexsort((right_cell, left_cell, face_group))
+
+    reordered_faces = FaceTable(
+        left_cell[face_order],
+        right_cell[face_order],
+        node_ids[face_order],
+        faces.group_names,
+        faces.group_offsets,
+    )
+    reordered_geometry = MeshGeometry(
+        cell_volumes=geometry.cell_volumes[cell_order],
+        cell_centroids=geometry.cell_centroids[cell_order],
+        face_normals=normals[face_order],
+        face_lengths=geometry.face_lengths[face_order],
+        face_midpoints=geometry.face_midpoints[face_order],
+    )
+    reordered_cells = CellGroup(
+        cell_group.ref_elem, new_node[dof_ids], cell_group.tag, cell_group.name
+    )
+
+    reordered_mesh = Mesh(
+        [reordered_cells],
+        mesh.node_coordinates()[node_order],
+        faces=reordered_faces,
+        geometry=reordered_geometry,
+    )
+    return reordered_mesh, MeshOrdering(cell_order=cell_order, node_order=node_order)
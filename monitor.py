@@ -0,0 +1,185 @@
+import json
+import queue
+import sys
+import threading
+import numpy as np
+
+# Names of the conserved variables, as in solver.primitive_to_conservative_vars
+VARIABLES = ("rho", "rho_v1", "rho_v2", "e")
+
+
+def conserved_totals(U: np.array, cell_volumes: np.array) -> np.array:
+    """Mass, momentum and energy of the domain, sums of cell values weighted
+    by cell volume accumulated in float64. Shape (4,), or (num_members, 4)
+    for an ensemble.
+    """
+    return np.matmul(cell_volumes, U, dtype=np.float64)
+
+
+class BufferedSink:
+    """Sink writing formatted records to a stream, buffer_size lines at once.
+    Full buffers are written and flushed by a background thread, so the
+    caller does not wait for the stream; flush() and close() wait until
+    all records are written.
+    """
+
+    def __init__(self, stream, buffer_size: int):
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self.__lines = []
+        self.__batches = queue.Queue()
+        self.__writer = None
+        self.__error = None
+
+    def format(self, record: dict) -> str:
+        raise NotImplementedError
+
+    def write(self, record: dict):
+        self.__lines.append(self.format(record))
+        if len(self.__lines) >= self.buffer_size:
+            self.__submit()
+
+    def flush(self):
+        self.__submit()
+        self.__batches.join()
+        if self.__error is not None:
+            error, self.__error = self.__error, None
+            raise error
+
+    def close(self):
+        self.flush()
+        if self.__writer is not None:
+            self.__batches.put(None)
+            self.__writer.join()
+            self.__writer = None
+
+    def __submit(self):
+        """Hand buffered lines over to the writer thread"""
+        if not self.__lines:
+            return
+        if self.__writer is None:
+            self.__writer = threading.Thread(target=self.__write_batches, daemon=True)
+            self.__writer.start()
+        self.__batches.put("\n".join(self.__lines) + "\n")
+        self.__lines = []
+
+    def __write_batches(self):
+        while True:
+            batch = self.__batches.get()
+            try:
+                if batch is None:
+                    return
+                self.stream.write(batch)
+                self.stream.flush()
+            except Exception as error:
+                # Raised by the next flush() of the caller
+                self.__error = error
+            finally:
+                self.__batches.task_done()
+
+
+class StdoutSink(BufferedSink):
+    """Records as 'key = value' lines on stdout"""
+
+    def __init__(self, buffer_size: int = 1):
+        super().__init__(sys.stdout, buffer_size)
+
+    def format(self, record: dict) -> str:
+        return ", ".join(
+            f"{key} = {value:.6g}" if isinstance(value, float) else f"{key} = {value}"
+            for key, value in record.items()
+        )
+
+
+class CSVSink(BufferedSink):
+    """Records as rows of a CSV file with a header from the first record"""
+
+    def __init__(self, path: str, buffer_size: int = 100):
+        super().__init__(open(path, "w"), buffer_size)
+        self.__header_written = False
+
+    def format(self, record: dict) -> str:
+        # Records hold numbers only, no quoting is needed
+        row = ",".join(str(value) for value in record.values())
+        if not self.__header_written:
+            self.__header_written = True
+            return ",".join(record) + "\n" + row
+        return row
+
+    def close(self):
+        super().close()
+        self.stream.close()
+
+
+class JSONLinesSink(BufferedSink):
+    """Records as JSON objects, one per line"""
+
+    def __init__(self, path: str, buffer_size: int = 100):
+        super().__init__(open(path, "w"), buffer_size)
+
+    def format(self, record: dict) -> str:
+        return json.dumps(record)
+
+    def close(self):
+        super().close()
+        self.stream.close()
+
+
+class Monitor:
+    """Reports the state of a simulation.Simulation every interval steps to
+    sinks (default: stdout). Residual norms, and conserved totals if
+    totals=True, are computed only for reported steps. Every record holds
+    iteration, time (unsteady runs) or residual drop and CFL number (steady
+    runs), and the L2 norm of the residual of every variable (NaN before
+    the first step); ensembles give one record per member.
+    Attach with Simulation.add_callback(monitor, monitor.interval).
+    """
+
+    def __init__(self, sinks: list = None, interval: int = 1, totals: bool = False):
+        self.sinks = [StdoutSink()] if sinks is None else sinks
+        self.interval = interval
+        self.totals = totals
+
+    def records(self, simulation) -> list[dict]:
+        """Records of the current state of simulation"""
+        U = simulation.U
+        res_norm = simulation.residual_norm()
+        if self.totals:
+            totals = conserved_totals(U, simulation.geometry.cell_volumes)
+
+        num_members = U.shape[0] if simulation.ensemble else 1
+        time = np.broadcast_to(simulation.time, (num_members,))
+        records = []
+        for member in range(num_members):
+            record = {"iteration": simulation.iteration}
+            if simulation.ensemble:
+                record["member"] = member
+            if simulation.steady:
+                record["drop"] = float(simulation.orders_dropped)
+                record["CFL"] = float(simulation.current_CFL)
+            else:
+                record["time"] = float(time[member])
+
+            norms = res_norm[member] if simulation.ensemble else res_norm
+            for name, value in zip(VARIABLES, norms):
+                record[f"res_{name}"] = float(value)
+            if self.totals:
+                member_totals = totals[member] if simulation.ensemble else totals
+                for name, value in zip(VARIABLES, member_totals):
+                    record[f"total_{name}"] = float(value)
+            records.append(record)
+        return records
+
+    def __call__(self, simulation):
+        for record in self.records(simulation):
+            for sink in self.sinks:
+                sink.write(record)
+
+    def flush(self):
+        for sink in self.sinks:
+            sink.flush()
+
+    def close(self):
+        """Write buffered records and close files"""
+        for sink in self.sinks:
+            sink.close()
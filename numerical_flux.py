@@ -89,3 +89,277 @@ def AUSM_flux(u_L: np.array, u_R: np.array, normal: np.array) -> np.array:
             [u_R[0] * a_R, u_R[1] * a_R, u_R[2] * a_R, (u_R[3] + p_R) * a_R]
         )
         return M_half * f_c_R + f_p
+
+
+# Batched variants of the interpolation polynomials. They accept arrays of
+# Mach numbers of any shape and evaluate both branches as array expressions.
+def m1_minus_batch(ma: np.array) -> np.array:
+    """Interpolation polynomial for interface Mach number and pressure (batched)"""
+    return np.where(ma > 0.0, 0.0, ma)
+
+
+def m1_plus_batch(ma: np.array) -> np.array:
+    """Interpolation polynomial for interface Mach number and pressure (batched)"""
+    return np.where(ma > 0.0, ma, 0.0)
+
+
+def m2_minus_batch(ma: np.array) -> np.array:
+    """Interpolation polynomial for interface Mach number and pressure (batched)"""
+    abs_ma = np.abs(ma)
+    return np.where(abs_ma <= 1.0, -0.25 * (ma - 1.0) * (ma - 1.0), 0.5 * (ma - abs_ma))
+
+
+def m2_plus_batch(ma: np.array) -> np.array:
+    """Interpolation polynomial for interface Mach number and pressure (batched)"""
+    abs_ma = np.abs(ma)
+    return np.where(abs_ma <= 1.0, 0.25 * (ma + 1.0) * (ma + 1.0), 0.5 * (ma + abs_ma))
+
+
+def p3_minus_batch(ma: np.array) -> np.array:
+    """Interpolation polynomial for interface Mach number and pressure (batched)"""
+    # For |ma| > 1, m1_minus(ma) / ma is either 0 (ma > 0) or 1 (ma < 0)
+    return np.where(
+        np.abs(ma) <= 1.0,
+        -m2_minus_batch(ma) * (2.0 + ma),
+        np.where(ma > 0.0, 0.0, 1.0),
+    )
+
+
+def p3_plus_batch(ma: np.array) -> np.array:
+    """Interpolation polynomial for interface Mach number and pressure (batched)"""
+    # For |ma| > 1, m1_plus(ma) / ma is either 1 (ma > 0) or 0 (ma < 0)
+    return np.where(
+        np.abs(ma) <= 1.0, m2_plus_batch(ma) * (2.0 - ma), np.where(ma > 0.0, 1.0, 0.0)
+    )
+
+
+def AUSM_flux_batch(u_L: np.array, u_R: np.array, normals: np.array) -> np.array:
+    """Riemann solver evaluated for many faces at once.
+    u_L ... left states, array of shape (N, 4)
+    u_R ... right states, array of shape (N, 4)
+    normals ... unit face normals, array of shape (N, 2)
+    Returns fluxes as array of shape (N, 4). Leading dimensions other than N
+    are allowed as long as they broadcast.
+    """
+    gamma = 1.4
+
+    n_x = normals[..., 0]
+    n_y = normals[..., 1]
+
+    # LEFT STATE
+    # pressure
+    p_L = (gamma - 1) * (
+        u_L[..., 3]
+        - 0.5 * (u_L[..., 1] * u_L[..., 1] + u_L[..., 2] * u_L[..., 2]) / u_L[..., 0]
+    )
+    # local speed of sound
+    a_L = np.sqrt(gamma * p_L / u_L[..., 0])
+    # normal speed
+    v_L_n = (u_L[..., 1] * n_x + u_L[..., 2] * n_y) / u_L[..., 0]
+    # normal 'Mach number'
+    M_L = v_L_n / a_L
+
+    # RIGHT STATE
+    # pressure
+    p_R = (gamma - 1) * (
+        u_R[..., 3]
+        - 0.5 * (u_R[..., 1] * u_R[..., 1] + u_R[..., 2] * u_R[..., 2]) / u_R[..., 0]
+    )
+    # local speed of sound
+    a_R = np.sqrt(gamma * p_R / u_R[..., 0])
+    # normal speed
+    v_R_n = (u_R[..., 1] * n_x + u_R[..., 2] * n_y) / u_R[..., 0]
+    # normal 'Mach number'
+    M_R = v_R_n / a_R
+
+    # interpolated Mach number and pressure at cell interface
+    M_half = m2_plus_batch(M_L) + m2_minus_batch(M_R)
+    p_half = p_L * p3_plus_batch(M_L) + p_R * p3_minus_batch(M_R)
+
+    # Upwinding for convective flux
+    upwind_L = M_half >= 0.0
+    a_up = np.where(upwind_L, a_L, a_R)
+    p_up = np.where(upwind_L, p_L, p_R)
+    u_up = np.where(upwind_L[..., np.newaxis], u_L, u_R)
+
+    f_c = u_up * a_up[..., np.newaxis]
+    f_c[..., 3] = (u_up[..., 3] + p_up) * a_up
+
+    flux = M_half[..., np.newaxis] * f_c
+    flux[..., 1] += p_half * n_x
+    flux[..., 2] += p_half * n_y
+    return flux
+
+
+def _normal_flux_batch(u: np.array, normals: np.array) -> tuple:
+    """Pressure, speed of sound, normal velocity and physical normal flux of
+    states u, shape (N, 4), with respect to unit normals, shape (N, 2)
+    """
+    gamma = 1.4
+
+    rho = u[..., 0]
+    p = (gamma - 1) * (
+        u[..., 3] - 0.5 * (u[..., 1] * u[..., 1] + u[..., 2] * u[..., 2]) / rho
+    )
+    a = np.sqrt(gamma * p / rho)
+    v_n = (u[..., 1] * normals[..., 0] + u[..., 2] * normals[..., 1]) / rho
+
+    flux = u * v_n[..., np.newaxis]
+    flux[..., 1] += p * normals[..., 0]
+    flux[..., 2] += p * normals[..., 1]
+    flux[..., 3] += p * v_n
+    return p, a, v_n, flux
+
+
+def Rusanov_flux_batch(u_L: np.array, u_R: np.array, normals: np.array) -> np.array:
+    """Rusanov (local Lax-Friedrichs) flux for many faces at once: central flux
+    with dissipation scaled by the largest wave speed of both sides. Cheapest
+    and most dissipative scheme. Arguments as in AUSM_flux_batch.
+    """
+    _, a_L, v_L_n, f_L = _normal_flux_batch(u_L, normals)
+    _, a_R, v_R_n, f_R = _normal_flux_batch(u_R, normals)
+
+    s_max = np.maximum(np.abs(v_L_n) + a_L, np.abs(v_R_n) + a_R)
+    return 0.5 * (f_L + f_R) - 0.5 * s_max[..., np.newaxis] * (u_R - u_L)
+
+
+def Roe_flux_batch(
+    u_L: np.array, u_R: np.array, normals: np.array, entropy_fix: float = 0.1
+) -> np.array:
+    """Roe flux for many faces at once. Acoustic eigenvalues smaller than
+    entropy_fix times the Roe-averaged speed of sound are smoothed (Harten's
+    entropy fix) to avoid expansion shocks. Arguments as in AUSM_flux_batch.
+    """
+    gamma = 1.4
+    n_x = normals[..., 0]
+    n_y = normals[..., 1]
+
+    p_L, _, v_L_n, f_L = _normal_flux_batch(u_L, normals)
+    p_R, _, v_R_n, f_R = _normal_flux_batch(u_R, normals)
+
+    # Roe averages
+    sqrt_rho_L = np.sqrt(u_L[..., 0])
+    sqrt_rho_R = np.sqrt(u_R[..., 0])
+    weight_L = sqrt_rho_L / (sqrt_rho_L + sqrt_rho_R)
+    weight_R = 1.0 - weight_L
+
+    rho = sqrt_rho_L * sqrt_rho_R
+    v_1 = weight_L * u_L[..., 1] / u_L[..., 0] + weight_R * u_R[..., 1] / u_R[..., 0]
+    v_2 = weight_L * u_L[..., 2] / u_L[..., 0] + weight_R * u_R[..., 2] / u_R[..., 0]
+    H = (
+        weight_L * (u_L[..., 3] + p_L) / u_L[..., 0]
+        + weight_R * (u_R[..., 3] + p_R) / u_R[..., 0]
+    )
+    kinetic = 0.5 * (v_1 * v_1 + v_2 * v_2)
+    a = np.sqrt((gamma - 1) * (H - kinetic))
+    v_n = v_1 * n_x + v_2 * n_y
+
+    # Jumps
+    d_rho = u_R[..., 0] - u_L[..., 0]
+    d_p = p_R - p_L
+    d_v_1 = u_R[..., 1] / u_R[..., 0] - u_L[..., 1] / u_L[..., 0]
+    d_v_2 = u_R[..., 2] / u_R[..., 0] - u_L[..., 2] / u_L[..., 0]
+    d_v_n = v_R_n - v_L_n
+
+    # Eigenvalues with entropy fix on the acoustic waves
+    delta = entropy_fix * a
+    lambda_minus = np.abs(v_n - a)
+    lambda_plus = np.abs(v_n + a)
+    lambda_minus = np.where(
+        lambda_minus < delta, 0.5 * (lambda_minus**2 + delta**2) / delta, lambda_minus
+    )
+    lambda_plus = np.where(
+        lambda_plus < delta, 0.5 * (lambda_plus**2 + delta**2) / delta, lambda_plus
+    )
+    lambda_0 = np.abs(v_n)
+
+    # Wave strengths times eigenvalues
+    alpha_minus = lambda_minus * (d_p - rho * a * d_v_n) / (2.0 * a * a)
+    alpha_plus = lambda_plus * (d_p + rho * a * d_v_n) / (2.0 * a * a)
+    alpha_entropy = lambda_0 * (d_rho - d_p / (a * a))
+    alpha_shear = lambda_0 * rho
+
+    dissipation = np.empty(np.broadcast_shapes(u_L.shape, u_R.shape))
+    dissipation[..., 0] = alpha_minus + alpha_entropy + alpha_plus
+    dissipation[..., 1] = (
+        alpha_minus * (v_1 - a * n_x)
+        + alpha_entropy * v_1
+        + alpha_shear * (d_v_1 - d_v_n * n_x)
+        + alpha_plus * (v_1 + a * n_x)
+    )
+    dissipation[..., 2] = (
+        alpha_minus * (v_2 - a * n_y)
+        + alpha_entropy * v_2
+        + alpha_shear * (d_v_2 - d_v_n * n_y)
+        + alpha_plus * (v_2 + a * n_y)
+    )
+    dissipation[..., 3] = (
+        alpha_minus * (H - a * v_n)
+        + alpha_entropy * kinetic
+        + alpha_shear * (v_1 * d_v_1 + v_2 * d_v_2 - v_n * d_v_n)
+        + alpha_plus * (H + a * v_n)
+    )
+
+    return 0.5 * (f_L + f_R - dissipation)
+
+
+def HLLC_flux_batch(u_L: np.array, u_R: np.array, normals: np.array) -> np.array:
+    """HLLC flux for many faces at once. The HLL fan is split by the contact
+    wave, so contact and shear waves are resolved. Wave speed estimates of
+    Davis. Arguments as in AUSM_flux_batch.
+    """
+    n_x = normals[..., 0]
+    n_y = normals[..., 1]
+
+    p_L, a_L, v_L_n, f_L = _normal_flux_batch(u_L, normals)
+    p_R, a_R, v_R_n, f_R = _normal_flux_batch(u_R, normals)
+    rho_L = u_L[..., 0]
+    rho_R = u_R[..., 0]
+
+    s_L = np.minimum(v_L_n - a_L, v_R_n - a_R)
+    s_R = np.maximum(v_L_n + a_L, v_R_n + a_R)
+
+    # Contact wave speed
+    mass_L = rho_L * (s_L - v_L_n)
+    mass_R = rho_R * (s_R - v_R_n)
+    s_M = (p_R - p_L + mass_L * v_L_n - mass_R * v_R_n) / (mass_L - mass_R)
+
+    def star_flux(u, p, v_n, f, s, mass):
+        """Flux F + s (U* - U) of the star region next to wave speed s"""
+        scale = mass / (s - s_M)
+        u_star = np.empty_like(f)
+        u_star[..., 0] = scale
+        u_star[..., 1] = scale * (u[..., 1] / u[..., 0] + (s_M - v_n) * n_x)
+        u_star[..., 2] = scale * (u[..., 2] / u[..., 0] + (s_M - v_n) * n_y)
+        u_star[..., 3] = scale * (
+            u[..., 3] / u[..., 0] + (s_M - v_n) * (s_M + p / mass)
+        )
+        return f + s[..., np.newaxis] * (u_star - u)
+
+    # Avoid division by zero of star states which are not used
+    with np.errstate(divide="ignore", invalid="ignore"):
+        flux = np.where(
+            (s_M >= 0.0)[..., np.newaxis],
+            star_flux(u_L, p_L, v_L_n, f_L, s_L, mass_L),
+            star_flux(u_R, p_R, v_R_n, f_R, s_R, mass_R),
+        )
+    flux = np.where((s_L >= 0.0)[..., np.newaxis], f_L, flux)
+    return np.where((s_R <= 0.0)[..., np.newaxis], f_R, flux)
+
+
+# Batched flux schemes by name
+FLUX_SCHEMES = {
+    "ausm": AUSM_flux_batch,
+    "rusanov": Rusanov_flux_batch,
+    "roe": Roe_flux_batch,
+    "hllc": HLLC_flux_batch,
+}
+
+
+def get_flux_scheme(name: str):
+    """Batched flux function flux(u_L, u_R, normals) of scheme 'ausm',
+    'rusanov', 'roe' or 'hllc'
+    """
+    if name not in FLUX_SCHEMES:
+        raise ValueError(f"Unknown flux scheme '{name}'")
+    return FLUX_SCHEMES[name]
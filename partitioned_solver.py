@@ -0,0 +1,187 @@
+import multiprocessing
+import sys
+import time
+import numpy as np
+from domain_decomposition import (
+    Subdomain,
+    build_subdomains,
+    recursive_coordinate_bisection,
+)
+from gmsh_writer import GmshWriter
+from kernels import make_kernels
+from mesh import Mesh
+from mesh_cache import load_mesh
+from solver import make_initial_solution
+
+
+def exchange_halos(subdomain: Subdomain, U: np.array, connections: dict):
+    """Send values of owned cells to neighbors and receive ghost cell values.
+    Every pair of neighbors talks in increasing order of neighbor index, the
+    lower index sending first, so blocking sends can not deadlock.
+    connections ... pipe connection to every neighbor part
+    """
+    for neighbor in subdomain.neighbors():
+        connection = connections[neighbor]
+        if subdomain.part < neighbor:
+            connection.send(U[subdomain.send[neighbor]])
+            U[subdomain.recv[neighbor]] = connection.recv()
+        else:
+            U[subdomain.recv[neighbor]] = connection.recv()
+            connection.send(U[subdomain.send[neighbor]])
+
+
+def _run_subdomain(
+    subdomain: Subdomain,
+    U: np.array,
+    connections: dict,
+    driver,
+    backend: str,
+    boundary_conditions: dict,
+):
+    """Time loop of one subdomain. The local time step is reported to the
+    driver, which answers with the global time step, or None at the end.
+    Finally, the values of owned cells are sent to the driver.
+    """
+    mesh = subdomain.mesh
+    kernels = make_kernels(
+        mesh.edges(), mesh.geometry(), backend, boundary_conditions=boundary_conditions
+    )
+    owned = slice(0, subdomain.num_owned)
+
+    try:
+        while True:
+            exchange_halos(subdomain, U, connections)
+
+            Res = kernels.residual(U)
+            driver.send(np.min(kernels.time_step(U)[owned]))
+
+            dt = driver.recv()
+            if dt is None:
+                break
+            kernels.update(U, Res, dt)
+    finally:
+        kernels.close()
+
+    driver.send(U[owned])
+
+
+def run_partitioned_solver(
+    mesh: Mesh,
+    num_parts: int,
+    backend: str = "numpy",
+    boundary_conditions: dict = None,
+):
+    """Run the solver on num_parts subdomains, each in its own process.
+    Cells are partitioned by recursive coordinate bisection of centroids.
+    Subdomains exchange ghost cell values over pipes every step, the global
+    time step is the minimum over all subdomains. Returns the solution of
+    the whole mesh.
+    boundary_conditions ... boundary conditions by face group name, see
+                            boundary_conditions.BoundaryConditions
+    """
+    num_cells = mesh.cells().dof_ids.shape[0]
+    print(f"Solver: number of cells = {num_cells}, number of parts = {num_parts}")
+
+    geometry = mesh.geometry()
+    parts = recursive_coordinate_bisection(geometry.cell_centroids, num_parts)
+    subdomains = build_subdomains(mesh, parts)
+
+    U = make_initial_solution(geometry.cell_centroids)
+
+    context = multiprocessing.get_context("spawn")
+
+    neighbor_connections = [{} for _ in subdomains]
+    for subdomain in subdomains:
+        for neighbor in subdomain.neighbors():
+            if subdomain.part < neighbor:
+                end_a, end_b = context.Pipe()
+                neighbor_connections[subdomain.part][neighbor] = end_a
+                neighbor_connections[neighbor][subdomain.part] = end_b
+
+    driver_connections = []
+    worker_connections = []
+    processes = []
+    for subdomain in subdomains:
+        driver_end, worker_end = context.Pipe()
+        driver_connections.append(driver_end)
+        worker_connections.append(worker_end)
+        processes.append(
+            context.Process(
+                target=_run_subdomain,
+                args=(
+                    subdomain,
+                    U[subdomain.cells],
+                    neighbor_connections[subdomain.part],
+                    worker_end,
+                    backend,
+                    boundary_conditions,
+                ),
+            )
+        )
+
+    simulation_time = 0.0
+    max_time = 0.3
+    CFL = 0.7
+    iter = 0
+
+    start_time = time.time()
+    for process in processes:
+        process.start()
+
+    # Connections used by the workers only; closing them here lets the
+    # driver see EOFError instead of blocking if a worker dies
+    for connections in neighbor_connections:
+        for connection in connections.values():
+            connection.close()
+    for connection in worker_connections:
+        connection.close()
+
+    try:
+        while True:
+            # Global time step: minimum over all subdomains
+            dt = CFL * min(connection.recv() for connection in driver_connections)
+
+            if simulation_time >= max_time:
+                dt = None
+            elif simulation_time + dt > max_time:
+                dt = max_time - simulation_time + 1.0e-6
+
+            for connection in driver_connections:
+                connection.send(dt)
+            if dt is None:
+                break
+
+            simulation_time = simulation_time + dt
+            print(f"Iter = {iter}, time = {simulation_time:.5f}")
+            iter = iter + 1
+
+        # Gather owned cells
+        for subdomain, connection in zip(subdomains, driver_connections):
+            U[subdomain.cells[: subdomain.num_owned]] = connection.recv()
+    except BaseException:
+        for process in processes:
+            process.terminate()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+
+    end_time = time.time()
+    print(f"Computation took {end_time - start_time} seconds")
+
+    return U
+
+
+if __name__ == "__main__":
+    mesh_name = "riemann_square.msh"
+    num_parts = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+
+    mesh = load_mesh(mesh_name)
+    nodes = mesh.node_coordinates()
+
+    U = run_partitioned_solver(mesh, num_parts)
+
+    gmsh_writer = GmshWriter()
+    gmsh_writer.write("riemann_output.msh", nodes, [mesh.cells()])
+
+    gmsh_writer.write_field("riemann_output.msh", U)
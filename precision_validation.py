@@ -0,0 +1,76 @@
+import time
+import numpy as np
+from mesh import Mesh
+from mesh_cache import load_mesh
+from mesh_reordering import reorder_mesh
+from monitor import VARIABLES, conserved_totals
+from simulation import Simulation
+from solver import make_initial_solution
+
+
+def compare_precision(
+    mesh: Mesh,
+    precision: str = "float32",
+    max_time: float = 0.3,
+    initial_solution: np.array = None,
+    **options,
+) -> dict:
+    """Run the same case in float64 and in given precision and compare the
+    solutions at max_time. Returns a dict of
+    'l1_difference' ... volume-weighted L1 norm of the difference of every
+                        variable relative to the L1 norm of the float64 one
+    'max_difference' ... maximum difference of every variable relative to the
+                         maximum absolute float64 value
+    'totals_difference' ... difference of conserved totals relative to the
+                            float64 ones (zero where those are zero)
+    'wall_time' ... seconds spent in time steps by precision
+    initial_solution ... defaults to the initial state of the Riemann problem
+    options ... further options of simulation.Simulation
+    """
+    geometry = mesh.geometry()
+    if initial_solution is None:
+        initial_solution = make_initial_solution(geometry.cell_centroids)
+
+    solutions = {}
+    wall_time = {}
+    for case_precision in ("float64", precision):
+        with Simulation(
+            mesh, initial_solution, precision=case_precision, **options
+        ) as simulation:
+            start = time.perf_counter()
+            simulation.run(until=max_time)
+            wall_time[case_precision] = time.perf_counter() - start
+            solutions[case_precision] = simulation.U.astype(np.float64)
+
+    reference = solutions["float64"]
+    difference = solutions[precision] - reference
+    volumes = geometry.cell_volumes
+
+    reference_totals = conserved_totals(reference, volumes)
+    totals = conserved_totals(solutions[precision], volumes)
+    totals_scale = np.where(reference_totals != 0.0, np.abs(reference_totals), 1.0)
+
+    return {
+        "l1_difference": (volumes @ np.abs(difference)) / (volumes @ np.abs(reference)),
+        "max_difference": np.max(np.abs(difference), axis=0)
+        / np.max(np.abs(reference), axis=0),
+        "totals_difference": (totals - reference_totals) / totals_scale,
+        "wall_time": wall_time,
+    }
+
+
+if __name__ == "__main__":
+    # Riemann problem on the square, as in solver.py
+    mesh, _ = reorder_mesh(load_mesh("riemann_square.msh"))
+    num_cells = mesh.geometry().cell_volumes.shape[0]
+    report = compare_precision(mesh, "float32")
+
+    print(f"float32 against float64, Riemann square, {num_cells} cells, t = 0.3")
+    for i, name in enumerate(VARIABLES):
+        print(
+            f"{name:>8}: L1 {report['l1_difference'][i]:.3e}, "
+            f"max {report['max_difference'][i]:.3e}, "
+            f"total {report['totals_difference'][i]:.3e}"
+        )
+    for precision, seconds in report["wall_time"].items():
+        print(f"{precision}: {seconds:.2f} s")
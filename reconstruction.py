@@ -0,0 +1,175 @@
+import numpy as np
+import scipy.sparse
+from mesh_algorithm import FaceTable
+from mesh_geometry import MeshGeometry
+
+LIMITERS = ("barth-jespersen", "venkatakrishnan")
+
+
+def least_squares_gradient_operators(
+    faces: FaceTable, geometry: MeshGeometry
+) -> tuple[scipy.sparse.csr_matrix, scipy.sparse.csr_matrix]:
+    """Sparse operators (G_x, G_y) of shape (num_cells, num_cells) such that
+    G_x @ U, G_y @ U are the weighted least-squares gradients of cell values U.
+    Neighbors are the cells across interior faces, weighted by inverse squared
+    distance of centroids. Boundary faces add a ghost cell mirrored at the face
+    midpoint with the value of the interior cell, as the outflow boundary
+    condition does; it only contributes to the least-squares matrix.
+    """
+    num_cells = geometry.cell_volumes.shape[0]
+    centroids = geometry.cell_centroids
+
+    interior = faces.interior_slice()
+    boundary = faces.boundary_slice()
+    idx_L = faces.left_cell[interior]
+    idx_R = faces.right_cell[interior]
+
+    # Each interior face couples both cells, in both directions
+    rows = np.concatenate([idx_L, idx_R])
+    cols = np.concatenate([idx_R, idx_L])
+    d = centroids[cols] - centroids[rows]
+    w = 1.0 / np.einsum("ij,ij->i", d, d)
+
+    idx_B = faces.left_cell[boundary]
+    d_B = 2.0 * (geometry.face_midpoints[boundary] - centroids[idx_B])
+    w_B = 1.0 / np.einsum("ij,ij->i", d_B, d_B)
+
+    # Least-squares matrices M_i = sum_j w_ij d_ij d_ij^T of all cells
+    M = np.zeros((num_cells, 2, 2))
+    for i in range(2):
+        for j in range(2):
+            M[:, i, j] = np.bincount(
+                rows, weights=w * d[:, i] * d[:, j], minlength=num_cells
+            ) + np.bincount(
+                idx_B, weights=w_B * d_B[:, i] * d_B[:, j], minlength=num_cells
+            )
+    M_inv = np.linalg.inv(M)
+
+    # grad_i = M_i^-1 sum_j w_ij d_ij (U_j - U_i)
+    coefficients = np.einsum("fij,fj->fi", M_inv[rows], w[:, np.newaxis] * d)
+
+    operators = []
+    for axis in range(2):
+        data = np.concatenate([coefficients[:, axis], -coefficients[:, axis]])
+        operators.append(
+            scipy.sparse.csr_matrix(
+                (data, (np.concatenate([rows, rows]), np.concatenate([cols, rows]))),
+                shape=(num_cells, num_cells),
+            )
+        )
+    return operators[0], operators[1]
+
+
+class MUSCLReconstruction:
+    """Piecewise linear reconstruction of cell states to face midpoints.
+    Least-squares gradients are limited per cell and variable so that the
+    reconstructed values stay within the range of the cell and its neighbors
+    (Barth-Jespersen), or nearly so with smooth switching (Venkatakrishnan).
+    Face states with non-positive density or pressure fall back to the cell
+    average.
+    """
+
+    def __init__(
+        self,
+        faces: FaceTable,
+        geometry: MeshGeometry,
+        limiter: str = "barth-jespersen",
+        venkatakrishnan_K: float = 5.0,
+    ):
+        if limiter not in LIMITERS:
+            raise ValueError(f"Unknown limiter '{limiter}'")
+        self.limiter = limiter
+
+        num_cells = geometry.cell_volumes.shape[0]
+        self.__gradient_x, self.__gradient_y = least_squares_gradient_operators(
+            faces, geometry
+        )
+
+        # Face sides: left cells of all faces, then right cells of interior faces
+        interior = faces.interior_slice()
+        self.__num_faces = faces.num_faces()
+        side_cells = np.concatenate([faces.left_cell, faces.right_cell[interior]])
+        side_midpoints = np.concatenate(
+            [geometry.face_midpoints, geometry.face_midpoints[interior]]
+        )
+        self.__side_cells = side_cells
+        self.__side_offsets = side_midpoints - geometry.cell_centroids[side_cells]
+
+        # Sides and neighbors grouped by cell for reductions with reduceat
+        self.__side_order = np.argsort(side_cells, kind="stable")
+        self.__side_starts = np.searchsorted(
+            side_cells[self.__side_order], np.arange(num_cells)
+        )
+
+        idx_L = faces.left_cell[interior]
+        idx_R = faces.right_cell[interior]
+        # Each cell is its own neighbor, so every cell has one at least
+        cells = np.arange(num_cells)
+        pair_cells = np.concatenate([cells, idx_L, idx_R])
+        pair_neighbors = np.concatenate([cells, idx_R, idx_L])
+        order = np.argsort(pair_cells, kind="stable")
+        self.__neighbors = pair_neighbors[order]
+        self.__neighbor_starts = np.searchsorted(pair_cells[order], cells)
+
+        # Venkatakrishnan threshold (K h)^3 with h from cell volume
+        self.__eps2 = (venkatakrishnan_K * np.sqrt(geometry.cell_volumes)) ** 3
+
+    def gradients(self, U: np.array) -> tuple[np.array, np.array]:
+        """Unlimited least-squares gradients (dU/dx, dU/dy), each (num_cells, 4)"""
+        return self.__gradient_x @ U, self.__gradient_y @ U
+
+    def limiter_values(self, U: np.array, side_deltas: np.array) -> np.array:
+        """Limiter of every cell and variable, shape (num_cells, 4).
+        side_deltas ... unlimited change from cell centroid to face midpoint
+                        of every face side
+        """
+        neighbor_values = U[self.__neighbors]
+        U_max = np.maximum.reduceat(neighbor_values, self.__neighbor_starts)
+        U_min = np.minimum.reduceat(neighbor_values, self.__neighbor_starts)
+
+        side_cells = self.__side_cells
+        delta_2 = side_deltas
+        delta_1 = np.where(delta_2 > 0.0, U_max[side_cells], U_min[side_cells])
+        delta_1 -= U[side_cells]
+
+        if self.limiter == "barth-jespersen":
+            ratio = np.divide(
+                delta_1, delta_2, out=np.ones_like(delta_2), where=delta_2 != 0.0
+            )
+            side_limiter = np.minimum(1.0, ratio)
+        else:
+            eps2 = self.__eps2[side_cells, np.newaxis]
+            side_limiter = (delta_1 * delta_1 + eps2 + 2.0 * delta_2 * delta_1) / (
+                delta_1 * delta_1 + 2.0 * delta_2 * delta_2 + delta_1 * delta_2 + eps2
+            )
+            side_limiter[delta_2 == 0.0] = 1.0
+
+        return np.minimum.reduceat(side_limiter[self.__side_order], self.__side_starts)
+
+    def face_states(self, U: np.array) -> tuple[np.array, np.array]:
+        """Reconstructed states at face midpoints.
+        Returns (left states of all faces, right states of interior faces).
+        """
+        grad_x, grad_y = self.gradients(U)
+        side_cells = self.__side_cells
+        offsets = self.__side_offsets
+
+        side_deltas = (
+            grad_x[side_cells] * offsets[:, 0:1] + grad_y[side_cells] * offsets[:, 1:2]
+        )
+        limiter = self.limiter_values(U, side_deltas)
+
+        side_states = U[side_cells] + limiter[side_cells] * side_deltas
+
+        # Keep density and pressure positive
+        gamma = 1.4
+        rho = side_states[:, 0]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            p = (gamma - 1) * (
+                side_states[:, 3]
+                - 0.5 * (side_states[:, 1] ** 2 + side_states[:, 2] ** 2) / rho
+            )
+        invalid = (rho <= 0.0) | (p <= 0.0)
+        side_states[invalid] = U[side_cells[invalid]]
+
+        return side_states[: self.__num_faces], side_states[self.__num_faces :]
@@ -0,0 +1,124 @@
+import numpy as np
+import scipy.sparse
+from mesh_algorithm import FaceTable
+
+
+def face_cell_incidence(
+    faces: FaceTable, num_cells: int, face_weights: np.array = None
+) -> scipy.sparse.csr_matrix:
+    """Signed face-to-cell incidence matrix B of shape (num_cells, num_faces).
+    Column f has +w_f in the row of the left cell of face f and -w_f in the row
+    of the right cell (if the face has one). With face lengths as weights,
+    the residual of all cells is the product B @ flux, where flux holds the
+    numerical flux through every face, shape (num_faces, 4).
+    face_weights ... weight of every face, defaults to 1
+    """
+    num_faces = faces.num_faces()
+    if face_weights is None:
+        face_weights = np.ones(num_faces)
+
+    has_R = faces.right_cell > -1
+    face_ids = np.arange(num_faces)
+
+    rows = np.concatenate([faces.left_cell, faces.right_cell[has_R]])
+    cols = np.concatenate([face_ids, face_ids[has_R]])
+    data = np.concatenate([face_weights, -face_weights[has_R]])
+
+    return scipy.sparse.csr_matrix((data, (rows, cols)), shape=(num_cells, num_faces))
+
+
+def _csr_products():
+    """CSR product kernels csr_matvec and csr_matvecs of scipy.sparse, which
+    accumulate into a given output, or None. They are private API of SciPy
+    (checked with SciPy 1.17), so they are only used if they import and
+    compute a small product correctly.
+    """
+    try:
+        from scipy.sparse._sparsetools import csr_matvec, csr_matvecs
+
+        matrix = scipy.sparse.csr_matrix([[1.0, 0.0, 2.0], [0.0, 3.0, 4.0]])
+        x = np.arange(6.0).reshape(3, 2)
+        out = np.zeros(2)
+        csr_matvec(
+            2, 3, matrix.indptr, matrix.indices, matrix.data, x[:, 1].copy(), out
+        )
+        outs = np.zeros((2, 2))
+        csr_matvecs(
+            2, 3, 2, matrix.indptr, matrix.indices, matrix.data, x.ravel(), outs.ravel()
+        )
+    except Exception:
+        return None
+    if np.array_equal(out, matrix @ x[:, 1]) and np.array_equal(outs, matrix @ x):
+        return csr_matvec, csr_matvecs
+    return None
+
+
+_CSR_PRODUCTS = _csr_products()
+
+
+def sparse_matmul(
+    matrix: scipy.sparse.csr_matrix, x: np.array, out: np.array
+) -> np.array:
+    """out = matrix @ x for x of shape (n,) or (n, k), written into out
+    without temporaries. out has to be C-contiguous, of the dtype of matrix.
+    Without the CSR kernels of SciPy, the product is computed with the public
+    API and copied into out.
+    """
+    assert out.flags.c_contiguous and out.dtype == matrix.dtype
+    if _CSR_PRODUCTS is None:
+        out[...] = matrix @ x
+        return out
+
+    csr_matvec, csr_matvecs = _CSR_PRODUCTS
+    num_rows, num_cols = matrix.shape
+    # The CSR product kernels of scipy.sparse accumulate into their output
+    out.fill(0.0)
+    x = np.ascontiguousarray(x, dtype=matrix.dtype)
+    if x.ndim == 1:
+        csr_matvec(
+            num_rows, num_cols, matrix.indptr, matrix.indices, matrix.data, x, out
+        )
+    else:
+        csr_matvecs(
+            num_rows,
+            num_cols,
+            x.shape[1],
+            matrix.indptr,
+            matrix.indices,
+            matrix.data,
+            x.reshape(-1),
+            out.reshape(-1),
+        )
+    return out
+
+
+def assemble_residual(
+    incidence: scipy.sparse.csr_matrix, flux: np.array, out: np.array = None
+) -> np.array:
+    """Sum the face fluxes into cell residuals, Res = B @ flux.
+    incidence ... weighted incidence matrix from face_cell_incidence
+    flux ... numerical flux through every face, shape (num_faces, num_vars),
+             or (num_members, num_faces, num_vars) for an ensemble
+    out ... residual array to write into; single solutions are assembled
+            without temporaries if out is C-contiguous of the dtype of
+            incidence
+    """
+    assert incidence.shape[1] == flux.shape[-2]
+    if flux.ndim == 2:
+        if out is not None and out.flags.c_contiguous and out.dtype == incidence.dtype:
+            return sparse_matmul(incidence, flux, out)
+        Res = incidence @ flux
+        if out is None:
+            return Res
+        out[:] = Res
+        return out
+
+    # Ensemble: one product with the fluxes of all members side by side
+    num_members, num_faces, num_vars = flux.shape
+    face_major = flux.transpose(1, 0, 2).reshape(num_faces, num_members * num_vars)
+    Res = incidence @ face_major
+    Res = Res.reshape(-1, num_members, num_vars).transpose(1, 0, 2)
+    if out is None:
+        return Res
+    out[:] = Res
+    return out
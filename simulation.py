@@ -0,0 +1,354 @@
+import time
+from contextlib import contextmanager
+import numpy as np
+from kernels import make_kernels
+from mesh import Mesh
+from time_integrators import make_time_integrator
+
+# Floating point types of solution, fluxes and residuals by precision name
+PRECISIONS = {"float64": np.float64, "float32": np.float32}
+
+
+class PhaseTimers:
+    """Accumulated wall time (time.perf_counter) and number of calls of named
+    phases. Phases may be nested, the time of a nested phase is also part of
+    the enclosing one.
+    """
+
+    def __init__(self):
+        self.total = {}
+        self.calls = {}
+
+    @contextmanager
+    def measure(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.total[phase] = self.total.get(phase, 0.0) + elapsed
+            self.calls[phase] = self.calls.get(phase, 0) + 1
+
+    def reset(self):
+        self.total.clear()
+        self.calls.clear()
+
+    def summary(self, phases: list[str] = None, wall_time: float = None) -> str:
+        """Table of total time, calls, time per call and share of wall_time
+        (default: sum of the listed phases) of given phases (default: all)
+        """
+        phases = list(self.total) if phases is None else phases
+        phases = [phase for phase in phases if phase in self.total]
+        if wall_time is None:
+            wall_time = sum(self.total[phase] for phase in phases)
+
+        lines = [f"{'phase':>16} {'total [s]':>10} {'calls':>8} {'per call [ms]':>14}"]
+        for phase in phases:
+            total = self.total[phase]
+            calls = self.calls[phase]
+            share = 100.0 * total / wall_time if wall_time > 0.0 else 0.0
+            lines.append(
+                f"{phase:>16} {total:10.4f} {calls:8d} {1e3 * total / calls:14.4f}"
+                f" {share:5.1f} %"
+            )
+        return "\n".join(lines)
+
+
+class TimedKernels:
+    """Kernels of any backend with wall time measured per phase. The residual
+    is composed from the reconstruction, flux and assembly kernels of the
+    backend, so each of them is timed on its own; backends which only
+    provide the whole residual (process pool) are timed as 'residual'.
+    Other attributes are those of the wrapped kernels.
+    """
+
+    def __init__(self, kernels, timers: PhaseTimers):
+        self.kernels = kernels
+        self.timers = timers
+
+    def __getattr__(self, name: str):
+        return getattr(self.kernels, name)
+
+    def residual(self, U: np.array, out: np.array = None) -> np.array:
+        kernels = self.kernels
+        measure = self.timers.measure
+        if not hasattr(kernels, "interior_fluxes"):
+            with measure("residual"):
+                return kernels.residual(U, out)
+
+        flux = kernels.workspace.get(
+            "flux",
+            U.shape[:-2] + (kernels.faces.num_faces(), U.shape[-1]),
+            kernels.dtype,
+        )
+        # Face states are shared by interior and boundary fluxes
+        face_states = ()
+        if hasattr(kernels, "face_states"):
+            with measure("reconstruction"):
+                face_states = (kernels.face_states(U),)
+
+        with measure("interior flux"):
+            kernels.interior_fluxes(U, flux, *face_states)
+        with measure("boundary flux"):
+            kernels.boundary_fluxes(U, flux, *face_states)
+
+        Res = np.empty_like(U) if out is None else out
+        with measure("assembly"):
+            kernels.assemble_residual(flux, Res)
+        return Res
+
+    def time_step(self, U: np.array, out: np.array = None) -> np.array:
+        with self.timers.measure("time step"):
+            return self.kernels.time_step(U, out)
+
+    def update(self, U: np.array, Res: np.array, dt):
+        with self.timers.measure("update"):
+            self.kernels.update(U, Res, dt)
+
+
+class Simulation:
+    """Solver on a prepared mesh which is advanced step by step.
+    Geometry, kernels and time integrator are set up once; reset() starts a
+    new case on the same mesh. Unsteady runs advance with a global time step
+    (per member or shared by an ensemble, see ensemble_dt), steady runs with
+    local time steps and optional CFL ramping up to max_CFL. Wall time is
+    recorded per phase in timers.
+    precision ... 'float64' or 'float32', the floating point type of
+                  solution, fluxes and residuals. Geometry is computed in
+                  float64, simulation time and residual drop are float64.
+    Time steps are computed into preallocated arrays; with kernels writing
+    into given arrays, steps of single solutions allocate no arrays larger
+    than a block of faces.
+    Options as in solver.run_solver.
+    """
+
+    # Phases timed in TimedKernels, disjoint
+    KERNEL_PHASES = (
+        "reconstruction",
+        "interior flux",
+        "boundary flux",
+        "assembly",
+        "residual",
+        "time step",
+        "update",
+    )
+    # Phases of the summary in order, 'integrator' is the part of the time
+    # integrator steps not spent in kernels
+    PHASES = KERNEL_PHASES + ("integrator", "I/O")
+
+    def __init__(
+        self,
+        mesh: Mesh,
+        initial_solution: np.array,
+        backend: str = "auto",
+        num_workers: int = None,
+        integrator: str = "euler",
+        CFL: float = 0.7,
+        steady: bool = False,
+        max_CFL: float = None,
+        reconstruction: str = "first-order",
+        limiter: str = "barth-jespersen",
+        flux_scheme: str = "ausm",
+        boundary_conditions: dict = None,
+        ensemble_dt: str = "shared",
+        precision: str = "float64",
+    ):
+        if ensemble_dt not in ("shared", "member"):
+            raise ValueError(f"Unknown ensemble time step '{ensemble_dt}'")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}'")
+        self.precision = precision
+        self.dtype = np.dtype(PRECISIONS[precision])
+
+        self.mesh = mesh
+        self.faces = mesh.edges()
+        self.geometry = mesh.geometry()
+        self.CFL = CFL
+        self.steady = steady
+        self.max_CFL = max_CFL
+        self.ensemble_dt = ensemble_dt
+
+        U = np.array(initial_solution, dtype=self.dtype)
+        self.ensemble = U.ndim == 3
+
+        self.timers = PhaseTimers()
+        kernels = make_kernels(
+            self.faces,
+            self.geometry,
+            backend,
+            num_workers,
+            reconstruction,
+            limiter,
+            flux_scheme,
+            boundary_conditions,
+            self.ensemble,
+            self.dtype,
+        )
+        self.kernels = TimedKernels(kernels, self.timers)
+        self.time_integrator = make_time_integrator(integrator, U.shape, self.dtype)
+
+        self.__callbacks = []
+        self.reset(U)
+
+    def reset(self, initial_solution: np.array):
+        """Start a new case from initial_solution, of the same shape as before"""
+        U = np.array(initial_solution, dtype=self.dtype)
+        assert U.shape == self.time_integrator.residual.shape
+        self.U = U
+        self.__dt_local = np.empty(U.shape[:-1], self.dtype)
+        self.__dt = np.empty(U.shape[:-1], self.dtype)
+        # No residual before the first step
+        self.time_integrator.residual.fill(np.nan)
+
+        # Per-member time steps need a simulation time per member
+        self.__member_dt = self.ensemble and self.ensemble_dt == "member"
+        self.time = np.zeros(U.shape[0]) if self.__member_dt else 0.0
+        self.iteration = 0
+        self.current_CFL = self.CFL
+        self.initial_residual_norm = None
+        self.orders_dropped = 0.0
+        self.timers.reset()
+
+    def add_callback(self, callback, interval: int = 1):
+        """Call callback(simulation) after every interval-th step. Time spent
+        in callbacks is recorded as phase 'I/O'.
+        """
+        self.__callbacks.append((callback, interval))
+
+    def residual(self) -> np.array:
+        """Residual of the state at the beginning of the last step, NaN
+        before the first step
+        """
+        return self.time_integrator.residual
+
+    def residual_norm(self) -> np.array:
+        """L2 norm over cells of every variable of the last residual, shape
+        (4,), or (num_members, 4) for an ensemble. NaN before the first step.
+        """
+        return np.linalg.norm(self.time_integrator.residual, axis=-2)
+
+    def step(self, n: int = 1, until: float = np.inf):
+        """Advance n steps (iterations of steady runs). Unsteady steps end at
+        time until, further steps do nothing.
+        """
+        for _ in range(n):
+            dt = self.__time_step(until)
+            if dt is None:
+                return
+
+            kernel_time = self.__kernel_time()
+            start = time.perf_counter()
+            self.time_integrator.step(self.kernels, self.U, dt)
+            # Time integrator overhead: step time not spent in kernels
+            elapsed = time.perf_counter() - start
+            self.timers.total["integrator"] = (
+                self.timers.total.get("integrator", 0.0)
+                + elapsed
+                - (self.__kernel_time() - kernel_time)
+            )
+            self.timers.calls["integrator"] = self.timers.calls.get("integrator", 0) + 1
+
+            self.iteration += 1
+            if self.steady:
+                self.__update_convergence()
+            else:
+                self.time = self.time + dt
+
+            for callback, interval in self.__callbacks:
+                if self.iteration % interval == 0:
+                    with self.timers.measure("I/O"):
+                        callback(self)
+
+    def run(
+        self, until: float = None, residual_drop: float = None, max_iter: int = None
+    ) -> bool:
+        """Advance unsteady runs up to time until, steady runs until the
+        density residual norm has dropped by residual_drop orders of
+        magnitude. Stops after max_iter iterations in total.
+        Returns True if the goal was reached.
+        """
+        if self.steady:
+            assert residual_drop is not None
+            goal_reached = lambda: self.orders_dropped >= residual_drop
+        else:
+            assert until is not None
+            goal_reached = lambda: np.all(self.time >= until)
+
+        while not goal_reached():
+            if max_iter is not None and self.iteration >= max_iter:
+                return False
+            self.step(1, until=np.inf if until is None else until)
+        return True
+
+    def summary(self) -> str:
+        """Report of time per phase"""
+        num_cells = self.geometry.cell_volumes.shape[0]
+        num_members = self.U.shape[0] if self.ensemble else 1
+        wall_time = sum(self.timers.total.get(phase, 0.0) for phase in self.PHASES)
+        lines = [self.timers.summary(self.PHASES, wall_time)]
+        if wall_time > 0.0:
+            lines.append(
+                f"{self.iteration} iterations, "
+                f"{self.iteration * num_cells * num_members / wall_time:.4g} "
+                "cell updates per second"
+            )
+        return "\n".join(lines)
+
+    def close(self):
+        """Release resources of the kernels (worker processes, shared memory)"""
+        self.kernels.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __kernel_time(self) -> float:
+        return sum(self.timers.total.get(phase, 0.0) for phase in self.KERNEL_PHASES)
+
+    def __time_step(self, until: float):
+        """Time step of the next step: local time steps of steady runs, the
+        global time step otherwise, None if an unsteady run reached until
+        """
+        dt_local = self.kernels.time_step(self.U, out=self.__dt_local)
+        if self.steady:
+            # Local time stepping: no time accuracy is needed
+            return np.multiply(dt_local, self.current_CFL, out=self.__dt)
+
+        if self.__member_dt:
+            if np.all(self.time >= until):
+                return None
+            dt = self.CFL * np.min(dt_local, axis=1)
+            dt = np.where(self.time + dt > until, until - self.time + 1.0e-6, dt)
+            # Members which reached the final time stay there
+            dt[self.time >= until] = 0.0
+            return dt
+
+        if self.time >= until:
+            return None
+        # Simulation time is summed in float64 whatever the precision
+        dt = float(self.CFL * np.min(dt_local))
+        if self.time + dt > until:
+            dt = until - self.time + 1.0e-6
+        return dt
+
+    def __update_convergence(self):
+        """Residual drop and CFL number of steady runs after a step"""
+        density = self.time_integrator.residual[..., 0]
+        density_norm = np.sqrt(
+            np.einsum("...i,...i->...", density, density, dtype=np.float64)
+        )
+        if self.initial_residual_norm is None:
+            self.initial_residual_norm = density_norm
+        # A zero residual, e.g. of a uniform flow, counts as converged.
+        # The slowest member decides about convergence.
+        with np.errstate(divide="ignore", invalid="ignore"):
+            orders_dropped = np.log10(self.initial_residual_norm / density_norm)
+        zero_residual = (self.initial_residual_norm == 0.0) | (density_norm == 0.0)
+        self.orders_dropped = np.min(np.where(zero_residual, np.inf, orders_dropped))
+
+        if self.max_CFL is not None:
+            self.current_CFL = min(
+                self.max_CFL, self.CFL * 10.0 ** max(self.orders_dropped, 0.0)
+            )
@@ -0,0 +1,221 @@
+import numpy as np
+import scipy.sparse
+import scipy.sparse.linalg
+from flux_jacobian import FluxJacobian
+
+
+class ForwardEuler:
+    """Forward Euler: U = U - dt / |C_i| * Res(U)"""
+
+    name = "euler"
+    num_stages = 1
+
+    def __init__(self, shape: tuple, dtype=np.float64):
+        # Residual of the state at the beginning of the step
+        self.residual = np.empty(shape, dtype=dtype)
+
+    def step(self, kernels, U: np.array, dt):
+        """Advance U by one time step in place, dt is global or per cell"""
+        kernels.residual(U, out=self.residual)
+        kernels.update(U, self.residual, dt)
+
+
+class SSPRK2:
+    """Two-stage strong stability preserving Runge-Kutta method (Heun):
+    U1 = U - dt L(U)
+    U = 1/2 U + 1/2 (U1 - dt L(U1))
+    where L(U) = Res(U) / |C_i|.
+    """
+
+    name = "ssp-rk2"
+    num_stages = 2
+
+    def __init__(self, shape: tuple, dtype=np.float64):
+        self.residual = np.empty(shape, dtype=dtype)
+        self.__stage_residual = np.empty(shape, dtype=dtype)
+        self.__U0 = np.empty(shape, dtype=dtype)
+
+    def step(self, kernels, U: np.array, dt):
+        """Advance U by one time step in place, dt is global or per cell"""
+        U0 = self.__U0
+        np.copyto(U0, U)
+
+        kernels.residual(U, out=self.residual)
+        kernels.update(U, self.residual, dt)
+
+        kernels.residual(U, out=self.__stage_residual)
+        kernels.update(U, self.__stage_residual, dt)
+        np.add(U, U0, out=U)
+        U *= 0.5
+
+
+class SSPRK3:
+    """Three-stage strong stability preserving Runge-Kutta method of Shu and Osher:
+    U1 = U - dt L(U)
+    U2 = 3/4 U + 1/4 (U1 - dt L(U1))
+    U = 1/3 U + 2/3 (U2 - dt L(U2))
+    where L(U) = Res(U) / |C_i|.
+    """
+
+    name = "ssp-rk3"
+    num_stages = 3
+
+    def __init__(self, shape: tuple, dtype=np.float64):
+        self.residual = np.empty(shape, dtype=dtype)
+        self.__stage_residual = np.empty(shape, dtype=dtype)
+        self.__U0 = np.empty(shape, dtype=dtype)
+        self.__scaled_U0 = np.empty(shape, dtype=dtype)
+
+    def step(self, kernels, U: np.array, dt):
+        """Advance U by one time step in place, dt is global or per cell"""
+        U0 = self.__U0
+        scaled_U0 = self.__scaled_U0
+        np.copyto(U0, U)
+
+        kernels.residual(U, out=self.residual)
+        kernels.update(U, self.residual, dt)
+
+        kernels.residual(U, out=self.__stage_residual)
+        kernels.update(U, self.__stage_residual, dt)
+        np.multiply(U0, 0.75, out=scaled_U0)
+        U *= 0.25
+        U += scaled_U0
+
+        kernels.residual(U, out=self.__stage_residual)
+        kernels.update(U, self.__stage_residual, dt)
+        np.multiply(U0, 1.0 / 3.0, out=scaled_U0)
+        U *= 2.0 / 3.0
+        U += scaled_U0
+
+
+class BackwardEuler:
+    """Linearized backward Euler:
+    (|C_i| / dt + dRes/dU) dU = -Res(U),  U = U + dU
+    The Jacobian dRes/dU is assembled from finite-differenced face fluxes. The
+    linear system is solved by GMRES preconditioned with an incomplete LU
+    factorization of the assembled matrix. Not limited by CFL, large (local)
+    time steps drive steady problems to convergence in few iterations.
+    matrix_free ... if True, GMRES uses Jacobian-vector products computed
+                    by differencing the residual of the kernels (Jacobian-free
+                    Newton-Krylov), the assembled matrix is only used for
+                    the preconditioner
+    """
+
+    name = "backward-euler"
+    num_stages = 1
+
+    def __init__(
+        self,
+        shape: tuple,
+        dtype=np.float64,
+        matrix_free: bool = False,
+        linear_rtol: float = 1.0e-3,
+        ilu_drop_tol: float = 1.0e-5,
+        ilu_fill_factor: float = 5.0,
+    ):
+        # Finite differences of the residual need double precision
+        if np.dtype(dtype) != np.float64:
+            raise ValueError("Implicit time integration needs float64 precision")
+        self.residual = np.empty(shape)
+        self.matrix_free = matrix_free
+        self.linear_rtol = linear_rtol
+        self.ilu_drop_tol = ilu_drop_tol
+        self.ilu_fill_factor = ilu_fill_factor
+        self.__jacobian = None
+        # GMRES iterations of the last step
+        self.linear_iterations = 0
+
+    def step(self, kernels, U: np.array, dt):
+        """Advance U by one time step in place, dt is global or per cell"""
+        if U.ndim != 2:
+            raise ValueError("Implicit time integration of ensembles is not supported")
+        if self.__jacobian is None:
+            self.__jacobian = FluxJacobian(
+                kernels.faces,
+                kernels.geometry,
+                kernels.flux_scheme,
+                kernels.boundary_conditions,
+            )
+        jacobian = self.__jacobian
+
+        kernels.residual(U, out=self.residual)
+
+        # System matrix: Jacobian plus |C_i| / dt on the diagonal blocks
+        matrix = jacobian.assemble(U)
+        diagonal_shift = kernels.geometry.cell_volumes / dt
+        for k in range(U.shape[1]):
+            matrix.data[jacobian.diagonal_blocks, k, k] += diagonal_shift
+        matrix = matrix.tocsc()
+
+        ilu = scipy.sparse.linalg.spilu(
+            matrix, drop_tol=self.ilu_drop_tol, fill_factor=self.ilu_fill_factor
+        )
+        preconditioner = scipy.sparse.linalg.LinearOperator(matrix.shape, ilu.solve)
+
+        if self.matrix_free:
+            operator = self.__matrix_free_operator(kernels, U, diagonal_shift)
+        else:
+            operator = matrix
+
+        self.linear_iterations = 0
+
+        def count_iterations(_):
+            self.linear_iterations += 1
+
+        dU, info = scipy.sparse.linalg.gmres(
+            operator,
+            -self.residual.ravel(),
+            rtol=self.linear_rtol,
+            restart=30,
+            maxiter=10,
+            M=preconditioner,
+            callback=count_iterations,
+            callback_type="pr_norm",
+        )
+        if info < 0:
+            raise RuntimeError(f"GMRES failed with error code {info}")
+
+        U += dU.reshape(U.shape)
+
+    def __matrix_free_operator(
+        self, kernels, U: np.array, diagonal_shift: np.array
+    ) -> scipy.sparse.linalg.LinearOperator:
+        """(|C_i| / dt + dRes/dU) v with dRes/dU v by forward differences"""
+        scale = np.sqrt(np.finfo(np.float64).eps) * (1.0 + np.linalg.norm(U))
+        diagonal = np.repeat(diagonal_shift, U.shape[1])
+
+        def matvec(v: np.array) -> np.array:
+            v_norm = np.linalg.norm(v)
+            if v_norm == 0.0:
+                return np.zeros_like(v)
+            eps = scale / v_norm
+            perturbed = kernels.residual(U + eps * v.reshape(U.shape))
+            return diagonal * v + (perturbed - self.residual).ravel() / eps
+
+        size = U.size
+        return scipy.sparse.linalg.LinearOperator((size, size), matvec)
+
+
+class NewtonKrylov(BackwardEuler):
+    """Backward Euler with Jacobian-free Newton-Krylov linear solves"""
+
+    name = "newton-krylov"
+
+    def __init__(self, shape: tuple, dtype=np.float64):
+        super().__init__(shape, dtype, matrix_free=True)
+
+
+TIME_INTEGRATORS = {
+    integrator.name: integrator
+    for integrator in (ForwardEuler, SSPRK2, SSPRK3, BackwardEuler, NewtonKrylov)
+}
+
+
+def make_time_integrator(name: str, shape: tuple, dtype=np.float64):
+    """Create time integrator 'euler', 'ssp-rk2', 'ssp-rk3' (explicit) or
+    'backward-euler', 'newton-krylov' (implicit) with stage buffers for a
+    solution of given shape and dtype. Implicit integrators need float64.
+    """
+    if name not in TIME_INTEGRATORS:
+        raise ValueError(f"Unknown time integrator '{name}'")
+    return TIME_INTEGRATORS[name](shape, dtype)
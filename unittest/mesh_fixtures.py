@@ -0,0 +1,68 @@
+import numpy as np
+from cell_group import CellGroup
+from elem_shape import ElemShape
+from ref_elem_factory import RefElemFactory
+
+
+def structured_quad_mesh(nx: int, ny: int, length: float = 1.0):
+    """Build node coordinates and cell groups of a Cartesian mesh of the square
+    [0, length] x [0, length] with nx x ny quadrilaterals.
+    Returns the same data as GmshReader.load: (nodes, cell_groups), where cell groups
+    are 'inside' (2D) and 'bottom', 'right', 'top', 'left' (1D boundary).
+    All elements are oriented counter-clockwise.
+    """
+    x = np.linspace(0.0, length, nx + 1)
+    y = np.linspace(0.0, length, ny + 1)
+    xx, yy = np.meshgrid(x, y)
+    nodes = np.column_stack([xx.ravel(), yy.ravel()])
+
+    def node_id(i, j):
+        return j * (nx + 1) + i
+
+    ii, jj = np.meshgrid(np.arange(nx), np.arange(ny))
+    ii = ii.ravel()
+    jj = jj.ravel()
+    quads = np.column_stack(
+        [node_id(ii, jj), node_id(ii + 1, jj), node_id(ii + 1, jj + 1), node_id(ii, jj + 1)]
+    )
+
+    i_x = np.arange(nx)
+    i_y = np.arange(ny)
+    bottom = np.column_stack([node_id(i_x, 0), node_id(i_x + 1, 0)])
+    right = np.column_stack([node_id(nx, i_y), node_id(nx, i_y + 1)])
+    top = np.column_stack([node_id(i_x + 1, ny), node_id(i_x, ny)])
+    left = np.column_stack([node_id(0, i_y + 1), node_id(0, i_y)])
+
+    factory = RefElemFactory()
+    line_p1 = factory.make_elem(ElemShape.LINE, 1)
+    quad_p1 = factory.make_elem(ElemShape.QUAD, 1)
+
+    cell_groups = [
+        CellGroup(line_p1, bottom, 1, "bottom"),
+        CellGroup(line_p1, top, 2, "top"),
+        CellGroup(line_p1, left, 3, "left"),
+        CellGroup(line_p1, right, 4, "right"),
+        CellGroup(quad_p1, quads, 5, "inside"),
+    ]
+
+    return nodes, cell_groups
+
+
+def random_states(rng, num_states: int) -> np.array:
+    """Random conservative states with positive density and pressure"""
+    rho = rng.uniform(0.1, 2.0, num_states)
+    v1 = rng.uniform(-3.0, 3.0, num_states)
+    v2 = rng.uniform(-3.0, 3.0, num_states)
+    p = rng.uniform(0.01, 2.0, num_states)
+    e = p / 0.4 + 0.5 * rho * (v1 * v1 + v2 * v2)
+    return np.column_stack([rho, rho * v1, rho * v2, e])
+
+
+def random_normals(rng, num_normals: int) -> np.array:
+    angle = rng.uniform(0.0, 2.0 * np.pi, num_normals)
+    return np.column_stack([np.cos(angle), np.sin(angle)])
+
+
+def random_solution(rng, num_cells: int) -> np.array:
+    """Random solution of a mesh with num_cells cells, shape (num_cells, 4)"""
+    return random_states(rng, num_cells)
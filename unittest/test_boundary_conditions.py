@@ -0,0 +1,107 @@
+import numpy as np
+import pytest
+from boundary_conditions import *
+from mesh import Mesh
+from numerical_flux import AUSM_flux_batch
+from mesh_fixtures import structured_quad_mesh, random_states, random_normals
+
+
+class TestBoundaryConditions:
+
+    def test_outflow_bc_batch(self):
+        rng = np.random.default_rng(11)
+        u_in = random_states(rng, 400)
+        u_farfield = random_states(rng, 400)
+        normals = random_normals(rng, 400)
+
+        u_ghost = outflow_bc_batch(u_in, u_farfield, normals)
+
+        expected = np.array(
+            [outflow_bc(*args) for args in zip(u_in, u_farfield, normals)]
+        )
+        assert np.array_equal(u_ghost, expected)
+
+    def test_outflow_bc_batch_single_farfield_state(self):
+        rng = np.random.default_rng(12)
+        u_in = random_states(rng, 50)
+        u_farfield = random_states(rng, 1)[0]
+        normals = random_normals(rng, 50)
+
+        u_ghost = outflow_bc_batch(u_in, u_farfield, normals)
+
+        expected = np.array(
+            [outflow_bc(u, u_farfield, normal) for u, normal in zip(u_in, normals)]
+        )
+        assert np.array_equal(u_ghost, expected)
+
+    def test_slip_wall_bc_batch(self):
+        rng = np.random.default_rng(13)
+        u_in = random_states(rng, 100)
+        normals = random_normals(rng, 100)
+
+        u_ghost = slip_wall_bc_batch(u_in, normals)
+
+        # Normal momentum reversed, tangential momentum, density, energy kept
+        tangents = np.column_stack([-normals[:, 1], normals[:, 0]])
+        m_in, m_ghost = u_in[:, 1:3], u_ghost[:, 1:3]
+        assert np.allclose(
+            np.sum(m_ghost * normals, axis=1), -np.sum(m_in * normals, axis=1)
+        )
+        assert np.allclose(
+            np.sum(m_ghost * tangents, axis=1), np.sum(m_in * tangents, axis=1)
+        )
+        assert np.array_equal(u_ghost[:, [0, 3]], u_in[:, [0, 3]])
+
+        # No mass and energy cross the wall
+        flux = AUSM_flux_batch(u_in, u_ghost, normals)
+        assert np.allclose(flux[:, [0, 3]], 0.0, atol=1e-12)
+
+    def test_boundary_conditions_by_group_name(self):
+        nodes, cell_groups = structured_quad_mesh(4, 3)
+        faces = Mesh(cell_groups, nodes).edges()
+        inlet_state = np.array([1.0, 2.0, 0.0, 5.0])
+
+        bcs = BoundaryConditions(
+            faces,
+            {"bottom": "slip-wall", "top": SymmetryBC(),
+             "left": SupersonicInletBC(inlet_state)},
+        )
+        assert [bc.name for bc in bcs.conditions.values()] == [
+            "slip-wall", "symmetry", "supersonic-inlet", "outflow"]
+
+        rng = np.random.default_rng(14)
+        boundary = faces.boundary_slice()
+        num_boundary = boundary.stop - boundary.start
+        u_in = random_states(rng, num_boundary)
+        normals = random_normals(rng, num_boundary)
+
+        u_ghost = bcs.ghost_states(u_in, normals)
+        for name, bc in bcs.conditions.items():
+            group = faces.group_slice(name)
+            group = slice(group.start - boundary.start, group.stop - boundary.start)
+            assert np.array_equal(
+                u_ghost[group], bc.ghost_states(u_in[group], normals[group])
+            )
+        group = faces.group_slice("left")
+        assert np.array_equal(
+            u_ghost[group.start - boundary.start : group.stop - boundary.start],
+            np.tile(inlet_state, (group.stop - group.start, 1)),
+        )
+
+        # Faces given by index in any order
+        order = rng.permutation(num_boundary)
+        u_ghost_permuted = bcs.ghost_states(
+            u_in[order], normals[order], boundary.start + order
+        )
+        assert np.array_equal(u_ghost_permuted, u_ghost[order])
+
+    def test_boundary_conditions_errors(self):
+        nodes, cell_groups = structured_quad_mesh(2, 2)
+        faces = Mesh(cell_groups, nodes).edges()
+
+        with pytest.raises(ValueError):
+            BoundaryConditions(faces, {"outlet": "outflow"})
+        with pytest.raises(ValueError):
+            BoundaryConditions(faces, {"top": "porous-wall"})
+        with pytest.raises(ValueError):
+            BoundaryConditions(faces, {"top": "slip-wall"}, default=None)
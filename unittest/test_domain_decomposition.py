@@ -0,0 +1,80 @@
+import contextlib
+import io
+import numpy as np
+from mesh import Mesh
+from domain_decomposition import *
+from partitioned_solver import run_partitioned_solver
+from solver import run_solver
+from mesh_fixtures import structured_quad_mesh
+
+
+class TestDomainDecomposition:
+
+    def test_recursive_coordinate_bisection(self):
+        nodes, cell_groups = structured_quad_mesh(12, 6)
+        centroids = Mesh(cell_groups, nodes).geometry().cell_centroids
+
+        parts = recursive_coordinate_bisection(centroids, 3)
+
+        assert np.array_equal(np.bincount(parts), [24, 24, 24])
+        # The first cut is across x (longest extent) and leaves 4 cell columns
+        # in part 0, the remaining 8 x 6 cells are then cut across y
+        assert np.isclose(np.ptp(centroids[parts == 0, 0]), 3.0 / 12.0)
+        assert np.max(centroids[parts == 1, 1]) < np.min(centroids[parts == 2, 1])
+
+    def test_build_subdomains(self):
+        nodes, cell_groups = structured_quad_mesh(8, 8)
+        mesh = Mesh(cell_groups, nodes)
+        geometry = mesh.geometry()
+        parts = recursive_coordinate_bisection(geometry.cell_centroids, 4)
+
+        subdomains = build_subdomains(mesh, parts)
+
+        owned = np.concatenate([s.cells[: s.num_owned] for s in subdomains])
+        assert np.array_equal(np.sort(owned), np.arange(64))
+
+        for subdomain in subdomains:
+            # 4 x 4 owned cells in a corner, 4 + 4 ghosts from edge neighbors
+            # and 1 from the diagonal neighbor which is not adjacent by a face
+            assert subdomain.num_owned == 16
+            assert subdomain.cells.shape[0] == 24
+            assert len(subdomain.neighbors()) == 2
+
+            for neighbor in subdomain.neighbors():
+                other = subdomains[neighbor]
+                sent = subdomain.cells[subdomain.send[neighbor]]
+                received = other.cells[other.recv[subdomain.part]]
+                assert np.array_equal(sent, received)
+                assert np.all(parts[sent] == subdomain.part)
+
+            local_faces = subdomain.mesh.edges()
+            local_geometry = subdomain.mesh.geometry()
+            assert np.array_equal(
+                local_geometry.cell_centroids, geometry.cell_centroids[subdomain.cells]
+            )
+            # Every owned cell keeps all of its 4 faces
+            face_count = np.bincount(
+                local_faces.left_cell, minlength=subdomain.cells.shape[0]
+            )
+            interior = local_faces.interior_slice()
+            face_count += np.bincount(
+                local_faces.right_cell[interior], minlength=subdomain.cells.shape[0]
+            )
+            assert np.all(face_count[: subdomain.num_owned] == 4)
+
+            # Local node numbering reproduces the global coordinates
+            local_nodes = subdomain.mesh.node_coordinates()
+            global_dofs = mesh.cells().dof_ids[subdomain.cells]
+            assert np.array_equal(
+                local_nodes[subdomain.mesh.cells().dof_ids], nodes[global_dofs]
+            )
+
+    def test_partitioned_solver_matches_serial_solver(self):
+        nodes, cell_groups = structured_quad_mesh(12, 10)
+        mesh = Mesh(cell_groups, nodes)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            U_serial = run_solver(mesh, backend="numpy")
+            U_partitioned = run_partitioned_solver(mesh, 3)
+
+        assert np.allclose(U_partitioned, U_serial, rtol=1e-12, atol=1e-14)
@@ -0,0 +1,40 @@
+import numpy as np
+from mesh import Mesh
+from flux_jacobian import *
+from kernels import make_kernels
+from mesh_fixtures import structured_quad_mesh, random_solution
+
+
+class TestFluxJacobian:
+
+    def test_jacobian_matches_residual_differences(self):
+        nodes, cell_groups = structured_quad_mesh(6, 5)
+        mesh = Mesh(cell_groups, nodes)
+        faces = mesh.edges()
+        geometry = mesh.geometry()
+        rng = np.random.default_rng(41)
+        U = random_solution(rng, 30)
+
+        jacobian = FluxJacobian(faces, geometry)
+        matrix = jacobian.assemble(U)
+        assert matrix.shape == (120, 120)
+        # Diagonal block of every cell, two blocks per interior face
+        assert matrix.data.shape[0] == 30 + 2 * (5 * 5 + 6 * 4)
+
+        kernels = make_kernels(faces, geometry, backend="numpy")
+        v = rng.standard_normal(U.shape)
+        eps = 1.0e-7
+        expected = (kernels.residual(U + eps * v) - kernels.residual(U - eps * v)) / (
+            2.0 * eps
+        )
+
+        assert np.allclose(matrix @ v.ravel(), expected.ravel(), atol=1e-5)
+
+    def test_flux_derivatives_of_linear_function(self):
+        rng = np.random.default_rng(42)
+        A = rng.standard_normal((4, 4))
+        u = rng.standard_normal((7, 4))
+
+        derivatives = flux_derivatives(lambda x: x @ A.T, u, u @ A.T)
+
+        assert np.allclose(derivatives, np.broadcast_to(A, (7, 4, 4)), atol=1e-7)
@@ -0,0 +1,119 @@
+import os
+import numpy as np
+import pytest
+from elem_shape import ElemShape
+from gmsh_reader import GmshReader
+from gmsh_writer import GmshWriter
+from mesh_fixtures import structured_quad_mesh
+
+MESH_DIR = os.path.join(os.path.dirname(__file__), os.pardir, "mesh")
+
+SMALL_MESH = """$MeshFormat
+2.2 0 8
+$EndMeshFormat
+$PhysicalNames
+3
+1 1 "wall"
+1 2 "outlet"
+2 3 "fluid"
+$EndPhysicalNames
+$Nodes
+6
+1 0 0 0
+2 1 0 0
+3 2 0 0
+6 2 1 0
+5 1 1 0
+4 0 1 0
+$EndNodes
+$Elements
+7
+1 1 2 1 1 1 2
+2 1 2 1 1 2 3
+3 1 2 2 2 3 6
+4 3 2 3 3 1 2 5 4
+5 2 2 3 3 2 3 6
+6 2 2 3 3 2 6 5
+7 1 2 1 1 5 4
+$EndElements
+"""
+
+
+class TestGmshReader:
+
+    def test_load_small_mesh(self, tmp_path):
+        mesh_file = tmp_path / "small.msh"
+        mesh_file.write_text(SMALL_MESH)
+
+        nodes, cell_groups = GmshReader().load(str(mesh_file))
+
+        assert nodes.shape == (6, 2)
+        assert np.array_equal(nodes[5], [2.0, 1.0])
+        assert np.array_equal(nodes[3], [0.0, 1.0])
+
+        summary = [(cg.name, cg.tag, cg.ref_elem.shape()) for cg in cell_groups]
+        assert summary == [
+            ("wall", 1, ElemShape.LINE),
+            ("outlet", 2, ElemShape.LINE),
+            ("fluid", 3, ElemShape.QUAD),
+            ("fluid", 3, ElemShape.TRI),
+        ]
+
+        assert np.array_equal(cell_groups[0].dof_ids, [[0, 1], [1, 2], [4, 3]])
+        assert np.array_equal(cell_groups[1].dof_ids, [[2, 5]])
+        assert np.array_equal(cell_groups[2].dof_ids, [[0, 1, 4, 3]])
+        assert np.array_equal(cell_groups[3].dof_ids, [[1, 2, 5], [1, 5, 4]])
+
+    def test_truncated_elements_section(self, tmp_path):
+        mesh_file = tmp_path / "truncated.msh"
+        mesh_file.write_text(SMALL_MESH.replace("7 1 2 1 1 5 4\n", "7 1 2 1 1 5\n"))
+        with pytest.raises(ValueError, match="truncated"):
+            GmshReader().load(str(mesh_file))
+
+    def test_load_riemann_mesh(self):
+        nodes, cell_groups = GmshReader().load(
+            os.path.join(MESH_DIR, "riemann_square.msh")
+        )
+
+        assert nodes.shape == (40401, 2)
+        sizes = {cg.name: cg.dof_ids.shape for cg in cell_groups}
+        assert sizes == {
+            "bottom": (200, 2),
+            "right": (200, 2),
+            "top": (200, 2),
+            "left": (200, 2),
+            "inside": (40000, 4),
+        }
+
+    def test_write_and_read_back(self, tmp_path):
+        nodes, cell_groups = structured_quad_mesh(4, 3)
+        rng = np.random.default_rng(5)
+        cell_data = rng.standard_normal((12, 4))
+
+        for binary in (False, True):
+            mesh_file = str(tmp_path / f"roundtrip_{binary}.msh")
+            writer = GmshWriter(binary=binary)
+            writer.write(mesh_file, nodes, cell_groups)
+            writer.write_field(mesh_file, cell_data)
+
+            reader = GmshReader()
+            nodes_read, cell_groups_read = reader.load(mesh_file)
+            assert np.array_equal(nodes_read, nodes)
+
+            assert len(cell_groups_read) == len(cell_groups)
+            for written, read in zip(cell_groups, cell_groups_read):
+                assert (read.name, read.tag) == (written.name, written.tag)
+                assert read.ref_elem.shape() == written.ref_elem.shape()
+                assert np.array_equal(read.dof_ids, written.dof_ids)
+
+            element_data = reader.load_element_data(mesh_file)
+            assert sorted(element_data.keys()) == [
+                "data_00",
+                "data_01",
+                "data_02",
+                "data_03",
+            ]
+            for component in range(4):
+                values = element_data[f"data_0{component}"]
+                # Row i holds the value written for element number i + 1
+                assert np.array_equal(values[:, 0], cell_data[:, component])
@@ -0,0 +1,236 @@
+import os
+import subprocess
+import sys
+import textwrap
+import numpy as np
+import pytest
+from mesh import Mesh
+from kernels import *
+from boundary_conditions import outflow_bc_batch, FarfieldBC, SupersonicInletBC
+from numerical_flux import get_flux_scheme
+from residual_assembly import face_cell_incidence, assemble_residual
+from mesh_fixtures import structured_quad_mesh, random_solution
+
+
+def make_test_mesh() -> Mesh:
+    nodes, cell_groups = structured_quad_mesh(7, 5)
+    return Mesh(cell_groups, nodes)
+
+
+# One boundary condition of every kind
+MIXED_BOUNDARY_CONDITIONS = {
+    "bottom": "slip-wall",
+    "top": FarfieldBC([1.0, 0.01, 0.0, 25.0]),
+    "left": SupersonicInletBC([1.0, 2.0, 0.0, 5.0]),
+    "right": "symmetry",
+}
+
+
+class TestKernels:
+
+    def test_numpy_kernels_match_face_fluxes(self):
+        mesh = make_test_mesh()
+        faces = mesh.edges()
+        geometry = mesh.geometry()
+        U = random_solution(np.random.default_rng(21), geometry.cell_volumes.shape[0])
+
+        kernels = make_kernels(faces, geometry, backend="numpy")
+
+        incidence = face_cell_incidence(faces, U.shape[0], geometry.face_lengths)
+        expected = assemble_residual(
+            incidence, face_fluxes(U, faces, geometry.face_normals)
+        )
+        assert np.allclose(kernels.residual(U), expected, rtol=1e-14, atol=1e-14)
+
+        dt = 1.0e-3
+        U_new = U.copy()
+        kernels.update(U_new, expected, dt)
+        assert np.allclose(
+            U_new, U - dt / geometry.cell_volumes[:, np.newaxis] * expected
+        )
+
+    def test_numba_kernels_match_numpy_kernels(self):
+        pytest.importorskip("numba")
+
+        mesh = make_test_mesh()
+        faces = mesh.edges()
+        geometry = mesh.geometry()
+        U = random_solution(np.random.default_rng(22), geometry.cell_volumes.shape[0])
+
+        reference = make_kernels(faces, geometry, backend="numpy")
+        kernels = make_kernels(faces, geometry, backend="numba")
+        assert kernels.name == "numba"
+
+        Res = kernels.residual(U)
+        assert np.allclose(Res, reference.residual(U), rtol=1e-12, atol=1e-12)
+        assert np.allclose(kernels.time_step(U), reference.time_step(U), rtol=1e-12)
+
+        U_ref = U.copy()
+        reference.update(U_ref, Res, 1.0e-3)
+        kernels.update(U, Res, 1.0e-3)
+        assert np.allclose(U, U_ref, rtol=1e-14)
+
+        # Local time stepping
+        dt = 0.7 * reference.time_step(U)
+        reference.update(U_ref, Res, dt)
+        kernels.update(U, Res, dt)
+        assert np.allclose(U, U_ref, rtol=1e-14)
+
+    @pytest.mark.parametrize("backend", ["numpy", "numba"])
+    def test_kernels_mixed_boundary_conditions(self, backend):
+        if backend == "numba":
+            pytest.importorskip("numba")
+
+        mesh = make_test_mesh()
+        faces = mesh.edges()
+        geometry = mesh.geometry()
+        U = random_solution(np.random.default_rng(25), geometry.cell_volumes.shape[0])
+
+        kernels = make_kernels(
+            faces, geometry, backend, boundary_conditions=MIXED_BOUNDARY_CONDITIONS
+        )
+
+        incidence = face_cell_incidence(faces, U.shape[0], geometry.face_lengths)
+        expected = assemble_residual(
+            incidence,
+            face_fluxes(U, faces, geometry.face_normals, MIXED_BOUNDARY_CONDITIONS),
+        )
+        assert np.allclose(kernels.residual(U), expected, rtol=1e-12, atol=1e-12)
+
+    def test_numpy_kernels_ensemble(self):
+        mesh = make_test_mesh()
+        faces = mesh.edges()
+        geometry = mesh.geometry()
+        rng = np.random.default_rng(26)
+        num_cells = geometry.cell_volumes.shape[0]
+        U = np.stack([random_solution(rng, num_cells) for _ in range(3)])
+
+        kernels = make_kernels(
+            faces,
+            geometry,
+            ensemble=True,
+            flux_scheme="hllc",
+            boundary_conditions=MIXED_BOUNDARY_CONDITIONS,
+        )
+        assert kernels.name == "numpy"
+
+        Res = kernels.residual(U)
+        local_dt = kernels.time_step(U)
+        assert Res.shape == U.shape
+        assert local_dt.shape == U.shape[:2]
+        for member in range(3):
+            assert np.allclose(Res[member], kernels.residual(U[member]), rtol=1e-14)
+            assert np.allclose(
+                local_dt[member], kernels.time_step(U[member]), rtol=1e-14
+            )
+
+        # Global, per-member and local time steps
+        for dt in (1.0e-3, np.array([1.0e-3, 2.0e-3, 5.0e-4]), 0.5 * local_dt):
+            U_new = U.copy()
+            kernels.update(U_new, Res, dt)
+            for member in range(3):
+                u = U[member].copy()
+                kernels.update(u, Res[member], dt if np.ndim(dt) == 0 else dt[member])
+                assert np.allclose(U_new[member], u, rtol=1e-14)
+
+        with pytest.raises(ValueError):
+            make_kernels(faces, geometry, "numba", ensemble=True)
+
+    def test_unknown_backend(self):
+        mesh = make_test_mesh()
+        with pytest.raises(ValueError):
+            make_kernels(mesh.edges(), mesh.geometry(), backend="fortran")
+
+    @pytest.mark.parametrize("flux_scheme", ["rusanov", "roe", "hllc"])
+    def test_numpy_kernels_flux_schemes(self, flux_scheme):
+        mesh = make_test_mesh()
+        faces = mesh.edges()
+        geometry = mesh.geometry()
+        U = random_solution(np.random.default_rng(24), geometry.cell_volumes.shape[0])
+
+        kernels = make_kernels(faces, geometry, flux_scheme=flux_scheme)
+        assert kernels.name == "numpy"
+        assert kernels.flux_scheme == flux_scheme
+
+        flux_fn = get_flux_scheme(flux_scheme)
+        interior = faces.interior_slice()
+        boundary = faces.boundary_slice()
+        normals = geometry.face_normals
+        flux = np.empty((faces.num_faces(), 4))
+        flux[interior] = flux_fn(
+            U[faces.left_cell[interior]],
+            U[faces.right_cell[interior]],
+            normals[interior],
+        )
+        u_b = U[faces.left_cell[boundary]]
+        flux[boundary] = flux_fn(
+            u_b, outflow_bc_batch(u_b, u_b, normals[boundary]), normals[boundary]
+        )
+
+        incidence = face_cell_incidence(faces, U.shape[0], geometry.face_lengths)
+        expected = assemble_residual(incidence, flux)
+        assert np.allclose(kernels.residual(U), expected, rtol=1e-13, atol=1e-13)
+
+    def test_numba_kernels_only_ausm(self):
+        mesh = make_test_mesh()
+        with pytest.raises(ValueError):
+            make_kernels(mesh.edges(), mesh.geometry(), "numba", flux_scheme="roe")
+        with pytest.raises(ValueError):
+            make_kernels(mesh.edges(), mesh.geometry(), flux_scheme="upwind")
+
+    @pytest.mark.parametrize(
+        "flux_scheme, boundary_conditions",
+        [("ausm", None), ("hllc", MIXED_BOUNDARY_CONDITIONS)],
+    )
+    def test_process_pool_kernels_match_numpy_kernels(
+        self, flux_scheme, boundary_conditions
+    ):
+        mesh = make_test_mesh()
+        faces = mesh.edges()
+        geometry = mesh.geometry()
+        U = random_solution(np.random.default_rng(23), geometry.cell_volumes.shape[0])
+
+        options = dict(flux_scheme=flux_scheme, boundary_conditions=boundary_conditions)
+        reference = make_kernels(faces, geometry, "numpy", **options)
+        kernels = make_kernels(faces, geometry, "processes", num_workers=2, **options)
+        try:
+            assert kernels.num_colors == 4
+            for _ in range(2):
+                assert np.allclose(
+                    kernels.residual(U), reference.residual(U), rtol=1e-12, atol=1e-12
+                )
+        finally:
+            kernels.close()
+
+    def test_numba_and_process_pool_kernels_in_one_process(self):
+        """Interpreter exits after running Numba kernels and a process pool"""
+        pytest.importorskip("numba")
+
+        script = textwrap.dedent(
+            """
+            import numpy as np
+            from mesh import Mesh
+            from kernels import make_kernels
+            from mesh_fixtures import structured_quad_mesh
+
+            nodes, cell_groups = structured_quad_mesh(4, 3)
+            mesh = Mesh(cell_groups, nodes)
+            U = np.tile([1.0, 0.1, 0.2, 2.5], (12, 1))
+            for backend in ("numba", "processes"):
+                kernels = make_kernels(
+                    mesh.edges(), mesh.geometry(), backend, num_workers=2
+                )
+                kernels.residual(U)
+                kernels.close()
+            """
+        )
+        unittest_dir = os.path.dirname(os.path.abspath(__file__))
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            [os.path.dirname(unittest_dir), unittest_dir]
+        )
+
+        result = subprocess.run(
+            [sys.executable, "-c", script], env=env, timeout=60, capture_output=True
+        )
+        assert result.returncode == 0, result.stderr.decode()
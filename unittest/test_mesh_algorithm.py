@@ -0,0 +1,112 @@
+import numpy as np
+from mesh import Mesh
+from cell_group import CellGroup
+from elem_shape import ElemShape
+from mesh_algorithm import FaceTable, build_faces, greedy_face_coloring
+from ref_elem_factory import RefElemFactory
+from mesh_geometry import face_normals, face_lengths
+from mesh_fixtures import structured_quad_mesh
+
+
+class TestFaceTable:
+
+    def test_face_table_layout(self):
+        nodes, cell_groups = structured_quad_mesh(3, 2)
+        mesh = Mesh(cell_groups, nodes)
+        faces = mesh.edges()
+
+        assert isinstance(faces, FaceTable)
+        assert faces.group_names[0] == "inside"
+        assert sorted(faces.boundary_group_names()) == ["bottom", "left", "right", "top"]
+
+        assert faces.left_cell.dtype == np.int32
+        assert faces.right_cell.dtype == np.int32
+        assert faces.node_ids.dtype == np.int32
+        assert faces.node_ids.shape == (faces.num_faces(), 2)
+
+        interior = faces.interior_slice()
+        assert interior.stop - interior.start == 7
+        assert np.all(faces.right_cell[interior] >= 0)
+        assert np.all(faces.right_cell[faces.boundary_slice()] == -1)
+
+        expected_sizes = {"bottom": 3, "top": 3, "left": 2, "right": 2}
+        for name, size in expected_sizes.items():
+            group = faces.group_slice(name)
+            assert group.stop - group.start == size
+
+        assert faces.num_faces() == 7 + 10
+
+    def test_face_orientation(self):
+        """Interior normals point from left to right cell, boundary normals outwards
+        and the faces of every cell form a closed contour"""
+        nodes, cell_groups = structured_quad_mesh(4, 3)
+        mesh = Mesh(cell_groups, nodes)
+        faces = mesh.edges()
+        num_cells = mesh.cells().dof_ids.shape[0]
+
+        normals = face_normals(faces, nodes)
+        lengths = face_lengths(faces, nodes)
+        centers = np.average(nodes[mesh.cells().dof_ids], axis=1)
+        face_centers = np.average(nodes[faces.node_ids], axis=1)
+
+        interior = faces.interior_slice()
+        left_to_right = (
+            centers[faces.right_cell[interior]] - centers[faces.left_cell[interior]]
+        )
+        assert np.all(np.sum(left_to_right * normals[interior], axis=1) > 0.0)
+
+        boundary = faces.boundary_slice()
+        outwards = face_centers[boundary] - centers[faces.left_cell[boundary]]
+        assert np.all(np.sum(outwards * normals[boundary], axis=1) > 0.0)
+
+        closure = np.zeros((num_cells, 2))
+        weighted_normals = lengths[:, np.newaxis] * normals
+        np.add.at(closure, faces.left_cell, weighted_normals)
+        np.subtract.at(closure, faces.right_cell[interior], weighted_normals[interior])
+        assert np.allclose(closure, 0.0, atol=1e-14)
+
+    def test_build_faces_triangles(self):
+        """Every edge of every cell appears exactly once in the face table"""
+        nodes, cell_groups = structured_quad_mesh(5, 4)
+        quads = cell_groups[-1]
+        tri_p1 = RefElemFactory().make_elem(ElemShape.TRI, 1)
+        tris = np.concatenate([quads.dof_ids[:, [0, 1, 2]], quads.dof_ids[:, [0, 2, 3]]])
+        cell_groups[-1] = CellGroup(tri_p1, tris, quads.tag, quads.name)
+
+        faces = build_faces(cell_groups[-1], cell_groups[:-1])
+        num_cells = tris.shape[0]
+
+        interior = faces.interior_slice()
+        # Interior quad edges plus one diagonal per quad
+        assert interior.stop == 4 * 4 + 5 * 3 + 20
+        assert np.all(faces.left_cell[interior] < faces.right_cell[interior])
+        assert faces.boundary_slice().stop - faces.boundary_slice().start == 18
+
+        cell_face_count = np.bincount(faces.left_cell, minlength=num_cells)
+        cell_face_count += np.bincount(faces.right_cell[interior], minlength=num_cells)
+        assert np.all(cell_face_count == 3)
+
+        # Each face is an edge of its left cell with the same orientation
+        for idx_face in range(faces.num_faces()):
+            cell = tris[faces.left_cell[idx_face]]
+            cell_edges = [(cell[0], cell[1]), (cell[1], cell[2]), (cell[2], cell[0])]
+            assert tuple(faces.node_ids[idx_face]) in cell_edges
+
+    def test_greedy_face_coloring(self):
+        nodes, cell_groups = structured_quad_mesh(6, 4)
+        faces = Mesh(cell_groups, nodes).edges()
+        num_cells = 24
+
+        colors = greedy_face_coloring(faces, num_cells)
+        assert colors.shape == (faces.num_faces(),)
+        # Every cell has 4 faces, greedy coloring of a grid needs no more colors
+        assert colors.max() == 3
+
+        # No cell is adjacent to two faces of the same color
+        for color in range(colors.max() + 1):
+            selected = colors == color
+            cells = np.concatenate(
+                [faces.left_cell[selected], faces.right_cell[selected]]
+            )
+            cells = cells[cells > -1]
+            assert len(np.unique(cells)) == len(cells)
@@ -0,0 +1,90 @@
+import os
+import numpy as np
+from gmsh_writer import GmshWriter
+import mesh_cache
+from mesh_cache import load_mesh
+from mesh_fixtures import structured_quad_mesh
+
+
+def write_mesh(file_name: str, nx: int, ny: int):
+    nodes, cell_groups = structured_quad_mesh(nx, ny)
+    GmshWriter().write(file_name, nodes, cell_groups)
+
+
+class TestMeshCache:
+
+    def test_cached_mesh_matches_fresh_mesh(self, tmp_path):
+        mesh_file = str(tmp_path / "square.msh")
+        cache_dir = str(tmp_path / "cache")
+        write_mesh(mesh_file, 4, 3)
+
+        fresh = load_mesh(mesh_file)
+        first = load_mesh(mesh_file, cache_dir)
+        cached = load_mesh(mesh_file, cache_dir)
+
+        assert len(os.listdir(cache_dir)) == 1
+        assert isinstance(cached.node_coordinates(), np.memmap)
+
+        for mesh in (first, cached):
+            assert np.array_equal(mesh.node_coordinates(), fresh.node_coordinates())
+            assert np.array_equal(mesh.cells().dof_ids, fresh.cells().dof_ids)
+            assert mesh.cells().name == fresh.cells().name
+            assert str(mesh.cells().ref_elem) == str(fresh.cells().ref_elem)
+
+            faces, fresh_faces = mesh.edges(), fresh.edges()
+            assert faces.group_names == fresh_faces.group_names
+            assert np.array_equal(faces.group_offsets, fresh_faces.group_offsets)
+            assert np.array_equal(faces.left_cell, fresh_faces.left_cell)
+            assert np.array_equal(faces.right_cell, fresh_faces.right_cell)
+            assert np.array_equal(faces.node_ids, fresh_faces.node_ids)
+
+            for name in ("cell_volumes", "cell_centroids", "face_normals"):
+                assert np.array_equal(
+                    getattr(mesh.geometry(), name), getattr(fresh.geometry(), name)
+                )
+
+    def test_cache_invalidated_when_mesh_changes(self, tmp_path):
+        mesh_file = str(tmp_path / "square.msh")
+        cache_dir = str(tmp_path / "cache")
+
+        write_mesh(mesh_file, 4, 3)
+        load_mesh(mesh_file, cache_dir)
+        old_entries = os.listdir(cache_dir)
+
+        write_mesh(mesh_file, 2, 2)
+        mesh = load_mesh(mesh_file, cache_dir)
+
+        assert mesh.cells().dof_ids.shape[0] == 4
+        new_entries = os.listdir(cache_dir)
+        assert len(new_entries) == 1
+        assert new_entries != old_entries
+
+    def test_meshes_with_same_name_keep_their_entries(self, tmp_path):
+        cache_dir = str(tmp_path / "cache")
+        mesh_files = []
+        for subdir, (nx, ny) in (("a", (4, 3)), ("b", (2, 2))):
+            os.makedirs(tmp_path / subdir)
+            mesh_files.append(str(tmp_path / subdir / "mesh.msh"))
+            write_mesh(mesh_files[-1], nx, ny)
+
+        for mesh_file in mesh_files:
+            load_mesh(mesh_file, cache_dir)
+        assert len(os.listdir(cache_dir)) == 2
+
+        mesh = load_mesh(mesh_files[0], cache_dir)
+        assert isinstance(mesh.node_coordinates(), np.memmap)
+        assert mesh.cells().dof_ids.shape[0] == 12
+
+    def test_rejected_entry_is_replaced(self, tmp_path, monkeypatch):
+        mesh_file = str(tmp_path / "square.msh")
+        cache_dir = str(tmp_path / "cache")
+        write_mesh(mesh_file, 4, 3)
+        load_mesh(mesh_file, cache_dir)
+
+        monkeypatch.setattr(mesh_cache, "CACHE_FORMAT_VERSION", 1000)
+        mesh = load_mesh(mesh_file, cache_dir)
+        assert not isinstance(mesh.node_coordinates(), np.memmap)
+
+        # The entry was rewritten in the new format and is used from now on
+        mesh = load_mesh(mesh_file, cache_dir)
+        assert isinstance(mesh.node_coordinates(), np.memmap)
@@ -0,0 +1,46 @@
+import numpy as np
+from cell_group import CellGroup
+from elem_shape import ElemShape
+from mesh import Mesh
+from mesh_geometry import *
+from ref_elem_factory import RefElemFactory
+from mesh_fixtures import structured_quad_mesh
+
+
+class TestMeshGeometry:
+
+    def test_structured_mesh_geometry(self):
+        nodes, cell_groups = structured_quad_mesh(4, 5)
+        mesh = Mesh(cell_groups, nodes)
+        geometry = mesh.geometry()
+
+        assert np.allclose(geometry.cell_volumes, 1.0 / 20.0)
+        assert np.isclose(np.sum(geometry.cell_volumes), 1.0)
+
+        vertex_average = np.average(nodes[mesh.cells().dof_ids], axis=1)
+        assert np.allclose(geometry.cell_centroids, vertex_average)
+
+        faces = mesh.edges()
+        assert geometry.face_normals.shape == (faces.num_faces(), 2)
+        assert np.allclose(np.linalg.norm(geometry.face_normals, axis=1), 1.0)
+        assert np.allclose(
+            geometry.face_midpoints, np.average(nodes[faces.node_ids], axis=1)
+        )
+        assert np.isclose(np.sum(geometry.face_lengths[faces.boundary_slice()]), 4.0)
+
+    def test_polygon_volumes_and_centroids(self):
+        factory = RefElemFactory()
+        nodes = np.array([[1.0, 1.0], [4.0, 1.0], [4.0, 3.0], [1.0, 5.0], [0.0, 0.0]])
+
+        quad = CellGroup(factory.make_elem(ElemShape.QUAD, 1), np.array([[0, 1, 2, 3]]))
+        volumes, centroids = cell_volumes_and_centroids(quad, nodes)
+        # Trapezoid = rectangle 3x2 + triangle with legs 3 and 2
+        assert np.isclose(volumes[0], 9.0)
+        expected_x = (6.0 * 2.5 + 3.0 * 2.0) / 9.0
+        expected_y = (6.0 * 2.0 + 3.0 * (3.0 + 2.0 / 3.0)) / 9.0
+        assert np.allclose(centroids[0], [expected_x, expected_y])
+
+        tri = CellGroup(factory.make_elem(ElemShape.TRI, 1), np.array([[4, 1, 3]]))
+        volumes, centroids = cell_volumes_and_centroids(tri, nodes)
+        assert np.isclose(volumes[0], 0.5 * (4.0 * 5.0 - 1.0 * 1.0))
+        assert np.allclose(centroids[0], np.average(nodes[[4, 1, 3]], axis=0))
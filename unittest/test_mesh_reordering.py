@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from cell_group import CellGroup
+from mesh import Mesh
+from mesh_geometry import compute_mesh_geometry
+from mesh_reordering import *
+from mesh_fixtures import structured_quad_mesh
+
+
+def shuffled_quad_mesh(nx: int, ny: int, seed: int) -> Mesh:
+    """Structured mesh with cells listed in random order"""
+    nodes, cell_groups = structured_quad_mesh(nx, ny)
+    quads = cell_groups[-1]
+    permutation = np.random.default_rng(seed).permutation(nx * ny)
+    cell_groups[-1] = CellGroup(
+        quads.ref_elem, quads.dof_ids[permutation], quads.tag, quads.name
+    )
+    return Mesh(cell_groups, nodes)
+
+
+def mean_neighbor_distance(mesh: Mesh) -> float:
+    """Mean index distance of the two cells of interior faces"""
+    faces = mesh.edges()
+    interior = faces.interior_slice()
+    return np.mean(np.abs(faces.left_cell[interior] - faces.right_cell[interior]))
+
+
+class TestMeshReordering:
+
+    @pytest.mark.parametrize("method", ["rcm", "morton"])
+    def test_reordered_mesh_is_consistent(self, method):
+        mesh = shuffled_quad_mesh(9, 7, seed=4)
+        reordered, ordering = reorder_mesh(mesh, method)
+
+        assert mean_neighbor_distance(reordered) < mean_neighbor_distance(mesh) / 4
+
+        # Geometry recomputed from the reordered mesh matches the permuted one
+        faces = reordered.edges()
+        geometry = reordered.geometry()
+        expected = compute_mesh_geometry(
+            reordered.cells(), faces, reordered.node_coordinates()
+        )
+        for name in ("cell_volumes", "cell_centroids", "face_normals", "face_lengths"):
+            assert np.allclose(getattr(geometry, name), getattr(expected, name))
+
+        original_centroids = mesh.geometry().cell_centroids
+        assert np.array_equal(
+            ordering.cell_data_to_original(geometry.cell_centroids), original_centroids
+        )
+        assert np.array_equal(
+            ordering.cell_data_from_original(original_centroids),
+            geometry.cell_centroids,
+        )
+        assert np.array_equal(
+            reordered.node_coordinates(),
+            mesh.node_coordinates()[ordering.node_order],
+        )
+
+        # Same groups, interior faces point to the higher cell index, faces
+        # of every group are sorted by left cell
+        assert faces.group_names == mesh.edges().group_names
+        assert np.array_equal(faces.group_offsets, mesh.edges().group_offsets)
+        interior = faces.interior_slice()
+        assert np.all(faces.left_cell[interior] < faces.right_cell[interior])
+        for name in faces.group_names:
+            group = faces.group_slice(name)
+            assert np.all(np.diff(faces.left_cell[group]) >= 0)
+
+    def test_unknown_method(self):
+        nodes, cell_groups = structured_quad_mesh(2, 2)
+        with pytest.raises(ValueError):
+            reorder_mesh(Mesh(cell_groups, nodes), "hilbert")
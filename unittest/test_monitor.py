@@ -0,0 +1,131 @@
+import json
+import numpy as np
+import pytest
+from mesh import Mesh
+from monitor import *
+from simulation import Simulation
+from solver import make_initial_solution, run_solver
+from mesh_fixtures import structured_quad_mesh
+
+
+def make_test_mesh(nx: int = 8, ny: int = 8) -> Mesh:
+    nodes, cell_groups = structured_quad_mesh(nx, ny)
+    return Mesh(cell_groups, nodes)
+
+
+class RecordingSink:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record: dict):
+        self.records.append(record)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TestMonitor:
+
+    def test_reports_every_interval_steps(self):
+        mesh = make_test_mesh()
+        U0 = make_initial_solution(mesh.geometry().cell_centroids)
+        simulation = Simulation(mesh, U0, backend="numpy")
+        sink = RecordingSink()
+        monitor = Monitor([sink], interval=3)
+        simulation.add_callback(monitor, monitor.interval)
+        simulation.step(6)
+
+        assert [record["iteration"] for record in sink.records] == [3, 6]
+        record = sink.records[-1]
+        assert list(record) == [
+            "iteration",
+            "time",
+            "res_rho",
+            "res_rho_v1",
+            "res_rho_v2",
+            "res_e",
+        ]
+        assert record["time"] == simulation.time
+        assert np.allclose(
+            [record[f"res_{name}"] for name in VARIABLES],
+            np.linalg.norm(simulation.residual(), axis=0),
+            rtol=1e-15,
+        )
+
+    def test_file_sinks(self, tmp_path):
+        mesh = make_test_mesh()
+        U0 = make_initial_solution(mesh.geometry().cell_centroids)
+        simulation = Simulation(mesh, U0, backend="numpy")
+        csv_sink = CSVSink(tmp_path / "monitor.csv", buffer_size=4)
+        jsonl_sink = JSONLinesSink(tmp_path / "monitor.jsonl")
+        monitor = Monitor([csv_sink, jsonl_sink], totals=True)
+        simulation.add_callback(monitor, monitor.interval)
+        simulation.step(5)
+        monitor.close()
+
+        lines = (tmp_path / "monitor.csv").read_text().splitlines()
+        assert len(lines) == 6
+        assert lines[0].split(",")[:2] == ["iteration", "time"]
+        assert lines[0].split(",")[-1] == "total_e"
+
+        records = [
+            json.loads(line)
+            for line in (tmp_path / "monitor.jsonl").read_text().splitlines()
+        ]
+        assert [record["iteration"] for record in records] == [1, 2, 3, 4, 5]
+        for line, record in zip(lines[1:], records):
+            assert np.allclose(
+                [float(value) for value in line.split(",")],
+                list(record.values()),
+                rtol=1e-15,
+            )
+
+    def test_totals_of_ensemble(self):
+        mesh = make_test_mesh()
+        geometry = mesh.geometry()
+        U0 = make_initial_solution(geometry.cell_centroids)
+        ensemble = np.stack([U0, 2.0 * U0])
+
+        totals = conserved_totals(ensemble, geometry.cell_volumes)
+        assert totals.shape == (2, 4)
+        assert np.allclose(totals[0], geometry.cell_volumes @ U0, rtol=1e-14)
+        assert np.allclose(totals[1], 2.0 * totals[0], rtol=1e-14)
+
+        # One record per member, no residual before the first step
+        simulation = Simulation(mesh, ensemble, backend="numpy")
+        sink = RecordingSink()
+        Monitor([sink], totals=True)(simulation)
+        assert [record["member"] for record in sink.records] == [0, 1]
+        assert all(np.isnan(record["res_rho"]) for record in sink.records)
+        assert (
+            sink.records[1]["total_e"]
+            == conserved_totals(simulation.U, geometry.cell_volumes)[1, 3]
+        )
+
+    def test_run_solver_reports_to_stdout(self, capsys):
+        mesh = make_test_mesh()
+        run_solver(mesh, backend="numpy", max_time=0.05, monitor=Monitor(interval=5))
+        reports = [
+            line
+            for line in capsys.readouterr().out.splitlines()
+            if line.startswith("iteration = ")
+        ]
+        assert reports[0].startswith("iteration = 5, time = ")
+
+    def test_buffered_sink_writes_in_background(self, tmp_path):
+        sink = CSVSink(tmp_path / "monitor.csv", buffer_size=2)
+        for iteration in range(5):
+            sink.write({"iteration": iteration, "time": 0.1 * iteration})
+        sink.flush()
+        lines = (tmp_path / "monitor.csv").read_text().splitlines()
+        assert lines == ["iteration,time"] + [
+            f"{iteration},{0.1 * iteration}" for iteration in range(5)
+        ]
+
+        sink.stream.close()
+        sink.write({"iteration": 5, "time": 0.5})
+        with pytest.raises(ValueError):
+            sink.flush()
@@ -0,0 +1,120 @@
+import numpy as np
+import pytest
+from numerical_flux import *
+from mesh_fixtures import random_states, random_normals
+
+
+class TestNumericalFlux:
+
+    def test_mach_polynomials_batch(self):
+        mach = np.linspace(-3.0, 3.0, 121)
+
+        for scalar_fn, batch_fn in ((m1_minus, m1_minus_batch),
+                                    (m1_plus, m1_plus_batch),
+                                    (m2_minus, m2_minus_batch),
+                                    (m2_plus, m2_plus_batch),
+                                    (p3_minus, p3_minus_batch),
+                                    (p3_plus, p3_plus_batch)):
+            expected = np.array([scalar_fn(ma) for ma in mach])
+            assert np.allclose(batch_fn(mach), expected, rtol=1e-14, atol=1e-14)
+
+    def test_ausm_flux_batch_matches_scalar(self):
+        rng = np.random.default_rng(1234)
+        num_faces = 500
+
+        u_L = random_states(rng, num_faces)
+        u_R = random_states(rng, num_faces)
+        normals = random_normals(rng, num_faces)
+
+        flux = AUSM_flux_batch(u_L, u_R, normals)
+        assert flux.shape == (num_faces, 4)
+
+        for i in range(num_faces):
+            expected = AUSM_flux(u_L[i], u_R[i], normals[i])
+            assert np.allclose(flux[i], expected, rtol=1e-13, atol=1e-13)
+
+    def test_ausm_flux_batch_consistency(self):
+        """Flux with identical left and right states equals the physical flux"""
+        rng = np.random.default_rng(42)
+        u = random_states(rng, 100)
+        normals = random_normals(rng, 100)
+
+        flux = AUSM_flux_batch(u, u, normals)
+
+        p = 0.4 * (u[:, 3] - 0.5 * (u[:, 1] ** 2 + u[:, 2] ** 2) / u[:, 0])
+        v_n = (u[:, 1] * normals[:, 0] + u[:, 2] * normals[:, 1]) / u[:, 0]
+        expected = np.column_stack([
+            u[:, 0] * v_n,
+            u[:, 1] * v_n + p * normals[:, 0],
+            u[:, 2] * v_n + p * normals[:, 1],
+            (u[:, 3] + p) * v_n,
+        ])
+        assert np.allclose(flux, expected, rtol=1e-12, atol=1e-12)
+
+    @pytest.mark.parametrize("scheme", sorted(FLUX_SCHEMES))
+    def test_flux_schemes_consistency(self, scheme):
+        """Every scheme reduces to the physical flux for equal states"""
+        rng = np.random.default_rng(43)
+        u = random_states(rng, 100)
+        normals = random_normals(rng, 100)
+
+        flux = get_flux_scheme(scheme)(u, u, normals)
+
+        p = 0.4 * (u[:, 3] - 0.5 * (u[:, 1] ** 2 + u[:, 2] ** 2) / u[:, 0])
+        v_n = (u[:, 1] * normals[:, 0] + u[:, 2] * normals[:, 1]) / u[:, 0]
+        expected = np.column_stack([
+            u[:, 0] * v_n,
+            u[:, 1] * v_n + p * normals[:, 0],
+            u[:, 2] * v_n + p * normals[:, 1],
+            (u[:, 3] + p) * v_n,
+        ])
+        assert np.allclose(flux, expected, rtol=1e-12, atol=1e-12)
+
+    @pytest.mark.parametrize("scheme", sorted(FLUX_SCHEMES))
+    def test_flux_schemes_conservation(self, scheme):
+        """Flux from right to left through the reversed normal is the negated flux"""
+        rng = np.random.default_rng(44)
+        u_L = random_states(rng, 200)
+        u_R = random_states(rng, 200)
+        normals = random_normals(rng, 200)
+
+        flux_fn = get_flux_scheme(scheme)
+        assert np.allclose(
+            flux_fn(u_L, u_R, normals), -flux_fn(u_R, u_L, -normals), rtol=1e-12, atol=1e-12
+        )
+
+    @pytest.mark.parametrize("scheme", ["roe", "hllc"])
+    def test_flux_schemes_resolve_stationary_contact(self, scheme):
+        """Roe and HLLC keep a density jump at rest, only pressure acts"""
+        rng = np.random.default_rng(45)
+        num_faces = 50
+        p = rng.uniform(0.1, 2.0, num_faces)
+        states = []
+        for _ in range(2):
+            rho = rng.uniform(0.1, 2.0, num_faces)
+            states.append(np.column_stack([rho, np.zeros((num_faces, 2)), p / 0.4]))
+        normals = random_normals(rng, num_faces)
+
+        flux = get_flux_scheme(scheme)(states[0], states[1], normals)
+
+        expected = np.column_stack([np.zeros(num_faces), p[:, np.newaxis] * normals,
+                                    np.zeros(num_faces)])
+        assert np.allclose(flux, expected, rtol=1e-12, atol=1e-12)
+
+    def test_rusanov_flux(self):
+        u_L = np.array([[1.0, 0.5, 0.0, 2.5]])
+        u_R = np.array([[0.5, 0.0, 0.0, 1.0]])
+        normals = np.array([[1.0, 0.0]])
+
+        # Left: v = 0.5, p = 0.95, a = sqrt(1.33); right: v = 0, p = 0.4, a = sqrt(1.12)
+        p_L, p_R = 0.95, 0.4
+        f_L = np.array([0.5, 0.25 + p_L, 0.0, (2.5 + p_L) * 0.5])
+        f_R = np.array([0.0, p_R, 0.0, 0.0])
+        s_max = 0.5 + np.sqrt(1.33)
+        expected = 0.5 * (f_L + f_R) - 0.5 * s_max * (u_R[0] - u_L[0])
+
+        assert np.allclose(Rusanov_flux_batch(u_L, u_R, normals)[0], expected, rtol=1e-14)
+
+    def test_unknown_flux_scheme(self):
+        with pytest.raises(ValueError):
+            get_flux_scheme("lax-wendroff")
@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+from mesh import Mesh
+from kernels import make_kernels
+from reconstruction import *
+from mesh_fixtures import structured_quad_mesh, random_solution
+
+
+def make_test_mesh(nx: int = 7, ny: int = 5) -> Mesh:
+    nodes, cell_groups = structured_quad_mesh(nx, ny)
+    return Mesh(cell_groups, nodes)
+
+
+def linear_solution(centroids: np.array) -> np.array:
+    """Linear field with gradients (0.3, 0.5, 0.1, 0.4) and (0.1, -0.2, 0.6, 0.2)"""
+    grad_x = np.array([0.3, 0.5, 0.1, 0.4])
+    grad_y = np.array([0.1, -0.2, 0.6, 0.2])
+    U_0 = np.array([1.0, 0.2, -0.1, 3.0])
+    return U_0 + centroids[:, 0:1] * grad_x + centroids[:, 1:2] * grad_y
+
+
+class TestReconstruction:
+
+    def test_gradient_of_linear_field_is_exact(self):
+        mesh = make_test_mesh()
+        faces = mesh.edges()
+        geometry = mesh.geometry()
+        G_x, G_y = least_squares_gradient_operators(faces, geometry)
+
+        # Boundary ghost cells carry the cell value, away from the boundary
+        # the gradient is exact
+        U = linear_solution(geometry.cell_centroids)
+        inner = np.ones(U.shape[0], dtype=bool)
+        inner[faces.left_cell[faces.boundary_slice()]] = False
+        assert np.allclose((G_x @ U)[inner], [0.3, 0.5, 0.1, 0.4], rtol=1e-12)
+        assert np.allclose((G_y @ U)[inner], [0.1, -0.2, 0.6, 0.2], rtol=1e-12)
+
+    def test_constant_field_is_not_changed(self):
+        mesh = make_test_mesh()
+        geometry = mesh.geometry()
+        recon = MUSCLReconstruction(mesh.edges(), geometry)
+
+        U = np.tile([1.0, 0.3, -0.2, 2.5], (geometry.cell_volumes.shape[0], 1))
+        u_L, u_R = recon.face_states(U)
+        assert np.allclose(u_L, U[0], rtol=1e-14)
+        assert np.allclose(u_R, U[0], rtol=1e-14)
+
+    @pytest.mark.parametrize("limiter", LIMITERS)
+    def test_linear_field_in_interior_is_not_limited(self, limiter):
+        mesh = make_test_mesh()
+        faces = mesh.edges()
+        geometry = mesh.geometry()
+        recon = MUSCLReconstruction(faces, geometry, limiter)
+
+        # Interior face states of a linear field are exact where neither cell
+        # touches the boundary (boundary cells are local extrema)
+        U = linear_solution(geometry.cell_centroids)
+        u_L, u_R = recon.face_states(U)
+        interior = faces.interior_slice()
+        at_boundary = np.zeros(U.shape[0], dtype=bool)
+        at_boundary[faces.left_cell[faces.boundary_slice()]] = True
+        inner = ~(
+            at_boundary[faces.left_cell[interior]]
+            | at_boundary[faces.right_cell[interior]]
+        )
+
+        expected = linear_solution(geometry.face_midpoints[interior])[inner]
+        assert np.allclose(u_L[interior][inner], expected, rtol=1e-12)
+        assert np.allclose(u_R[inner], expected, rtol=1e-12)
+
+    def test_barth_jespersen_bounds_face_values(self):
+        mesh = make_test_mesh()
+        faces = mesh.edges()
+        geometry = mesh.geometry()
+        recon = MUSCLReconstruction(faces, geometry, "barth-jespersen")
+
+        U = random_solution(np.random.default_rng(31), geometry.cell_volumes.shape[0])
+        u_L, u_R = recon.face_states(U)
+
+        # Range of every cell and its face neighbors
+        interior = faces.interior_slice()
+        idx_L = faces.left_cell[interior]
+        idx_R = faces.right_cell[interior]
+        U_max = U.copy()
+        U_min = U.copy()
+        np.maximum.at(U_max, idx_L, U[idx_R])
+        np.maximum.at(U_max, idx_R, U[idx_L])
+        np.minimum.at(U_min, idx_L, U[idx_R])
+        np.minimum.at(U_min, idx_R, U[idx_L])
+
+        tol = 1e-12
+        for states, cells in ((u_L, faces.left_cell), (u_R, idx_R)):
+            assert np.all(states <= U_max[cells] + tol)
+            assert np.all(states >= U_min[cells] - tol)
+
+    def test_unknown_limiter(self):
+        mesh = make_test_mesh()
+        with pytest.raises(ValueError):
+            MUSCLReconstruction(mesh.edges(), mesh.geometry(), "minmod")
+
+    def test_muscl_kernels_keep_uniform_flow(self):
+        mesh = make_test_mesh()
+        geometry = mesh.geometry()
+        kernels = make_kernels(mesh.edges(), geometry, reconstruction="muscl")
+        assert kernels.name == "numpy"
+
+        # Fluxes through the faces of every cell cancel
+        U = np.tile([1.0, 0.3, -0.2, 2.5], (geometry.cell_volumes.shape[0], 1))
+        assert np.allclose(kernels.residual(U), 0.0, atol=1e-13)
+
+    def test_muscl_needs_numpy_backend(self):
+        mesh = make_test_mesh()
+        with pytest.raises(ValueError):
+            make_kernels(
+                mesh.edges(), mesh.geometry(), "processes", reconstruction="muscl"
+            )
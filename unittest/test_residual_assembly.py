@@ -0,0 +1,93 @@
+import numpy as np
+from mesh import Mesh
+import residual_assembly
+from residual_assembly import *
+from mesh_fixtures import structured_quad_mesh
+
+
+class TestResidualAssembly:
+
+    def test_incidence_matches_scatter(self):
+        nodes, cell_groups = structured_quad_mesh(5, 3)
+        mesh = Mesh(cell_groups, nodes)
+        faces = mesh.edges()
+        lengths = mesh.geometry().face_lengths
+        num_cells = mesh.cells().dof_ids.shape[0]
+
+        incidence = face_cell_incidence(faces, num_cells, lengths)
+        assert incidence.shape == (num_cells, faces.num_faces())
+
+        rng = np.random.default_rng(3)
+        flux = rng.standard_normal((faces.num_faces(), 4))
+
+        expected = np.zeros((num_cells, 4))
+        np.add.at(expected, faces.left_cell, lengths[:, np.newaxis] * flux)
+        interior = faces.interior_slice()
+        np.subtract.at(
+            expected,
+            faces.right_cell[interior],
+            lengths[interior, np.newaxis] * flux[interior],
+        )
+
+        assert np.allclose(assemble_residual(incidence, flux), expected, atol=1e-14)
+
+    def test_constant_flux_cancels_on_interior(self):
+        """Unit weights: every column has entries summing to 0 for interior faces"""
+        nodes, cell_groups = structured_quad_mesh(3, 3)
+        mesh = Mesh(cell_groups, nodes)
+        faces = mesh.edges()
+
+        incidence = face_cell_incidence(faces, mesh.cells().dof_ids.shape[0])
+        column_sums = np.asarray(incidence.sum(axis=0)).ravel()
+
+        assert np.all(column_sums[faces.interior_slice()] == 0.0)
+        assert np.all(column_sums[faces.boundary_slice()] == 1.0)
+
+    def test_ensemble_assembly(self):
+        nodes, cell_groups = structured_quad_mesh(4, 3)
+        mesh = Mesh(cell_groups, nodes)
+        faces = mesh.edges()
+        incidence = face_cell_incidence(
+            faces, mesh.cells().dof_ids.shape[0], mesh.geometry().face_lengths
+        )
+
+        rng = np.random.default_rng(4)
+        flux = rng.standard_normal((3, faces.num_faces(), 4))
+
+        Res = assemble_residual(incidence, flux)
+        assert Res.shape == (3, incidence.shape[0], 4)
+        for member in range(3):
+            assert np.array_equal(Res[member], incidence @ flux[member])
+
+    def test_assembly_into_out(self):
+        nodes, cell_groups = structured_quad_mesh(5, 3)
+        mesh = Mesh(cell_groups, nodes)
+        faces = mesh.edges()
+        num_cells = mesh.cells().dof_ids.shape[0]
+        incidence = face_cell_incidence(faces, num_cells, mesh.geometry().face_lengths)
+
+        rng = np.random.default_rng(5)
+        for shape in ((faces.num_faces(), 4), (3, faces.num_faces(), 4)):
+            flux = rng.standard_normal(shape)
+            out = np.full(shape[:-2] + (num_cells, 4), np.nan)
+            assert assemble_residual(incidence, flux, out=out) is out
+            assert np.array_equal(out, assemble_residual(incidence, flux))
+
+        # Sparse product of a vector, accumulated from zero
+        x = rng.standard_normal(faces.num_faces())
+        out = np.full(num_cells, np.nan)
+        sparse_matmul(incidence, x, out)
+        assert np.allclose(out, incidence @ x, rtol=1e-14)
+
+    def test_sparse_matmul_without_scipy_kernels(self, monkeypatch):
+        nodes, cell_groups = structured_quad_mesh(5, 3)
+        mesh = Mesh(cell_groups, nodes)
+        incidence = face_cell_incidence(mesh.edges(), 15, mesh.geometry().face_lengths)
+        x = np.random.default_rng(6).standard_normal((incidence.shape[1], 4))
+        expected = sparse_matmul(incidence, x, np.empty((15, 4)))
+
+        # Public API of scipy.sparse if its private CSR kernels are unusable
+        monkeypatch.setattr(residual_assembly, "_CSR_PRODUCTS", None)
+        out = np.full((15, 4), np.nan)
+        assert sparse_matmul(incidence, x, out) is out
+        assert np.allclose(out, expected, rtol=1e-14)
@@ -0,0 +1,161 @@
+import tracemalloc
+import warnings
+import numpy as np
+import pytest
+from mesh import Mesh
+from kernels import make_kernels
+from simulation import *
+from solver import make_initial_solution, run_solver
+from mesh_fixtures import structured_quad_mesh
+
+
+def make_test_mesh(nx: int = 10, ny: int = 10) -> Mesh:
+    nodes, cell_groups = structured_quad_mesh(nx, ny)
+    return Mesh(cell_groups, nodes)
+
+
+class TestSimulation:
+
+    def test_steps_match_manual_loop(self):
+        mesh = make_test_mesh()
+        geometry = mesh.geometry()
+        U0 = make_initial_solution(geometry.cell_centroids)
+
+        simulation = Simulation(mesh, U0, backend="numpy")
+        simulation.step(3)
+        assert simulation.iteration == 3
+
+        kernels = make_kernels(mesh.edges(), geometry, "numpy")
+        U = U0.copy()
+        time = 0.0
+        for _ in range(3):
+            dt = 0.7 * np.min(kernels.time_step(U))
+            kernels.update(U, kernels.residual(U), dt)
+            time += dt
+        assert np.allclose(simulation.U, U, rtol=1e-14)
+        assert simulation.time == pytest.approx(time, rel=1e-14)
+
+    def test_run_matches_run_solver(self):
+        mesh = make_test_mesh()
+        U0 = make_initial_solution(mesh.geometry().cell_centroids)
+
+        with Simulation(mesh, U0, backend="numpy", integrator="ssp-rk2") as simulation:
+            assert simulation.run(until=0.05)
+        U = run_solver(mesh, backend="numpy", integrator="ssp-rk2", max_time=0.05)
+
+        assert simulation.time >= 0.05
+        assert np.array_equal(simulation.U, U)
+
+    def test_reset_starts_new_case(self):
+        mesh = make_test_mesh()
+        U0 = make_initial_solution(mesh.geometry().cell_centroids)
+
+        simulation = Simulation(mesh, U0, backend="numpy")
+        simulation.run(until=0.02)
+        U_first = simulation.U.copy()
+
+        simulation.reset(U0)
+        assert simulation.iteration == 0 and simulation.time == 0.0
+        simulation.run(until=0.02)
+        assert np.array_equal(simulation.U, U_first)
+
+    def test_callbacks_and_phase_timers(self):
+        mesh = make_test_mesh()
+        U0 = make_initial_solution(mesh.geometry().cell_centroids)
+
+        simulation = Simulation(mesh, U0, backend="numpy")
+        iterations = []
+        simulation.add_callback(lambda sim: iterations.append(sim.iteration), 2)
+        simulation.step(5)
+        assert iterations == [2, 4]
+
+        # Explicit Euler: one residual, time step and update per step
+        calls = simulation.timers.calls
+        for phase in ("interior flux", "boundary flux", "assembly", "time step"):
+            assert calls[phase] == 5
+        assert calls["update"] == 5
+        assert calls["I/O"] == 2
+        assert "interior flux" in simulation.summary()
+
+    def test_steady_run_of_uniform_flow_converges(self):
+        # The residual of a uniform state is zero from the start
+        mesh = make_test_mesh(8, 8)
+        U0 = np.tile([1.0, 0.5, 0.5, 2.5], (64, 1))
+
+        simulation = Simulation(mesh, U0, backend="numpy", steady=True)
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            assert simulation.run(residual_drop=3, max_iter=20)
+        assert simulation.iteration == 1
+        assert simulation.orders_dropped == np.inf
+
+    def test_phase_timers(self):
+        timers = PhaseTimers()
+        for _ in range(3):
+            with timers.measure("flux"):
+                pass
+        assert timers.calls == {"flux": 3}
+        assert timers.total["flux"] >= 0.0
+        assert "flux" in timers.summary()
+
+    @pytest.mark.parametrize("backend", ["numpy", "numba"])
+    def test_steps_do_not_allocate_arrays(self, backend):
+        if backend == "numba":
+            pytest.importorskip("numba")
+
+        peaks = []
+        for n in (160, 320):
+            mesh = make_test_mesh(n, n)
+            U0 = make_initial_solution(mesh.geometry().cell_centroids)
+            simulation = Simulation(mesh, U0, backend, integrator="ssp-rk3")
+            simulation.step(2)
+
+            tracemalloc.start()
+            try:
+                simulation.step(3)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            peaks.append(peak)
+
+        # Work memory of flux functions of the NumPy backend depends on its
+        # block size (8192 faces by default, about 2 MB), not on the mesh:
+        # four times the cells allocate no more
+        assert peaks[1] < peaks[0] + 64 * 1024
+        assert peaks[1] < U0.nbytes
+
+    @pytest.mark.parametrize("backend", ["numpy", "numba"])
+    def test_float32_close_to_float64(self, backend):
+        if backend == "numba":
+            pytest.importorskip("numba")
+        mesh = make_test_mesh()
+        U0 = make_initial_solution(mesh.geometry().cell_centroids)
+
+        simulation = Simulation(mesh, U0, backend, precision="float32")
+        simulation.step(3)
+        assert simulation.U.dtype == np.float32
+        assert simulation.residual().dtype == np.float32
+        assert isinstance(simulation.time, float)
+        assert simulation.kernels.kernels.dtype == np.float32
+
+        reference = Simulation(mesh, U0, backend)
+        reference.step(3)
+        assert np.allclose(simulation.U, reference.U, rtol=1e-5, atol=1e-5)
+        assert simulation.time == pytest.approx(reference.time, rel=1e-5)
+
+    def test_compare_precision(self):
+        from precision_validation import compare_precision
+
+        report = compare_precision(make_test_mesh(), max_time=0.02, backend="numpy")
+        assert np.all(report["l1_difference"] < 1e-5)
+        assert np.all(report["max_difference"] < 1e-5)
+        assert np.all(np.abs(report["totals_difference"]) < 1e-5)
+        assert set(report["wall_time"]) == {"float64", "float32"}
+
+    def test_invalid_precision(self):
+        mesh = make_test_mesh()
+        U0 = make_initial_solution(mesh.geometry().cell_centroids)
+        with pytest.raises(ValueError):
+            Simulation(mesh, U0, precision="float16")
+        with pytest.raises(ValueError):
+            Simulation(mesh, U0, integrator="backward-euler", precision="float32")
@@ -0,0 +1,157 @@
+import numpy as np
+import pytest
+from mesh import Mesh
+from kernels import compute_time_step
+from solver import *
+from mesh_fixtures import structured_quad_mesh, random_solution
+
+
+class TestSolver:
+
+    def test_compute_time_step(self):
+        nodes, cell_groups = structured_quad_mesh(6, 5)
+        mesh = Mesh(cell_groups, nodes)
+        faces = mesh.edges()
+        geometry = mesh.geometry()
+
+        rng = np.random.default_rng(7)
+        U = random_solution(rng, mesh.cells().dof_ids.shape[0])
+
+        dt = compute_time_step(
+            U, faces, geometry.face_normals, geometry.face_lengths, geometry.cell_volumes
+        )
+
+        # Reference: accumulate spectral radii face by face
+        spectral_radius_sum = np.zeros(U.shape[0])
+        for idx_face in range(faces.num_faces()):
+            normal = geometry.face_normals[idx_face]
+            for idx_cell in (faces.left_cell[idx_face], faces.right_cell[idx_face]):
+                if idx_cell < 0:
+                    continue
+                u = U[idx_cell]
+                p = 0.4 * (u[3] - 0.5 * (u[1] * u[1] + u[2] * u[2]) / u[0])
+                a = np.sqrt(1.4 * p / u[0])
+                v_n = (u[1] * normal[0] + u[2] * normal[1]) / u[0]
+                spectral_radius_sum[idx_cell] += (
+                    max(abs(v_n), abs(v_n - a), abs(v_n + a))
+                    * geometry.face_lengths[idx_face]
+                )
+
+        assert np.allclose(dt, geometry.cell_volumes / spectral_radius_sum, rtol=1e-13)
+
+    def test_steady_state_with_local_time_stepping(self, capsys):
+        nodes, cell_groups = structured_quad_mesh(10, 10)
+        mesh = Mesh(cell_groups, nodes)
+        centroids = mesh.geometry().cell_centroids
+
+        # Supersonic uniform flow carrying a density bump out of the domain
+        free_stream = primitive_to_conservative_vars(1.0, 2.0 * np.sqrt(1.4), 0.3, 1.0)
+        U0 = np.tile(free_stream, (100, 1))
+        U0[:, 0] *= 1.0 + 0.2 * np.exp(
+            -50.0 * ((centroids[:, 0] - 0.3) ** 2 + (centroids[:, 1] - 0.5) ** 2)
+        )
+
+        U = run_solver(
+            mesh,
+            backend="numpy",
+            initial_solution=U0,
+            steady=True,
+            residual_drop=3.0,
+            max_iter=2000,
+        )
+
+        output = capsys.readouterr().out
+        assert "Converged after" in output
+        assert np.allclose(U[:, 0], 1.0, atol=1e-3)
+
+    def test_implicit_steady_state(self, capsys):
+        nodes, cell_groups = structured_quad_mesh(10, 10)
+        mesh = Mesh(cell_groups, nodes)
+        centroids = mesh.geometry().cell_centroids
+
+        free_stream = primitive_to_conservative_vars(1.0, 2.0 * np.sqrt(1.4), 0.3, 1.0)
+        U0 = np.tile(free_stream, (100, 1))
+        U0[:, 0] *= 1.0 + 0.2 * np.exp(
+            -50.0 * ((centroids[:, 0] - 0.3) ** 2 + (centroids[:, 1] - 0.5) ** 2)
+        )
+
+        for integrator in ("backward-euler", "newton-krylov"):
+            U = run_solver(
+                mesh,
+                backend="numpy",
+                initial_solution=U0,
+                steady=True,
+                residual_drop=6.0,
+                max_iter=100,
+                integrator=integrator,
+                CFL=5.0,
+                max_CFL=1.0e4,
+            )
+
+            output = capsys.readouterr().out
+            assert "Converged after" in output
+            assert np.allclose(U, free_stream, atol=1e-4)
+
+    def test_closed_box_conserves_mass_and_energy(self, capsys):
+        nodes, cell_groups = structured_quad_mesh(12, 12)
+        mesh = Mesh(cell_groups, nodes)
+        geometry = mesh.geometry()
+
+        # Riemann problem in a box of walls, nothing leaves the domain
+        walls = {name: "slip-wall" for name in ("bottom", "right", "top", "left")}
+        U0 = make_initial_solution(geometry.cell_centroids)
+        U = run_solver(mesh, backend="numpy", boundary_conditions=walls)
+
+        assert "boundary 'top' -> slip-wall" in capsys.readouterr().out
+        totals = geometry.cell_volumes @ U
+        initial_totals = geometry.cell_volumes @ U0
+        assert np.allclose(totals[[0, 3]], initial_totals[[0, 3]], rtol=1e-12)
+
+    def test_ensemble_matches_single_runs(self, capsys):
+        nodes, cell_groups = structured_quad_mesh(10, 10)
+        mesh = Mesh(cell_groups, nodes)
+
+        U0 = make_initial_solution(mesh.geometry().cell_centroids)
+        U1 = U0.copy()
+        U1[:, 3] *= 1.5
+        single = [
+            run_solver(mesh, backend="numpy", initial_solution=u) for u in (U0, U1)
+        ]
+
+        # Every member with its own time step follows its single run
+        U = run_solver(
+            mesh, initial_solution=np.stack([U0, U1]), ensemble_dt="member"
+        )
+        assert "ensemble of 2 members" in capsys.readouterr().out
+        assert np.allclose(U[0], single[0], rtol=1e-13)
+        assert np.allclose(U[1], single[1], rtol=1e-13)
+
+        # With a shared time step, identical members stay identical
+        U = run_solver(mesh, initial_solution=np.stack([U0, U0]))
+        assert np.allclose(U[0], single[0], rtol=1e-13)
+        assert np.array_equal(U[0], U[1])
+
+    def test_initial_solution_from_regions(self):
+        rng = np.random.default_rng(3)
+        centroids = rng.random((200, 2))
+        centroids[:4] = 0.5  # on the corner of all quadrants
+
+        # Reference: the quadrant of every cell tested one by one
+        U0 = make_initial_solution(centroids)
+        for centroid, u in zip(centroids, U0):
+            for predicate, state in RIEMANN_REGIONS:
+                if predicate(*centroid):
+                    assert np.array_equal(u, primitive_to_conservative_vars(*state))
+                    break
+
+        # States given by a callable on centroid coordinates
+        U = make_initial_solution(centroids, lambda x, y: (1.0 + x, y, 0.0, 1.0))
+        assert U.shape == (200, 4)
+        for centroid, u in zip(centroids, U):
+            x, y = centroid
+            assert np.allclose(
+                u, primitive_to_conservative_vars(1.0 + x, y, 0.0, 1.0), rtol=1e-15
+            )
+
+        with pytest.raises(ValueError):
+            make_initial_solution(centroids, RIEMANN_REGIONS[:3])
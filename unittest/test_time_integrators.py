@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from time_integrators import *
+
+
+class LinearDecayKernels:
+    """Kernels with L(U) = Res(U) / |C_i| = rate * U, solution exp(-rate t) U"""
+
+    def __init__(self, rate: float, cell_volumes: np.array):
+        self.rate = rate
+        self.cell_volumes = cell_volumes
+
+    def residual(self, U: np.array, out: np.array = None) -> np.array:
+        Res = np.empty_like(U) if out is None else out
+        np.multiply(self.rate * self.cell_volumes[:, np.newaxis], U, out=Res)
+        return Res
+
+    def update(self, U: np.array, Res: np.array, dt: float):
+        U -= (dt / self.cell_volumes)[:, np.newaxis] * Res
+
+
+class TestTimeIntegrators:
+
+    @pytest.mark.parametrize(
+        "name, amplification",
+        [
+            ("euler", lambda z: 1.0 - z),
+            ("ssp-rk2", lambda z: 1.0 - z + z**2 / 2),
+            ("ssp-rk3", lambda z: 1.0 - z + z**2 / 2 - z**3 / 6),
+        ],
+    )
+    def test_amplification_factor(self, name, amplification):
+        rng = np.random.default_rng(31)
+        U = rng.standard_normal((10, 4))
+        kernels = LinearDecayKernels(2.0, rng.uniform(0.5, 1.5, 10))
+        integrator = make_time_integrator(name, U.shape)
+        assert integrator.name == name
+
+        dt = 0.1
+        expected = amplification(kernels.rate * dt) * U
+        residual = kernels.residual(U)
+
+        integrator.step(kernels, U, dt)
+
+        assert np.allclose(U, expected, rtol=1e-14)
+        # Residual of the state at the beginning of the step
+        assert np.allclose(integrator.residual, residual, rtol=1e-14)
+
+    @pytest.mark.parametrize("name, order", [("ssp-rk2", 2), ("ssp-rk3", 3)])
+    def test_order_of_convergence(self, name, order):
+        kernels = LinearDecayKernels(1.0, np.ones(1))
+        errors = []
+        for num_steps in (20, 40):
+            U = np.ones((1, 4))
+            integrator = make_time_integrator(name, U.shape)
+            for _ in range(num_steps):
+                integrator.step(kernels, U, 1.0 / num_steps)
+            errors.append(abs(U[0, 0] - np.exp(-1.0)))
+
+        assert np.log2(errors[0] / errors[1]) == pytest.approx(order, abs=0.1)
+
+    def test_unknown_integrator(self):
+        with pytest.raises(ValueError):
+            make_time_integrator("rk4", (3, 4))
@@ -0,0 +1,24 @@
+import numpy as np
+
+
+class Workspace:
+    """Named work buffers reused across calls. A buffer is allocated on the
+    first request and again only when a request differs in shape or dtype,
+    so kernels called repeatedly with arrays of the same shape allocate
+    nothing.
+    """
+
+    def __init__(self):
+        self.__buffers = {}
+
+    def get(self, name: str, shape: tuple, dtype=np.float64) -> np.array:
+        """Buffer of given name, shape and dtype, contents undefined"""
+        buffer = self.__buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self.__buffers[name] = buffer
+        return buffer
+
+    def nbytes(self) -> int:
+        """Memory held by all buffers in bytes"""
+        return sum(buffer.nbytes for buffer in self.__buffers.values())